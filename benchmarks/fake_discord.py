@@ -0,0 +1,236 @@
+"""
+A local stand-in for Discord's REST API, enough of it for the Logger to deliver logs to.
+
+Point nextcord at it by setting `nextcord.http.Route.BASE` to `server.base`. Requests
+are rate limited per route and globally the way Discord does it: every response carries
+the X-RateLimit headers nextcord paces itself by, and a request over the limit gets a
+429 with `retry_after`. Everything served is counted for the report.
+"""
+import asyncio
+import itertools
+import json
+import re
+from collections import Counter
+
+from aiohttp import web
+
+API_PREFIX = '/api/v10'
+# (method, route) -> (requests, per seconds), the limits Discord applies to the routes
+# the Logger uses. Buckets are kept per major parameter (channel, guild or webhook).
+ROUTE_LIMITS = {
+    ('POST', '/channels/{channel_id}/messages'): (5, 5.0),
+    ('PUT', '/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me'): (1, 0.25),
+    ('POST', '/webhooks/{webhook_id}/{webhook_token}'): (5, 2.0),
+    ('POST', '/channels/{channel_id}/webhooks'): (1, 1.0),
+}
+DEFAULT_LIMIT = (10, 10.0)
+GLOBAL_LIMIT = (50, 1.0)
+MAJOR_PARAMETERS = ('channel_id', 'guild_id', 'webhook_id')
+BOT_USER = {'id': '1', 'username': 'Logger', 'discriminator': '0', 'avatar': None, 'bot': True}
+
+
+class Window:
+    """A fixed window rate limit: `limit` requests, then nothing until `reset`."""
+
+    __slots__ = ('limit', 'per', 'remaining', 'reset')
+
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset = 0.0
+
+    def take(self, now):
+        if now >= self.reset:
+            self.remaining = self.limit
+            self.reset = now + self.per
+        if self.remaining == 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+def _pattern(route):
+    parts = re.split(r'(\{\w+\})', route)
+    return re.compile('^' + ''.join(
+        f'(?P<{part[1:-1]}>[^/]+)' if part.startswith('{') else re.escape(part) for part in parts) + '$')
+
+
+def _json(data, status=200, headers=None):
+    # nextcord only decodes a body whose content type is exactly application/json, no charset
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={**(headers or {}), 'Content-Type': 'application/json'})
+
+
+async def _payload(request):
+    # nextcord posts JSON, or multipart with a payload_json part when there are files
+    if request.content_type.startswith('multipart/'):
+        form = await request.post()
+        return json.loads(form.get('payload_json') or '{}')
+    return await request.json()
+
+
+class FakeDiscord:
+    """
+    The fake API. `latency` seconds are added to every response, like a round trip
+    to Discord. After the run `requests`, `limited` (429s by route) and `messages`/
+    `embeds` (what was posted) tell what the bot did.
+    """
+
+    def __init__(self, latency=0.05, route_limits=None, global_limit=GLOBAL_LIMIT):
+        self.latency = latency
+        self.route_limits = route_limits or ROUTE_LIMITS
+        self.global_window = Window(*global_limit)
+        self.windows = {}
+        self.requests = Counter()
+        self.limited = Counter()
+        self.messages = 0
+        self.embeds = 0
+        self.webhooks = {}  # channel id -> [webhook payload]
+        self.channels = {}  # channel id -> guild id, for the channels a delivery worker fetches
+        self.ids = itertools.count(1 << 60)
+        self.routes = [
+            ('GET', '/users/@me', self.current_user),
+            ('GET', '/channels/{channel_id}', self.get_channel),
+            ('POST', '/channels/{channel_id}/messages', self.create_message),
+            ('POST', '/webhooks/{webhook_id}/{webhook_token}', self.execute_webhook),
+            ('GET', '/channels/{channel_id}/webhooks', self.channel_webhooks),
+            ('POST', '/channels/{channel_id}/webhooks', self.create_webhook),
+            ('GET', '/guilds/{guild_id}/audit-logs', self.audit_logs),
+            ('GET', '/applications/{application_id}/commands', self.no_commands),
+            ('PUT', '/applications/{application_id}/commands', self.no_commands),
+            ('GET', '/applications/{application_id}/guilds/{guild_id}/commands', self.no_commands),
+            ('PUT', '/applications/{application_id}/guilds/{guild_id}/commands', self.no_commands),
+            ('PUT', '/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me', self.no_content),
+            ('PUT', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', self.no_content),
+            ('DELETE', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', self.no_content),
+        ]
+        self._patterns = [(method, route, _pattern(route), handler) for method, route, handler in self.routes]
+        self._runner = None
+        self.base = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base = f'http://{host}:{port}{API_PREFIX}'
+        return self.base
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _match(self, method, path):
+        for route_method, route, pattern, handler in self._patterns:
+            if route_method == method:
+                match = pattern.match(path)
+                if match:
+                    return route, match.groupdict(), handler
+        return None, {}, None
+
+    async def handle(self, request):
+        path = request.path[len(API_PREFIX):] if request.path.startswith(API_PREFIX) else request.path
+        route, params, handler = self._match(request.method, path)
+        label = f'{request.method} {route or path}'
+        self.requests[label] += 1
+        await asyncio.sleep(self.latency)
+        now = asyncio.get_running_loop().time()
+
+        if not self.global_window.take(now):
+            self.limited['global'] += 1
+            return self._limited(self.global_window, now, is_global=True)
+        limit = self.route_limits.get((request.method, route), DEFAULT_LIMIT)
+        major = next((params[name] for name in MAJOR_PARAMETERS if name in params), None)
+        key = (request.method, route, major)
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = Window(*limit)
+        if not window.take(now):
+            self.limited[label] += 1
+            return self._limited(window, now, bucket=key)
+
+        if handler is None:
+            response = _json({'message': '404: Not Found', 'code': 0}, status=404)
+        else:
+            response = await handler(request, **params)
+        response.headers.update(self._headers(window, now, key))
+        return response
+
+    def _headers(self, window, now, key):
+        return {
+            'X-RateLimit-Limit': str(window.limit),
+            'X-RateLimit-Remaining': str(window.remaining),
+            'X-RateLimit-Reset-After': f'{max(window.reset - now, 0):.3f}',
+            'X-RateLimit-Bucket': f'{abs(hash(key[:2])):x}',
+        }
+
+    def _limited(self, window, now, bucket=None, is_global=False):
+        retry_after = max(window.reset - now, 0.001)
+        headers = {'Retry-After': f'{retry_after:.3f}', 'Via': '1.1 google'}
+        if is_global:
+            headers['X-RateLimit-Global'] = 'true'
+        else:
+            headers.update(self._headers(window, now, bucket))
+        body = {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': is_global}
+        return _json(body, status=429, headers=headers)
+
+    def _message(self, channel_id, payload, author=BOT_USER):
+        embeds = payload.get('embeds') or []
+        self.messages += 1
+        self.embeds += len(embeds)
+        return {
+            'id': str(next(self.ids)), 'channel_id': channel_id, 'author': author, 'content': payload.get('content') or '',
+            'timestamp': '2024-01-01T00:00:00+00:00', 'edited_timestamp': None, 'tts': False, 'mention_everyone': False,
+            'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': embeds, 'pinned': False, 'type': 0,
+        }
+
+    async def current_user(self, request):
+        return _json(BOT_USER)
+
+    async def get_channel(self, request, channel_id):
+        if channel_id not in self.channels:
+            return _json({'message': 'Unknown Channel', 'code': 10003}, status=404)
+        return _json({
+            'id': channel_id, 'type': 0, 'guild_id': self.channels[channel_id], 'name': 'logger', 'position': 0,
+            'permission_overwrites': [], 'nsfw': False, 'parent_id': None, 'topic': None, 'last_message_id': None,
+        })
+
+    async def create_message(self, request, channel_id):
+        return _json(self._message(channel_id, await _payload(request)))
+
+    async def execute_webhook(self, request, webhook_id, webhook_token):
+        channel_id = next((hook['channel_id'] for hooks in self.webhooks.values() for hook in hooks
+                           if hook['id'] == webhook_id), '0')
+        message = self._message(channel_id, await _payload(request), {**BOT_USER, 'id': webhook_id})
+        if request.query.get('wait') in ('true', '1'):
+            return _json(message)
+        return web.Response(status=204)
+
+    async def channel_webhooks(self, request, channel_id):
+        return _json(self.webhooks.get(channel_id, []))
+
+    async def create_webhook(self, request, channel_id):
+        payload = await request.json()
+        hook = {
+            'id': str(next(self.ids)), 'type': 1, 'channel_id': channel_id, 'guild_id': None, 'name': payload.get('name'),
+            'avatar': None, 'token': f'token{next(self.ids)}', 'user': BOT_USER, 'application_id': None,
+        }
+        self.webhooks.setdefault(channel_id, []).append(hook)
+        return _json(hook)
+
+    async def audit_logs(self, request, guild_id):
+        return _json({
+            'audit_log_entries': [], 'users': [], 'webhooks': [], 'threads': [], 'integrations': [],
+            'application_commands': [], 'auto_moderation_rules': [], 'guild_scheduled_events': [],
+        })
+
+    async def no_commands(self, request, **params):
+        # nextcord syncs application commands on connect; the Logger registers none of its own
+        return _json([])
+
+    async def no_content(self, request, **params):
+        return web.Response(status=204)
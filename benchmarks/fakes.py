@@ -0,0 +1,148 @@
+"""
+Stand-ins for the nextcord objects the Logger's listeners read, cheap to build and with
+no connection behind them. Messages are real nextcord.Message subclasses, since the
+journal tells them apart with isinstance; everything else only has the attributes the
+listeners and templates use.
+"""
+import copy
+import datetime
+from types import SimpleNamespace
+
+import nextcord
+from nextcord.utils import utcnow
+
+GUILD_ID = 1100000000000000000
+LOGGER_CHANNEL_ID = 1100000000000000001
+BASE_ID = 1130000000000000000
+AVATAR = SimpleNamespace(url='https://cdn.discordapp.com/avatars/404687039905136661/abc.png')
+
+
+async def _nothing(*args, **kwargs):
+    return None
+
+
+class FakeUser(SimpleNamespace):
+    def __str__(self):
+        return self.name
+
+
+class FakeMember(FakeUser):
+    add_roles = remove_roles = _nothing
+
+    @property
+    def user(self):
+        return self
+
+
+class FakeRole(SimpleNamespace):
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeChannel(SimpleNamespace):
+    send = _nothing
+
+    def __str__(self):
+        return self.name
+
+    async def webhooks(self):
+        return self.hooks
+
+
+class FakeMessage(nextcord.Message):
+    def __init__(self, id, channel, author, content, attachments=(), edited_at=None):
+        self.id = id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.attachments = list(attachments)
+        self._edited_timestamp = edited_at
+        self.reactions = []
+
+    def __repr__(self):
+        return f'<FakeMessage id={self.id}>'
+
+    add_reaction = _nothing
+
+
+def user(id, name=None, bot=False):
+    name = name or f'user{id % 10000}'
+    return FakeUser(
+        id=id, name=name, discriminator='0', display_name=name, mention=f'<@{id}>', bot=bot,
+        avatar=AVATAR, display_avatar=AVATAR, created_at=utcnow() - datetime.timedelta(days=400), mutual_guilds=[],
+    )
+
+
+def renamed(obj, attr='name'):
+    """A shallow copy of `obj` with a different `attr`, for before/after pairs."""
+    after = copy.copy(obj)
+    setattr(after, attr, f'{getattr(obj, attr)}-renamed')
+    return after
+
+
+class World:
+    """
+    One guild with a logger channel, a few text channels, roles and members: everything
+    a scenario needs to build listener arguments. `messages` is the Logger's message store,
+    for the raw events that only get interesting when the message is stored.
+    """
+
+    def __init__(self, members=1000, channels=20):
+        self.messages = None
+        self.ids = iter(range(BASE_ID, BASE_ID + 10 ** 12))
+        me = SimpleNamespace(guild_permissions=nextcord.Permissions.none())
+        self.guild = SimpleNamespace(
+            id=GUILD_ID, name='Benchmark Guild', region='us-west', member_count=members, me=me,
+            roles=[], channels=[], text_channels=[], members=[], emojis=[], stickers=[],
+        )
+        self.everyone = self.role(GUILD_ID, '@everyone')
+        self.members_role = self.role(next(self.ids), 'Members')
+        self.guild.roles += [self.everyone, self.members_role]
+        self.logger_channel = self.channel(LOGGER_CHANNEL_ID, '📝-logger')
+        self.general = self.channel(next(self.ids), 'general')
+        self.text = [self.general] + [self.channel(next(self.ids), f'channel-{n}') for n in range(channels - 1)]
+        self.guild.channels = self.guild.text_channels = [self.logger_channel] + self.text
+        self.channels = {channel.id: channel for channel in self.guild.channels}
+        self.members = [self.member(next(self.ids)) for _ in range(members)]
+        self.guild.members = self.members
+        self.bot_user = user(next(self.ids), 'Logger', bot=True)
+
+    def role(self, id, name):
+        return FakeRole(id=id, name=name, mention=f'<@&{id}>', color=nextcord.Color.blue(), guild=self.guild)
+
+    def channel(self, id, name, parent_id=None):
+        return FakeChannel(
+            id=id, name=name, mention=f'<#{id}>', guild=self.guild, category_id=None, parent_id=parent_id, hooks=[])
+
+    def member(self, id):
+        member = FakeMember(**vars(user(id)), guild=self.guild, nick=None, joined_at=utcnow(), activity=None,
+                            roles=[self.everyone, self.members_role], _roles={self.members_role.id})
+        member.mutual_guilds = [self.guild]
+        return member
+
+    def pick(self, i):
+        """A member and a channel for the i-th event, spread over the guild."""
+        return self.members[i % len(self.members)], self.text[i % len(self.text)]
+
+    def message(self, i, content='hello world ' * 8, edited_at=None, id=None):
+        author, channel = self.pick(i)
+        return FakeMessage(id or next(self.ids), channel, author, content, edited_at=edited_at)
+
+    def stored_message(self, i):
+        """A message the Logger has in its store, as if it had seen it being sent."""
+        message = self.message(i)
+        self.messages.add(GUILD_ID, message, 4 * 1024 * 1024)
+        return message
+
+    def payload(self, i, **attrs):
+        author, channel = self.pick(i)
+        return SimpleNamespace(guild_id=GUILD_ID, channel_id=channel.id, message_id=next(self.ids), user_id=author.id,
+                               member=author, cached_message=None, emoji='👍', **attrs)
+
+    def reaction(self, i):
+        return SimpleNamespace(message=self.message(i), emoji='👍', count=1)
+
+    def thread(self, i):
+        _, channel = self.pick(i)
+        return self.channel(next(self.ids), f'thread-{i}', parent_id=channel.id)
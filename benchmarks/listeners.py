@@ -0,0 +1,296 @@
+"""
+Drives every Logger listener with fake Discord objects (see fakes.py) and reports, per
+listener, events/sec, p50/p99 latency and memory per event. Sends go to a Sink instead
+of Discord; the journal, search index and roster write to a temporary directory.
+
+    python -m benchmarks.listeners [--events N] [--rate R] [--no-memory] [listener ...]
+
+Without --rate every listener is driven as fast as it goes; with it, events are spaced
+to R per second. Memory is measured in a second pass under tracemalloc: "peak" is the
+most memory an event had allocated at once, "kept" what was still allocated after it
+(message store, dedup keys, queued sends), both averaged per event.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import nextcord
+from nextcord.ext import commands
+from nextcord.utils import utcnow
+
+from benchmarks.fakes import GUILD_ID, LOGGER_CHANNEL_ID, FakeMessage, World, renamed, user
+from commands.cogs.log.Logger import Logger
+from commands.utils.send_queue import SendQueue
+
+
+class Sink:
+    """Takes the place of the HTTP send: counts what would have been posted."""
+
+    def __init__(self, world):
+        self.world = world
+        self.messages = 0
+        self.embeds = 0
+
+    async def send(self, embeds):
+        self.messages += 1
+        self.embeds += len(embeds)
+        return FakeMessage(next(self.world.ids), self.world.logger_channel, self.world.bot_user, '')
+
+
+def _entry(w, i):
+    member, _ = w.pick(i)
+    return SimpleNamespace(guild=w.guild, user=member, target=w.members[(i + 1) % len(w.members)],
+                           action=nextcord.AuditLogAction.kick, reason=None)
+
+
+def _event(w, i):
+    _, channel = w.pick(i)
+    return SimpleNamespace(guild=w.guild, channel=channel, name=f'event {i}', description='an event',
+                           scheduled_start_time=utcnow(), scheduled_end_time=None, status='scheduled')
+
+
+def _stage(w, i):
+    _, channel = w.pick(i)
+    return SimpleNamespace(guild=w.guild, channel=channel, topic=f'topic {i}', privacy_level='guild_only',
+                           speakers=w.members[:3])
+
+
+def _rule(w, i):
+    return SimpleNamespace(guild=w.guild, id=next(w.ids), name=f'rule {i}', enabled=True, creator=w.members[0])
+
+
+def _invite(w, i):
+    member, channel = w.pick(i)
+    return SimpleNamespace(guild=w.guild, channel=channel, inviter=member, code=f'code{i}', max_age=3600,
+                           max_uses=0, temporary=False)
+
+
+def _voice(w, i):
+    member, channel = w.pick(i)
+    return member, SimpleNamespace(channel=None), SimpleNamespace(channel=channel)
+
+
+def _webhooks(w, i):
+    _, channel = w.pick(i)
+    channel.hooks = [SimpleNamespace(id=next(w.ids), name=f'hook {i}')]
+    return (channel,)
+
+
+def _raw_edit(w, i):
+    message = w.stored_message(i)
+    edited = utcnow().isoformat()
+    return (SimpleNamespace(guild_id=GUILD_ID, channel_id=message.channel.id, message_id=message.id, cached_message=None,
+                            data={'content': 'edited', 'edited_timestamp': edited}),)
+
+
+def _raw_delete(w, i):
+    message = w.stored_message(i)
+    return (SimpleNamespace(guild_id=GUILD_ID, channel_id=message.channel.id, message_id=message.id, cached_message=None),)
+
+
+def _presence(w, i):
+    member, _ = w.pick(i)
+    return member, renamed(member, 'activity') if member.activity else _with(member, activity=SimpleNamespace(name='a game'))
+
+
+def _with(obj, **attrs):
+    after = SimpleNamespace(**vars(obj))
+    for name, value in attrs.items():
+        setattr(after, name, value)
+    return after
+
+
+# Listener name -> function building the arguments of its i-th event. Every event uses
+# fresh ids, so nothing is deduplicated away unless the listener's own logic does it.
+SCENARIOS = {
+    'on_message': lambda w, i: (w.message(i),),
+    'on_bulk_message_delete': lambda w, i: ([w.message(i) for _ in range(10)],),
+    'on_message_delete': lambda w, i: (w.message(i),),
+    'on_message_edit': lambda w, i: (lambda m: (m, w.message(i, 'edited', utcnow(), id=m.id)))(w.message(i)),
+    'on_raw_message_delete': _raw_delete,
+    'on_raw_message_edit': _raw_edit,
+    'on_member_join': lambda w, i: (w.member(next(w.ids)),),
+    'on_member_remove': lambda w, i: (w.member(next(w.ids)),),
+    'on_raw_member_remove': lambda w, i: (SimpleNamespace(guild_id=GUILD_ID, user=user(next(w.ids))),),
+    'on_member_ban': lambda w, i: (w.guild, user(next(w.ids))),
+    'on_member_unban': lambda w, i: (w.guild, user(next(w.ids))),
+    'on_member_update': lambda w, i: (lambda m: (m, _with(m, nick=f'nick {i}')))(w.pick(i)[0]),
+    'on_user_update': lambda w, i: (lambda m: (m, renamed(m)))(w.pick(i)[0]),
+    'on_member_emojis_update': lambda w, i: (w.pick(i)[0], [], ['😀']),
+    'on_member_role_update': lambda w, i: (w.pick(i)[0], [], [w.members_role]),
+    'on_voice_state_update': _voice,
+    'on_presence_update': _presence,
+    'on_typing': lambda w, i: (w.pick(i)[1], w.pick(i)[0], utcnow()),
+    'on_raw_typing': lambda w, i: (w.payload(i, when=utcnow()),),
+    'on_reaction_add': lambda w, i: (w.reaction(i), w.pick(i + 1)[0]),
+    'on_raw_reaction_add': lambda w, i: (w.payload(i),),
+    'on_reaction_remove': lambda w, i: (w.reaction(i), w.pick(i + 1)[0]),
+    'on_raw_reaction_remove': lambda w, i: (w.payload(i),),
+    'on_reaction_clear': lambda w, i: (w.message(i), []),
+    'on_raw_reaction_clear': lambda w, i: (w.payload(i),),
+    'on_reaction_clear_emoji': lambda w, i: (w.reaction(i),),
+    'on_raw_reaction_clear_emoji': lambda w, i: (w.payload(i),),
+    'on_interaction': lambda w, i: (SimpleNamespace(guild=w.guild, channel=w.pick(i)[1], user=w.pick(i)[0], id=next(w.ids),
+                                                    type=nextcord.InteractionType.application_command,
+                                                    data={'name': 'search'}),),
+    'on_guild_channel_create': lambda w, i: (w.channel(next(w.ids), f'new-{i}'),),
+    'on_guild_channel_delete': lambda w, i: (w.channel(next(w.ids), f'old-{i}'),),
+    'on_guild_channel_update': lambda w, i: (lambda c: (c, renamed(c)))(w.pick(i)[1]),
+    'on_guild_channel_pins_update': lambda w, i: (w.pick(i)[1], utcnow()),
+    'on_webhooks_update': _webhooks,
+    'on_thread_create': lambda w, i: (w.thread(i),),
+    'on_thread_join': lambda w, i: (w.thread(i),),
+    'on_thread_remove': lambda w, i: (w.thread(i),),
+    'on_thread_delete': lambda w, i: (w.thread(i),),
+    'on_thread_update': lambda w, i: (lambda t: (t, renamed(t)))(w.thread(i)),
+    'on_thread_member_join': lambda w, i: (SimpleNamespace(id=w.pick(i)[0].id, user=w.pick(i)[0], thread=w.thread(i)),),
+    'on_thread_member_remove': lambda w, i: (SimpleNamespace(id=w.pick(i)[0].id, user=w.pick(i)[0], thread=w.thread(i)),),
+    'on_guild_join': lambda w, i: (w.guild,),
+    'on_guild_remove': lambda w, i: (w.guild,),
+    'on_guild_update': lambda w, i: (w.guild, renamed(w.guild)),
+    'on_guild_role_create': lambda w, i: (w.role(next(w.ids), f'role {i}'),),
+    'on_guild_role_delete': lambda w, i: (w.role(next(w.ids), f'role {i}'),),
+    'on_guild_role_update': lambda w, i: (lambda r: (r, renamed(r)))(w.role(next(w.ids), f'role {i}')),
+    'on_guild_emojis_update': lambda w, i: (w.guild, [], ['😀', '😁']),
+    'on_guild_stickers_update': lambda w, i: (w.guild, [], ['sticker']),
+    'on_integration_create': lambda w, i: (SimpleNamespace(guild=w.guild, id=next(w.ids), name=f'integration {i}'),),
+    'on_integration_update': lambda w, i: (SimpleNamespace(guild=w.guild, id=next(w.ids), name=f'integration {i}'),),
+    'on_raw_integration_delete': lambda w, i: (SimpleNamespace(guild_id=GUILD_ID, integration_id=next(w.ids)),),
+    'on_invite_create': lambda w, i: (_invite(w, i),),
+    'on_invite_delete': lambda w, i: (_invite(w, i),),
+    'on_stage_instance_create': lambda w, i: (_stage(w, i),),
+    'on_stage_instance_delete': lambda w, i: (_stage(w, i),),
+    'on_stage_instance_update': lambda w, i: (lambda s: (s, _with(s, topic='new topic')))(_stage(w, i)),
+    'on_guild_scheduled_event_create': lambda w, i: (_event(w, i),),
+    'on_guild_scheduled_event_delete': lambda w, i: (_event(w, i),),
+    'on_guild_scheduled_event_update': lambda w, i: (lambda e: (e, renamed(e)))(_event(w, i)),
+    'on_guild_scheduled_event_user_add': lambda w, i: (_event(w, i), w.pick(i)[0]),
+    'on_guild_scheduled_event_user_remove': lambda w, i: (_event(w, i), w.pick(i)[0]),
+    'on_auto_moderation_rule_create': lambda w, i: (_rule(w, i),),
+    'on_auto_moderation_rule_delete': lambda w, i: (_rule(w, i),),
+    'on_auto_moderation_rule_update': lambda w, i: (lambda r: (r, renamed(r)))(_rule(w, i)),
+    'on_guild_audit_log_entry_create': lambda w, i: (_entry(w, i),),
+}
+
+
+class Result:
+    def __init__(self, event, seconds, latencies, peak=None, kept=None, error=None):
+        self.event = event
+        self.seconds = seconds
+        self.latencies = latencies
+        self.peak = peak
+        self.kept = kept
+        self.error = error
+
+    def row(self):
+        if self.error:
+            return f'{self.event:<40} failed: {self.error!r}'
+        n = len(self.latencies)
+        p50, p99 = (statistics.quantiles(self.latencies, n=100)[i] * 1e6 for i in (49, 98)) if n > 1 else (0, 0)
+        memory = f'{self.peak / 1024:8.1f} {self.kept / 1024:8.2f}' if self.peak is not None else ''
+        return f'{self.event:<40} {n / self.seconds:10.0f} {p50:8.1f} {p99:8.1f} {memory}'
+
+
+class Harness:
+    """A Logger on a bot that never connects, logging one fake guild into a Sink."""
+
+    def __init__(self, members=1000, channels=20):
+        self.world = World(members, channels)
+        self.bot = commands.Bot(command_prefix='q', intents=nextcord.Intents.none())
+        # the Logger looks channels and guilds up on the bot; there's no gateway cache to fill
+        self.bot.get_channel = self.world.channels.get
+        self.bot.get_guild = {GUILD_ID: self.world.guild}.get
+        self.logger = Logger(self.bot)
+        self.logger.config.set(GUILD_ID, logger_channel=LOGGER_CHANNEL_ID)
+        self.logger.refresh_rules()
+        self.world.messages = self.logger.messages
+        self.sink = Sink(self.world)
+        self.logger.queues[LOGGER_CHANNEL_ID] = SendQueue(
+            self.world.logger_channel, flush_interval=0, sender=self.sink.send, metrics=self.logger.metrics)
+        self.listeners = dict(type(self.logger).__cog_listeners__)
+
+    async def drain(self):
+        await asyncio.gather(*(queue.flush() for queue in self.logger.queues.values()))
+
+    async def drive(self, event, events, rate=None, memory=False):
+        listener = getattr(self.logger, self.listeners[event])
+        build = SCENARIOS[event]
+        batch = [build(self.world, i) for i in range(events)]
+        latencies = []
+        peak = kept = 0
+        if memory:
+            tracemalloc.start()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        for i, args in enumerate(batch):
+            if rate:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if memory:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            began = time.perf_counter()
+            await listener(*args)
+            latencies.append(time.perf_counter() - began)
+            if memory:
+                peak += tracemalloc.get_traced_memory()[1] - before
+        seconds = time.perf_counter() - start
+        if memory:
+            kept = tracemalloc.get_traced_memory()[0] - start_memory
+            tracemalloc.stop()
+            return Result(event, seconds, latencies, peak / events, kept / events)
+        return Result(event, seconds, latencies)
+
+    def close(self):
+        self.logger.cog_unload()
+
+
+async def run(events, rate, memory, only):
+    harness = Harness()
+    print(f'{"listener":<40} {"events/s":>10} {"p50 us":>8} {"p99 us":>8}'
+          + (f' {"peak KiB":>8} {"kept KiB":>8}' if memory else ''))
+    try:
+        for event in only or SCENARIOS:
+            try:
+                result = await harness.drive(event, events, rate)
+                if memory:
+                    measured = await harness.drive(event, max(events // 10, 100), memory=True)
+                    result.peak, result.kept = measured.peak, measured.kept
+            except Exception as e:
+                result = Result(event, 0, [], error=e)
+            await harness.drain()
+            print(result.row())
+    finally:
+        harness.close()
+        await asyncio.sleep(0.1)
+    print(f'\n{harness.sink.messages} messages with {harness.sink.embeds} embeds sent to the sink')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('listeners', nargs='*', help='only these listeners (default: all)')
+    parser.add_argument('--events', type=int, default=2000, help='events per listener')
+    parser.add_argument('--rate', type=float, help='events per second (default: as fast as possible)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    args = parser.parse_args()
+    unknown = set(args.listeners) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'no scenario for {", ".join(sorted(unknown))}')
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # config.json, journal/, roster.db and search.db go here
+        try:
+            asyncio.run(run(args.events, args.rate, not args.no_memory, args.listeners))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-event embed render cost: the old hand-built nextcord.Embed (plus the to_dict it
+needs before it can be sent) against the compiled template.
+
+    python -m benchmarks.render [iterations]
+"""
+import datetime
+import sys
+import timeit
+from types import SimpleNamespace
+
+import nextcord
+
+from benchmarks.fakes import FakeUser
+from commands.utils.log_templates import TEMPLATES
+from commands.utils.templates import compile_templates
+
+
+def fake_message():
+    avatar = SimpleNamespace(url='https://cdn.discordapp.com/avatars/404687039905136661/abc.png')
+    author = FakeUser(
+        id=404687039905136661,
+        name='someone',
+        mention='<@404687039905136661>',
+        avatar=avatar,
+        display_avatar=avatar,
+    )
+    channel = SimpleNamespace(id=1116541851516817469, mention='<#1116541851516817469>')
+    return SimpleNamespace(
+        id=1130000000000000000,
+        author=author,
+        channel=channel,
+        content='hello world ' * 20,
+        attachments=[],
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+def old_on_message(message):
+    timestamp = message.created_at.strftime("%b %d, %Y %I:%M %p")
+    embed = nextcord.Embed(title='Message Log', color=nextcord.Color.blue())
+    embed.set_author(name=str(message.author), icon_url=message.author.avatar.url)
+    embed.add_field(name='Author', value=message.author.mention)
+    embed.add_field(name='Channel', value=message.channel.mention)
+    embed.add_field(name='Time', value=timestamp)
+    embed.add_field(name='Content', value=message.content, inline=False)
+    if len(message.attachments) > 0:
+        embed.add_field(name='Attachments', value='\n'.join([a.filename for a in message.attachments]))
+    return embed.to_dict()
+
+
+def main(iterations=100000):
+    message = fake_message()
+    template = compile_templates(TEMPLATES)['on_message']
+
+    cases = (
+        ('nextcord.Embed', lambda: old_on_message(message)),
+        ('template', lambda: template({'message': message})),
+    )
+    for name, fn in cases:
+        seconds = min(timeit.repeat(fn, number=iterations, repeat=3))
+        print(f'on_message {name:>15}: {seconds / iterations * 1e6:6.2f} us/event')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,203 @@
+"""
+Plays a gateway recording (see commands/cogs/log/Recorder.py) back through the Logger,
+sped up, with everything it sends going to a local FakeDiscord (see fake_discord.py)
+that rate limits like the real API. At the end it reports what was delivered, how late
+and what was dropped or rate limited on the way.
+
+    python -m benchmarks.replay recording.jsonl [--speed 10] [--latency 0.05] [--config config.json] [--workers 2]
+
+Guilds that have no logger channel in the given config log to their first text channel.
+The journal, search index and roster go to a temporary directory. With --workers the
+logs are delivered by that many worker processes (see commands/utils/delivery.py).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+import nextcord
+from nextcord.ext import commands
+
+from benchmarks.fake_discord import FakeDiscord
+from commands.utils.guild_config import GuildConfigStore
+from commands.utils.delivery import WORKERS_ENV
+from commands.utils.intents import enabled_events, intents_for
+from commands.utils.metrics import quantiles
+
+# How long to wait for the send queues to empty once the recording has been played.
+DRAIN_TIMEOUT = 120
+
+
+def read_recording(path):
+    """
+    Yield (seconds into the recording, event name, data) for every dispatch in it. A
+    recording appended to by a restarted bot starts its clock over; those parts are
+    played back to back. A torn last line is skipped.
+    """
+    offset = last = 0.0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            at = item['at'] + offset
+            if at < last:
+                offset = last
+                at = item['at'] + offset
+            last = at
+            payload = item['payload']
+            if payload.get('op') == 0 and payload.get('t'):
+                yield at, payload['t'], payload['d']
+
+
+class Replay:
+    def __init__(self, path, speed, latency, config_path=None, workers=0):
+        self.path = path
+        self.workers = workers
+        self.speed = speed
+        self.server = FakeDiscord(latency)
+        self.config_path = config_path
+        self.events = Counter()
+        self.unknown = Counter()
+        self.failed = Counter()
+        self.behind = 0.0  # the furthest the replay fell behind its schedule, in seconds
+        self.bot = self.logger = None
+
+    async def setup(self):
+        nextcord.http.Route.BASE = await self.server.start()
+        if self.config_path:
+            shutil.copy(self.config_path, 'config.json')
+        config = GuildConfigStore()
+        config.load()
+        os.environ[WORKERS_ENV] = str(self.workers)
+        self.bot = commands.Bot(command_prefix='q', intents=intents_for(enabled_events(config)),
+                                chunk_guilds_at_startup=False)
+        self.bot.load_extension('commands.cogs.log.Logger')
+        self.logger = self.bot.get_cog('Logger')
+        await self.bot.login('replay')
+
+    def configure(self, data):
+        """Give a guild from a GUILD_CREATE a logger channel if the config has none for it."""
+        guild = self.bot.get_guild(int(data['id']))
+        if guild and not self.logger.config.logger_channel_id(guild.id) and guild.text_channels:
+            self.logger.config.set(guild.id, logger_channel=guild.text_channels[0].id)
+            self.logger.refresh_rules()
+        channel_id = guild and self.logger.config.logger_channel_id(guild.id)
+        if channel_id:
+            self.server.channels[str(channel_id)] = str(guild.id)
+
+    async def play(self):
+        parsers = self.bot._connection.parsers
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for at, event, data in read_recording(self.path):
+            delay = start + at / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.behind = max(self.behind, -delay)
+            parser = parsers.get(event)
+            if parser is None:
+                self.unknown[event] += 1
+                continue
+            if event == 'READY':
+                data.setdefault('__shard_id__', None)
+            try:
+                # what the gateway does with a dispatch
+                parser(data)
+            except Exception as e:
+                self.failed[event] += 1
+                if self.failed[event] == 1:
+                    print(f'{event} failed to parse: {e!r}')
+                continue
+            self.events[event] += 1
+            if event == 'GUILD_CREATE':
+                self.configure(data)
+            # let the listeners the parser scheduled run, as they would between two payloads
+            await asyncio.sleep(0)
+        return loop.time() - start
+
+    async def drain(self):
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        queues = self.logger.queues.values()
+        delivery = self.logger.delivery
+        # a batch taken off its lanes is in queue.sending until its request is answered,
+        # however many 429s that waits out; worker records count until they're acked
+        while time.monotonic() < deadline and (
+                any(len(queue) or queue.sending or any(queue.dropped.values()) for queue in queues)
+                or (delivery and delivery.pending())):
+            await asyncio.sleep(0.1)
+
+    async def close(self):
+        self.bot.remove_cog('Logger')
+        await asyncio.sleep(0.1)
+        await self.bot.close()
+        await self.server.close()
+
+    def report(self, played):
+        metrics = self.logger.metrics
+        server = self.server
+        workers = f' with {self.workers} delivery workers' if self.workers else ''
+        print(f'\nReplayed {sum(self.events.values())} events at {self.speed:g}x{workers} in {played:.1f}s'
+              f' (fell behind by up to {self.behind:.2f}s)')
+        if self.unknown or self.failed:
+            print(f'Skipped: {dict(self.unknown)} unknown, {dict(self.failed)} failed to parse')
+        print('Busiest events: ' + ', '.join(f'{event} {count}' for event, count in self.events.most_common(8)))
+
+        sends = metrics.sends
+        print(f'\nSends: {sends["ok"]} ok, {sends["rate_limited"]} rate limited, {sends["error"]} failed;'
+              f' {metrics.rate_limits} 429s waited out by nextcord')
+        print(f'Logged {sum(metrics.logged.values())} events, {server.embeds} embeds in {server.messages} messages arrived')
+        print(f'Dropped: {dict(metrics.dropped) or "nothing"}')
+        print(f'Delivery lag p50/p99 {quantiles(metrics.lag)}, send time p50/p99 {quantiles(metrics.send_latency)}')
+
+        print('\nFake API requests (429s):')
+        for route, count in server.requests.most_common():
+            print(f'  {route:<75} {count:>7} ({server.limited.get(route, 0)})')
+        if server.limited.get('global'):
+            print(f'  global rate limit hit {server.limited["global"]} times')
+
+
+async def run(args):
+    # nextcord logs every 429 as a warning; they're counted and reported at the end instead
+    logging.getLogger('nextcord').addHandler(logging.NullHandler())
+    replay = Replay(args.recording, args.speed, args.latency, args.config, args.workers)
+    await replay.setup()
+    try:
+        played = await replay.play()
+        await replay.drain()
+        replay.report(played)
+    finally:
+        await replay.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('recording', help='a JSON lines file written by the gateway recorder')
+    parser.add_argument('--speed', type=float, default=10, help='playback speed, 1 to 100 (default: 10)')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the fake API takes to answer')
+    parser.add_argument('--config', help="the bot's config.json, for its logger channels and filters")
+    parser.add_argument('--workers', type=int, default=0, help='delivery worker processes (default: none)')
+    args = parser.parse_args()
+    if not 1 <= args.speed <= 100:
+        parser.error('--speed must be between 1 and 100')
+    args.recording = os.path.abspath(args.recording)
+    args.config = args.config and os.path.abspath(args.config)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
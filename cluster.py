@@ -0,0 +1,201 @@
+"""
+Runs the bot as shard clusters: separate `python main.py` processes that each connect a
+range of the shards, with their own event loop, Logger queues and connections.
+
+    python cluster.py --clusters 4 [--shards 16] [--report 300]
+
+Without --shards the count Discord recommends for the bot is used. The clusters share
+config.json (a guild set up through one of them is picked up by the others within
+seconds), the search index and the roster; each guild's journal is only ever written by
+the cluster its shard is on. A cluster that exits is restarted, waiting longer each time
+it keeps failing. With METRICS_PORT set, cluster N serves its metrics on METRICS_PORT + N.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from dotenv import load_dotenv
+from nextcord.http import HTTPClient, Route
+
+from commands.utils.shards import SAMPLE_INTERVAL, STALE_AFTER, STATUS_DIR
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+# Seconds Discord wants between two identifies in the same bucket.
+IDENTIFY_INTERVAL = 5.0
+# A cluster that exits is started again after this many seconds, twice as long each time
+# it exits within STABLE_AFTER seconds of starting, up to RESTART_DELAY_MAX.
+RESTART_DELAY = 5.0
+RESTART_DELAY_MAX = 300.0
+STABLE_AFTER = 600.0
+# How long clusters get to shut down before they're killed.
+SHUTDOWN_TIMEOUT = 30.0
+
+
+async def recommended_sharding(token):
+    """(shard count, identifies allowed at once) Discord recommends for the bot."""
+    http = HTTPClient(dispatch=lambda *args: None)
+    try:
+        await http.static_login(token)
+        data = await http.request(Route('GET', '/gateway/bot'))
+    finally:
+        await http.close()
+    return data['shards'], data['session_start_limit']['max_concurrency']
+
+
+def split_shards(shard_count, clusters):
+    """Contiguous shard id ranges, as even as they go, one per cluster."""
+    per, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for number in range(clusters):
+        end = start + per + (number < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class Cluster:
+    def __init__(self, number, shard_ids, shard_count):
+        self.number = number
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started = 0.0
+        self.restart_at = None
+        self.delay = RESTART_DELAY
+        self.restarts = 0
+
+    def env(self):
+        env = {
+            **os.environ,
+            'SHARD_COUNT': str(self.shard_count),
+            'SHARD_IDS': ','.join(map(str, self.shard_ids)),
+            'CLUSTER_ID': str(self.number),
+        }
+        # per process endpoints and files, so the clusters don't fight over them
+        if os.getenv('METRICS_PORT'):
+            env['METRICS_PORT'] = str(int(os.environ['METRICS_PORT']) + self.number)
+        if os.getenv('RECORD_GATEWAY'):
+            root, ext = os.path.splitext(os.environ['RECORD_GATEWAY'])
+            env['RECORD_GATEWAY'] = f'{root}.cluster{self.number}{ext}'
+        return env
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, MAIN], env=self.env())
+        self.started = time.monotonic()
+        self.restart_at = None
+        print(f'> Cluster {self.number}: shards {self.shard_ids[0]}-{self.shard_ids[-1]}, pid {self.process.pid}')
+
+    def check(self, now):
+        """Start the cluster again if it exited and its restart delay is up."""
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.restarts += 1
+                self.start()
+            return
+        code = self.process.poll()
+        if code is None:
+            return
+        if now - self.started > STABLE_AFTER:
+            self.delay = RESTART_DELAY
+        print(f'> Cluster {self.number} exited with {code}, restarting in {self.delay:.0f}s')
+        self.restart_at = now + self.delay
+        self.delay = min(self.delay * 2, RESTART_DELAY_MAX)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+    def wait(self, deadline):
+        if self.process is None:
+            return
+        try:
+            self.process.wait(max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def report(clusters):
+    """One line per cluster from the status files its ShardMonitor writes."""
+    now = time.time()
+    for cluster in clusters:
+        try:
+            with open(os.path.join(STATUS_DIR, f'cluster-{cluster.number}.json')) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            print(f'> Cluster {cluster.number}: no status yet, {cluster.restarts} restarts')
+            continue
+        if now - status['at'] > SAMPLE_INTERVAL * STALE_AFTER:
+            print(f'> Cluster {cluster.number}: no status for {now - status["at"]:.0f}s, {cluster.restarts} restarts')
+            continue
+        shards = status['shards']
+        up = sum(shard['up'] for shard in shards)
+        rate = sum(shard['rate'] for shard in shards)
+        guilds = sum(shard['guilds'] for shard in shards)
+        print(f'> Cluster {cluster.number}: {up}/{len(cluster.shard_ids)} shards up, {guilds} guilds,'
+              f' {rate:.1f} events/s, {cluster.restarts} restarts')
+
+
+def run(clusters, max_concurrency, report_interval):
+    # old status files would be reported as clusters that stopped answering
+    for name in os.listdir(STATUS_DIR) if os.path.isdir(STATUS_DIR) else ():
+        if name.startswith('cluster-'):
+            os.remove(os.path.join(STATUS_DIR, name))
+    try:
+        for cluster in clusters:
+            cluster.start()
+            if cluster is not clusters[-1]:
+                # a cluster identifies its shards one bucket at a time; don't let the next one
+                # start identifying before this one is done
+                time.sleep(len(cluster.shard_ids) * IDENTIFY_INTERVAL / max_concurrency)
+        reported = time.monotonic()
+        while True:
+            time.sleep(1)
+            now = time.monotonic()
+            for cluster in clusters:
+                cluster.check(now)
+            if report_interval and now - reported >= report_interval:
+                reported = now
+                report(clusters)
+    except KeyboardInterrupt:
+        print('> Stopping clusters')
+    finally:
+        for cluster in clusters:
+            cluster.stop()
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for cluster in clusters:
+            cluster.wait(deadline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clusters', type=int, help='processes to run (default: one per CPU, at most one per shard)')
+    parser.add_argument('--shards', type=int, help="total shard count (default: Discord's recommendation)")
+    parser.add_argument('--report', type=float, default=300, help='seconds between cluster status lines, 0 for none')
+    args = parser.parse_args()
+
+    # stop the clusters on a service manager's SIGTERM the same way as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    load_dotenv()
+    token = os.getenv('TOKEN')
+    shard_count, max_concurrency = asyncio.run(recommended_sharding(token))
+    shard_count = args.shards or shard_count
+    args.clusters = args.clusters or min(os.cpu_count() or 1, shard_count)
+    if not 1 <= args.clusters <= shard_count:
+        parser.error(f'--clusters must be between 1 and the shard count ({shard_count})')
+    print(f'> {shard_count} shards in {args.clusters} clusters')
+
+    clusters = [
+        Cluster(number, shard_ids, shard_count)
+        for number, shard_ids in enumerate(split_shards(shard_count, args.clusters))
+    ]
+    run(clusters, max_concurrency, args.report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+# The extensions main.py loads, in this order. A file under commands/cogs that isn't
+# listed here is not loaded.
+EXTENSIONS = (
+    'commands.cogs.log.Logger',
+    'commands.cogs.log.Search',
+    'commands.cogs.log.Stats',
+    'commands.cogs.log.Shards',
+    'commands.cogs.log.Recorder',
+    'commands.cogs.global.Inviter',
+    'commands.cogs.global.DirectMessage',
+)
+
+# Extension -> the prefix commands it provides, for extensions that can wait until one
+# of them is first used when DEFER_COGS is set. Extensions with listeners or slash
+# commands have to be there from the start and can't be deferred.
+DEFERRED = {
+    'commands.cogs.log.Stats': ('stats',),
+}
@@ -1,13 +1,19 @@
 import nextcord
 from nextcord.ext import commands
 
+from commands.utils.resolver import get_user_resolver
+
 class DirectMessage(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     @nextcord.slash_command(name="directme", description="Send me a message of bugs!")
     async def directmessage(self, interaction: nextcord.Interaction, *, message):
-        user = await self.bot.fetch_user(404687039905136661)  # Replace YOUR_USER_ID with your user ID
+        user = await get_user_resolver(self.bot).resolve(404687039905136661)  # Replace YOUR_USER_ID with your user ID
+        if user is None:
+            # the id is wrong or the account is gone, so there's nobody to send it to
+            await interaction.response.send_message("Sorry, the bot owner can't be reached right now.", ephemeral=True)
+            return
 
         # Create an embed for the DM to the bot owner
         dm_embed = nextcord.Embed(
@@ -2,6 +2,8 @@ import datetime
 import nextcord
 from nextcord.ext import commands
 
+from commands.utils.audit_index import get_audit_index
+
 class InviteLogger(commands.Cog):
 
   def __init__(self, bot):
@@ -10,11 +12,8 @@ class InviteLogger(commands.Cog):
   @commands.Cog.listener()
   async def on_guild_join(self, guild):
   
-    inviter = None
-    if guild.me.guild_permissions.view_audit_log:
-      invite_log = await guild.audit_logs(limit=1, action=nextcord.AuditLogAction.bot_add).flatten()
-      invite = invite_log[0]
-      inviter = invite.user
+    invite = await get_audit_index(self.bot).find(guild, nextcord.AuditLogAction.bot_add, self.bot.user.id)
+    inviter = invite and invite.user
 
     if inviter:
       current_time = datetime.datetime.utcnow()
@@ -1,34 +1,94 @@
+import asyncio
 import datetime
-import json
+import os
 import nextcord
 from nextcord.ext import commands
 from nextcord.webhook import Webhook
 from nextcord.utils import datetime
 from nextcord.utils import get
 
+from commands.utils.audit_index import get_audit_index
+from commands.utils.dedup import Deduper
+from commands.utils.delivery import WORKERS_ENV, DeliveryWorkers
+from commands.utils.filters import compile_rules
+from commands.utils.guild_config import GuildConfigStore
+from commands.utils.intents import MESSAGE_STORE_EVENTS, enabled_events, needs_listener
+from commands.utils.journal import Journal, event_record
+from commands.utils.log_templates import TEMPLATES
+from commands.utils.message_store import MessageStore, jump_url
+from commands.utils.metrics import get_metrics, timed_listeners
+from commands.utils.resolver import get_user_resolver
+from commands.utils.retention import Compactor, format_bytes, journal_usage
+from commands.utils.roster import MemberRoster
+from commands.utils.search_index import get_search_index
+from commands.utils.shards import serves
+from commands.utils.send_queue import SendQueue, queue_settings
+from commands.utils.singleflight import SingleFlight
+from commands.utils.templates import compile_templates
+from commands.utils.throttle import THROTTLES, Throttle
+from commands.utils.webhook_cache import WebhookSnapshots
+from commands.utils.webhook_pool import WebhookPool
+
+@timed_listeners
 class Logger(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.logger_channel = None
-
-
-    def load_config(self):
-        try:
-            with open('config.json', 'r') as f:
-                config = json.load(f)
-                self.logger_channel = self.bot.get_channel(config['logger_channel'])
-        except FileNotFoundError:
-            pass
-
-    def save_config(self):
-        config = {'logger_channel': self.logger_channel.id if self.logger_channel else None}
-        with open('config.json', 'w') as f:
-            json.dump(config, f)
+        self.metrics = get_metrics(bot)
+        self.config = GuildConfigStore()
+        # read once here, before the bot connects, so the event loop never waits on it
+        self.config.load()
+        # only the listeners whose events are logged get registered; main.py asks the
+        # gateway for just the intents those need (see utils/intents.py)
+        self.events = frozenset(enabled_events(self.config))
+        self.rules = {}  # guild id -> GuildRules, for guilds with a logger channel
+        self.store_guilds = frozenset()  # guilds whose messages are kept in self.messages
+        # (guild id, user id) of leaves on_member_remove took; nextcord dispatches
+        # on_raw_member_remove right after it, which skips them
+        self.leaving = set()
+        self.refresh_rules()
+        self.queues = {}  # channel id -> SendQueue
+        self.dedup = Deduper()
+        self.messages = MessageStore()
+        self.message_fetches = SingleFlight()
+        self.audit = get_audit_index(bot)
+        self.webhooks = WebhookSnapshots()
+        self.users = get_user_resolver(bot)
+        self.roster = MemberRoster()
+        self.throttle = Throttle(self._throttle_summary, {**THROTTLES, **self.config.extra.get('throttles', {})})
+        self.webhook_pools = {}  # channel id -> WebhookPool
+        # delivery lanes and which events go in them, see send_queue.LANES/EVENT_PRIORITY
+        self.lanes, self.priorities = queue_settings(self.config.extra)
+        # with DELIVERY_WORKERS set, sending happens in worker processes instead of self.queues
+        workers = int(os.getenv(WORKERS_ENV) or 0)
+        self.delivery = DeliveryWorkers(bot, workers, self.metrics, self.lanes, self.priorities) if workers else None
+        self.templates = compile_templates(TEMPLATES)
+        self.journal = Journal()
+        self.search = get_search_index(bot)
+        self.compactor = Compactor(self.journal, self.search, self.config,
+                                   serves=lambda guild_id: serves(self.bot, guild_id))
+        if not self.delivery:
+            # with delivery workers the queues are theirs, and so is this gauge
+            self.metrics.gauge('logger_queue_depth', 'Embeds waiting to be sent, per lane.', self._queue_depths, label='lane')
+        self.metrics.gauge('logger_index_pending', 'Events waiting to be written to the search index.',
+                           lambda: len(self.search.pending))
 
     @commands.Cog.listener()
     async def on_ready(self):
         print('Logger cog is ready.')
-        self.load_config()
+        legacy = self.config.legacy_channel and self.bot.get_channel(self.config.legacy_channel)
+        if legacy:
+            # carry the old bot-wide channel over to the guild it belongs to
+            self.config.set(legacy.guild.id, logger_channel=legacy.id)
+            self.config.legacy_channel = None
+            self.config.schedule_save()
+            self.refresh_rules()
+        self.compactor.start()
+        # other shard clusters save guilds they set up to the same file
+        self.config.watch(self.refresh_rules)
+
+        for guild in self.bot.guilds:
+            if self.config.get(guild.id):
+                await self.roster.add_guild(guild)
 
     @commands.command()
     @commands.has_permissions(administrator=True)
@@ -39,12 +99,210 @@ class Logger(commands.Cog):
             guild.me: nextcord.PermissionOverwrite(read_messages=True)
         }
         logger_channel_name = '📝-logger'
-        self.logger_channel = self.get_logger_channel(guild)
-        if not self.logger_channel:
-            self.logger_channel = await guild.create_text_channel(logger_channel_name, overwrites=overwrites)
-        self.save_config()
+        logger_channel = self.get_logger_channel(guild)
+        if not logger_channel:
+            logger_channel = await guild.create_text_channel(logger_channel_name, overwrites=overwrites)
+        self.config.set(guild.id, logger_channel=logger_channel.id)
+        self.config.schedule_save()
+        self.refresh_rules()
         await ctx.send('Logger channel has been set up.')
 
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def storage(self, ctx):
+        """qstorage - how much of this server's log history is kept locally."""
+        segments, compressed, journal_bytes = await self.bot.loop.run_in_executor(
+            None, journal_usage, self.journal, ctx.guild.id)
+        events, index_bytes = await self.search.usage(ctx.guild.id)
+        settings = self.config.get(ctx.guild.id)
+        days = settings and settings['retention_days']
+        limit = settings and settings['retention_bytes']
+        embed = nextcord.Embed(title='Log Storage', color=nextcord.Color.blurple())
+        embed.add_field(name='Journal', value=f'{format_bytes(journal_bytes)} in {segments} segments ({compressed} compressed)')
+        embed.add_field(name='Search index', value=f'{events} events, about {format_bytes(index_bytes)}')
+        embed.add_field(
+            name='Retention',
+            value=f'{f"{days} days" if days else "no age limit"}, {format_bytes(limit) if limit else "no size limit"}',
+            inline=False,
+        )
+        await ctx.send(embed=embed)
+
+    def refresh_rules(self):
+        """Recompile every guild's filter rules; call after changing the config."""
+        self.rules = {
+            guild_id: compile_rules(settings, self.events)
+            for guild_id, settings in self.config.guilds.items()
+            if settings['logger_channel']
+        }
+        wanted = set()
+        store_guilds = set()
+        for guild_id, rules in self.rules.items():
+            events = self.events if rules.events is None else rules.events
+            wanted.update(events)
+            if not MESSAGE_STORE_EVENTS.isdisjoint(events):
+                store_guilds.add(guild_id)
+        self.store_guilds = frozenset(store_guilds)
+        self._attach(wanted)
+
+    def _attach(self, events):
+        """Register the listeners needed for these events and detach the rest, see intents.needs_listener."""
+        listeners = [
+            (name, method) for name, method in type(self).__cog_listeners__
+            if needs_listener(name, events)
+        ]
+        if self.bot.get_cog(self.qualified_name) is self:
+            current = set(self.__cog_listeners__)
+            for name, method in current.difference(listeners):
+                self.bot.remove_listener(getattr(self, method), name)
+            for name, method in set(listeners).difference(current):
+                self.bot.add_listener(getattr(self, method), name)
+        # before the cog is added this alone decides what gets registered
+        self.__cog_listeners__ = listeners
+        self.listening = frozenset(name for name, method in listeners)
+        if 'on_raw_member_remove' not in self.listening:
+            self.leaving.clear()
+
+    def _queue_depths(self):
+        depths = {}
+        for queue in self.queues.values():
+            for lane, pending in queue.pending.items():
+                depths[lane] = depths.get(lane, 0) + len(pending)
+        return depths
+
+    def wants(self, guild, event, channel=None, author=None, content=None):
+        """Whether the guild logs this event from this channel/author; run before anything else."""
+        rules = self.rules.get(getattr(guild, 'id', guild))
+        return rules is not None and rules.allows(event, channel, author, content)
+
+    def is_logger_channel(self, channel):
+        guild = getattr(channel, 'guild', None)
+        return guild is not None and self.config.logger_channel_id(guild.id) == channel.id
+
+    def log(self, guild, embed, event=None):
+        """Queue an embed for the guild's logger channel without waiting on the HTTP request.
+
+        `guild` is a Guild or a guild id; events without one are not logged. `event` is the
+        listener name, which picks the delivery lane (see send_queue.EVENT_PRIORITY).
+        """
+        if guild is None:
+            return None
+        settings = self.config.get(getattr(guild, 'id', guild))
+        if not settings or not settings['logger_channel']:
+            return None
+        channel = self.bot.get_channel(settings['logger_channel'])
+        if channel is None:
+            return None
+        if self.delivery is not None:
+            return self.delivery.put(channel, embed, event, settings['delivery'])
+        queue = self.queues.get(channel.id)
+        if queue is None:
+            sender = None
+            if settings['delivery'] == 'webhook':
+                pool = self.webhook_pools[channel.id] = WebhookPool(channel)
+                sender = pool.send
+            queue = self.queues[channel.id] = SendQueue(channel, lanes=self.lanes, priorities=self.priorities,
+                                                        sender=sender, metrics=self.metrics)
+        return queue.put(embed, event)
+
+    def emit(self, guild, event, template=None, /, **ctx):
+        """Render an event's embed from its template and queue it, see log().
+
+        `template` picks a variant such as 'on_member_update.nick' and defaults to the
+        event's own template. The first three are positional only, so `guild` and `event`
+        can be passed as context too. Nothing is rendered for guilds without a logger channel.
+        Everything emitted is also kept locally, see record().
+        """
+        guild_id = getattr(guild, 'id', guild)
+        if guild_id is None or self.config.logger_channel_id(guild_id) is None:
+            return None
+        embed = self.templates[template or event](ctx)
+        self.record(event, guild_id, ctx, embed)
+        return self.log(guild, embed, event)
+
+    def record(self, event, guild_id, ctx, embed):
+        """Keep a local copy of a logged event in the journal and the search index."""
+        self.metrics.logged[event] += 1
+        record = event_record(event, guild_id, ctx, embed)
+        self.journal.append(record)
+        self.search.add(record)
+
+    def react_when_sent(self, sent, emoji):
+        """Add a reaction to the log message once `sent` (from emit) resolves, without waiting for it."""
+        def react(future):
+            if future.cancelled() or future.exception() is not None or future.result() is None:
+                # shed, or the send failed and SendQueue reported it already
+                return
+            self.bot.loop.create_task(self._react(future.result(), emoji))
+
+        sent.add_done_callback(react)
+
+    async def _react(self, message, emoji):
+        try:
+            await message.add_reaction(emoji)
+        except nextcord.HTTPException as e:
+            print(f'Logger: failed to react to log message {message.id}: {e}')
+
+    async def claim_raw(self, key):
+        """Claim a raw event's dedup key, giving its richer cached variant the first go.
+
+        nextcord dispatches the cached variant right after the raw one, so yielding once
+        lets that listener claim the key before we do.
+        """
+        await asyncio.sleep(0)
+        return self.dedup.claim(key)
+
+    def reaction_twin(self, payload, twin):
+        """Whether the cached variant `twin` of this raw reaction event runs and logs it.
+
+        nextcord dispatches it when the message is in its cache and, for one user's reaction,
+        it knows the user. Call this before the first await, while the cache is as the
+        dispatch left it.
+        """
+        if twin not in self.listening:
+            return False
+        message = self.bot._connection._get_message(payload.message_id)
+        if message is None:
+            return False
+        user_id = getattr(payload, 'user_id', None)
+        if user_id is None or getattr(payload, 'member', None) is not None:
+            return True
+        if isinstance(message.channel, nextcord.TextChannel):
+            return message.channel.guild.get_member(user_id) is not None
+        return self.bot.get_user(user_id) is not None
+
+    async def lookup_message(self, guild_id, channel_id, message_id):
+        """Stored record of a message, without a request unless the guild opted into fetching.
+
+        Concurrent lookups for the same message share one fetch.
+        """
+        stored = self.messages.get(guild_id, message_id)
+        settings = self.config.get(guild_id)
+        if stored or not settings or not settings['fetch_reaction_messages']:
+            return stored
+
+        async def fetch():
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                return None
+            try:
+                message = await channel.fetch_message(message_id)
+            except (nextcord.NotFound, nextcord.Forbidden):
+                return None
+            return self.messages.add(guild_id, message, settings['message_cache_bytes'])
+
+        return await self.message_fetches.do(message_id, fetch)
+
+    def _throttle_summary(self, event, guild_id, channel_id, count, users, window):
+        what = event[3:].replace('raw_', '').replace('_', ' ')
+        where = f' in <#{channel_id}>' if channel_id else ''
+        self.log(guild_id, {
+            'type': 'rich',
+            'title': 'Events Throttled',
+            'color': nextcord.Color.light_grey().value,
+            'description': f'{count} {what} events from {users} users{where} over {window}s',
+        }, event)
+
     def get_logger_channel(self, guild):
         logger_channel_name = '📝-logger'
         for channel in guild.text_channels:
@@ -56,100 +314,58 @@ class Logger(commands.Cog):
 
     @commands.Cog.listener()
     async def on_message(self, message):
-        timestamp = message.created_at.strftime("%b %d, %Y %I:%M %p")
-        embed = nextcord.Embed(title='Message Log', color=nextcord.Color.blue())
-        embed.set_author(name=str(message.author), icon_url=message.author.avatar.url)
-        embed.add_field(name='Author', value=message.author.mention)
-        embed.add_field(name='Channel', value=message.channel.mention)
-        embed.add_field(name='Time', value=timestamp)
-        embed.add_field(name='Content', value=message.content, inline=False)
-
-        if len(message.attachments) > 0:
-            embed.add_field(name='Attachments', value='\n'.join([a.filename for a in message.attachments]))
-
-        if self.logger_channel and message.channel != self.logger_channel:
-            await self.logger_channel.send(embed=embed)
-            
-            
-    @commands.Cog.listener() 
-    async def on_bulk_message_delete(self, messages):
-
-        if len(messages) > 5:
+        guild = message.guild
+        if guild is None:
+            return
+        settings = self.config.get(guild.id)
+        if not settings or message.channel.id == settings['logger_channel']:
+            return
+        # kept for delete and edit logs even where the message itself isn't logged
+        if guild.id in self.store_guilds:
+            self.messages.add(guild.id, message, settings['message_cache_bytes'])
+        if self.wants(guild, 'on_message', message.channel, message.author, message.content):
+            self.emit(guild, 'on_message', message=message)
 
-            embed = nextcord.Embed(title='Bulk Message Delete', color=nextcord.Color.red())
-            embed.set_author(name=f"{len(messages)} Messages Deleted")
 
-            channel = messages[0].channel
-            embed.add_field(name='Channel', value=channel.mention)
-
-            msg_links = []
-            for msg in messages[:5]: 
-                msg_links.append(f"[{msg.created_at.strftime('%H:%M:%S')}]({msg.jump_url}) {msg.author.mention}: {msg.content}")
-            
-            embed.description = "\n".join(msg_links)
-            embed.add_field(name='Total Messages', value=len(messages))
-
-            if self.logger_channel and channel != self.logger_channel:
-                await self.logger_channel.send(embed=embed)
-            
     @commands.Cog.listener()
-    async def on_message_delete(self, message): # not showing the deleted message 
-
-        
-
-            embed = nextcord.Embed(color=nextcord.Color.red())
-
-            embed.set_author(name=str(message.author), icon_url=message.author.avatar.url)
+    async def on_bulk_message_delete(self, messages):
 
-            embed.add_field(name='Author', value=message.author.mention)
-            embed.add_field(name='Channel', value=message.channel.mention)
+        channel = messages[0].channel
+        if not self.wants(channel.guild, 'on_bulk_message_delete', channel):
+            return
 
-            embed.description = message.content[:1024]
+        if len(messages) > 5:
+            if not self.is_logger_channel(channel):
+                self.emit(channel.guild, 'on_bulk_message_delete', messages=messages, channel=channel)
 
-            if len(message.content) > 1024:
-                embed.description += f"... (truncated)"
+    @commands.Cog.listener()
+    async def on_message_delete(self, message): # not showing the deleted message
 
-            embed.set_footer(text=f"Deleted at {message.created_at.strftime('%m/%d/%Y %I:%M:%S %p')}")
+        if not self.dedup.claim(('message_delete', message.guild and message.guild.id, message.channel.id, message.id)):
+            return
+        if message.guild:
+            self.messages.pop(message.guild.id, message.id)
+        # the dedup key is claimed either way, so the raw variant doesn't log what we filtered
+        if not self.wants(message.guild, 'on_message_delete', message.channel, message.author, message.content):
+            return
 
-            if self.logger_channel and message.channel != self.logger_channel:
-                await self.logger_channel.send(embed=embed)
+        if not self.is_logger_channel(message.channel):
+            self.emit(message.guild, 'on_message_delete', message=message)
 
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_message_edit(self, before, after):
-        
-        
-
-            embed = nextcord.Embed(title='Message Edited', color=nextcord.Color.orange())
-            
-            embed.set_author(name=str(before.author), icon_url=before.author.avatar.url)
 
-            embed.add_field(name='Author', value=before.author.mention)
-            embed.add_field(name='Channel', value=before.channel.mention)
+        if not self.dedup.claim(('message_edit', before.guild and before.guild.id, before.channel.id, before.id, after.edited_at)):
+            return
+        if before.guild:
+            self.messages.update(before.guild.id, before.id, after.content)
+        if not self.wants(before.guild, 'on_message_edit', before.channel, before.author, after.content):
+            return
 
-            if len(before.content) > 1024:
-                before_content = before.content[:1021] + "..."
-            else:
-                before_content = before.content
-            
-            embed.add_field(name='Before', value=before_content, inline=False)
-
-            if len(after.content) > 1024:
-                after_content = after.content[:1021] + "..."
-            else:
-                after_content = after.content
-                
-            embed.add_field(name='After', value=after_content, inline=False)
-
-            if before.edited_at:
-                footer_text = f"Edited at {before.edited_at.strftime('%m/%d/%Y %I:%M:%S %p')}"
-            else:
-                footer_text = "Message reposted, not edited."
-
-            embed.set_footer(text=footer_text)
-
-            if self.logger_channel and before.channel != self.logger_channel:
-                msg = await self.logger_channel.send(embed=embed)
-                await msg.add_reaction('⏪')
+        if not self.is_logger_channel(before.channel):
+            sent = self.emit(before.guild, 'on_message_edit', before=before, after=after)
+            if sent:
+                self.react_when_sent(sent, '⏪')
 
 # * end of on message
 
@@ -157,20 +373,13 @@ class Logger(commands.Cog):
 
     @commands.Cog.listener() # updated jul 12
     async def on_member_join(self, member):
-        
-
-        embed = nextcord.Embed(title='Member Joined', color=nextcord.Color.green())
-        embed.set_thumbnail(url=member.avatar.url)
-        embed.add_field(name='Member', value=f'{member.mention} (ID: {member.id})')
-        embed.add_field(name='Created At', value=member.created_at.strftime('%B %d, %Y'))
-        
-        total = len(self.bot.users)
-        embed.set_footer(text=f'Member #{total}')
+        if self.config.get(member.guild.id):
+            self.roster.upsert(member)
 
-        if self.logger_channel:
-            await self.logger_channel.send(embed=embed)
+        if self.wants(member.guild, 'on_member_join', None, member):
+            self.emit(member.guild, 'on_member_join', member=member, total=len(self.bot.users))
 
-        role = get(member.guild.roles, name="Members") 
+        role = get(member.guild.roles, name="Members")
         await member.add_roles(role)
 
         channel = get(member.guild.channels, name="general")
@@ -178,17 +387,13 @@ class Logger(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
+        if 'on_raw_member_remove' in self.listening:
+            self.leaving.add((member.guild.id, member.id))
+        self.roster.remove(member.guild.id, member.id)
 
-        embed = nextcord.Embed(title='Member Left', color=nextcord.Color.dark_red())
-        embed.set_thumbnail(url=member.avatar.url)
-        embed.add_field(name='Member', value=f'{member.mention} (ID: {member.id})')
-        embed.add_field(name='Joined At', value=member.joined_at.strftime('%B %d, %Y'))
-        
-        total = len(self.bot.users)
-        embed.set_footer(text=f'Remaining: {total}')
-
-        if self.logger_channel:
-            await self.logger_channel.send(embed=embed)
+        if self.wants(member.guild, 'on_member_remove', None, member):
+            # most leaves aren't kicks, so don't hold up the rest of this listener for it
+            self.bot.loop.create_task(self._log_member_remove(member, len(self.bot.users)))
 
         role = get(member.guild.roles, name="Members")
         if role in member.roles:
@@ -197,591 +402,441 @@ class Logger(commands.Cog):
         channel = get(member.guild.channels, name="general")
         await channel.send(f"{member.mention} has left the server.")
 
-    @commands.Cog.listener()
-    async def on_member_ban(self, guild, user):  
-        
-        
-        embed = nextcord.Embed(title='Member Banned', color=nextcord.Color.dark_red())
-        embed.set_thumbnail(url=user.avatar.url)
-        embed.add_field(name='Member', value=f'{user} (ID: {user.id})')
-
-        if guild.me.guild_permissions.view_audit_log:
-            audit_log = await guild.audit_logs(limit=1, action=nextcord.AuditLogAction.ban).flatten()
-            audit_entry = audit_log[0]
-            moderator = audit_entry.user
+    async def _log_member_remove(self, member, total):
+        kick = await self.audit.find(member.guild, nextcord.AuditLogAction.kick, member.id, fetch=False)
+        self.emit(member.guild, 'on_member_remove', member=member, total=total, kicked_by=kick and kick.user)
 
-            if moderator:
-                embed.add_field(name='Banned By', value=f'{moderator} (ID: {moderator.id})')
-        
-        
-        
-        if self.logger_channel:
-            await self.logger_channel.send(embed=embed)
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild, user):
+        if not self.wants(guild, 'on_member_ban', None, user):
+            return
+        audit_entry = await self.audit.find(guild, nextcord.AuditLogAction.ban, user.id)
+        self.emit(guild, 'on_member_ban', user=user, moderator=audit_entry and audit_entry.user,
+                  reason=audit_entry and audit_entry.reason)
 
     @commands.Cog.listener()
     async def on_member_unban(self, guild, user):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Member Unbanned', color=nextcord.Color.green())
-            embed.add_field(name='Member', value=user.mention)
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(guild, 'on_member_unban', None, user):
+            return
+        self.emit(guild, 'on_member_unban', user=user)
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
+        if before.roles != after.roles and self.config.get(after.guild.id):
+            self.roster.upsert(after)
+        if not self.wants(after.guild, 'on_member_update', None, after):
+            return
 
         if before.roles != after.roles:
             # Roles changed
-            
-            embed = nextcord.Embed(title='Roles Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Member', value=after.mention)
-            embed.add_field(name='Before', value=', '.join([r.mention for r in before.roles]))
-            embed.add_field(name='After', value=', '.join([r.mention for r in after.roles]))
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_member_update', 'on_member_update.roles', before=before, after=after)
 
         if before.nick != after.nick:
             # Nickname changed
 
-            embed = nextcord.Embed(title='Nickname Updated', color=nextcord.Color.green())
-            embed.add_field(name='Member', value=after.mention)
-            embed.add_field(name='Before', value=before.nick)
-            embed.add_field(name='After', value=after.nick)
-
-        await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_member_update', 'on_member_update.nick', before=before, after=after)
 
     @commands.Cog.listener()
     async def on_user_update(self, before, after):
-        if self.logger_channel:
-            if before.name != after.name:
-                embed = nextcord.Embed(title='Username Updated', color=nextcord.Color.blue())
-                embed.add_field(name='User', value=after.mention)
-                embed.add_field(name='Before', value=before.name)
-                embed.add_field(name='After', value=after.name)
-                await self.logger_channel.send(embed=embed)
+        if before.name != after.name:
+            # users aren't tied to a guild, so log it everywhere we share one with them
+            guilds = [guild for guild in after.mutual_guilds if self.wants(guild, 'on_user_update', None, after)]
+            if not guilds:
+                return
+            embed = self.templates['on_user_update']({'before': before, 'after': after})
+            for guild in guilds:
+                self.record('on_user_update', guild.id, {'user': after}, embed)
+                self.log(guild, embed, 'on_user_update')
 # * end of member events
 
-# * start of guild events 
+# * start of guild events
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Channel Created', color=nextcord.Color.green())
-            embed.add_field(name='Channel', value=channel.mention)
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(channel.guild, 'on_guild_channel_create', channel):
+            return
+        self.emit(channel.guild, 'on_guild_channel_create', channel=channel)
 
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Channel Deleted', color=nextcord.Color.red())
-            embed.add_field(name='Channel', value=channel.name)
-            await self.logger_channel.send(embed=embed)
+        self.webhooks.forget_channel(channel.id)
+        if not self.wants(channel.guild, 'on_guild_channel_delete', channel):
+            return
+        audit_entry = await self.audit.find(channel.guild, nextcord.AuditLogAction.channel_delete, channel.id)
+        self.emit(channel.guild, 'on_guild_channel_delete', channel=channel, deleted_by=audit_entry and audit_entry.user)
 
-    @commands.Cog.listener()
-    async def on_guild_channel_update(self, before, after):
-        if self.logger_channel:
-            if before.name != after.name:
-                embed = nextcord.Embed(title='Channel Updated', color=nextcord.Color.blue())
-                embed.add_field(name='Channel', value=after.mention)
-                embed.add_field(name='Before', value=before.name)
-                embed.add_field(name='After', value=after.name)
-                await self.logger_channel.send(embed=embed)
-                
     @commands.Cog.listener()
     async def on_member_emojis_update(self, member, before, after):
-        if self.logger_channel:
-            if len(before) < len(after):
-                added_emoji = set(after) - set(before)
-                emoji = added_emoji.pop()
-                embed = nextcord.Embed(title='Emoji Added', color=nextcord.Color.green())
-                embed.add_field(name='Member', value=member.mention)
-                embed.add_field(name='Emoji', value=str(emoji))
-                await self.logger_channel.send(embed=embed)
-            elif len(before) > len(after):
-                removed_emoji = set(before) - set(after)
-                emoji = removed_emoji.pop()
-                embed = nextcord.Embed(title='Emoji Removed', color=nextcord.Color.red())
-                embed.add_field(name='Member', value=member.mention)
-                embed.add_field(name='Emoji', value=str(emoji))
-                await self.logger_channel.send(embed=embed)
-                
+        if not self.wants(member.guild, 'on_member_emojis_update', None, member):
+            return
+        if len(before) < len(after):
+            added_emoji = set(after) - set(before)
+            self.emit(member.guild, 'on_member_emojis_update', 'on_member_emojis_update.added',
+                      member=member, emoji=added_emoji.pop())
+        elif len(before) > len(after):
+            removed_emoji = set(before) - set(after)
+            self.emit(member.guild, 'on_member_emojis_update', 'on_member_emojis_update.removed',
+                      member=member, emoji=removed_emoji.pop())
+
     @commands.Cog.listener()
     async def on_member_role_update(self, member, before, after):
-        if self.logger_channel:
-            if len(before) < len(after):
-                added_role = set(after) - set(before)
-                role = added_role.pop()
-                embed = nextcord.Embed(title='Role Added', color=role.color)
-                embed.add_field(name='Member', value=member.mention)
-                embed.add_field(name='Role', value=role.mention)
-                await self.logger_channel.send(embed=embed)
-            elif len(before) > len(after):
-                removed_role = set(before) - set(after)
-                role = removed_role.pop()
-                embed = nextcord.Embed(title='Role Removed', color=role.color)
-                embed.add_field(name='Member', value=member.mention)
-                embed.add_field(name='Role', value=role.mention)
-                await self.logger_channel.send(embed=embed)
+        if not self.wants(member.guild, 'on_member_role_update', None, member):
+            return
+        if len(before) < len(after):
+            added_role = set(after) - set(before)
+            self.emit(member.guild, 'on_member_role_update', 'on_member_role_update.added',
+                      member=member, role=added_role.pop())
+        elif len(before) > len(after):
+            removed_role = set(before) - set(after)
+            self.emit(member.guild, 'on_member_role_update', 'on_member_role_update.removed',
+                      member=member, role=removed_role.pop())
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Voice State Update', color=nextcord.Color.teal())
-            embed.add_field(name='Member', value=member.mention)
-            
-            if after.channel:
-                embed.add_field(name='Current Channel', value=after.channel.name)
-            else:
-                embed.add_field(name='Current Channel', value='Not in a voice channel')
-                
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(member.guild, 'on_voice_state_update', after.channel or before.channel, member):
+            return
+        self.emit(member.guild, 'on_voice_state_update', member=member, after=after)
 
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Joined Guild', color=nextcord.Color.green())
-            embed.add_field(name='Guild', value=guild.name)
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(guild, 'on_guild_join'):
+            return
+        self.emit(guild, 'on_guild_join', guild=guild)
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Left Guild', color=nextcord.Color.dark_red())
-            embed.add_field(name='Guild', value=guild.name)
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(guild, 'on_guild_remove'):
+            return
+        self.emit(guild, 'on_guild_remove', guild=guild)
 
-    @commands.Cog.listener()
-    async def on_guild_update(self, before, after):
-        if self.logger_channel:
-            if before.name != after.name:
-                embed = nextcord.Embed(title='Guild Updated', color=nextcord.Color.blue())
-                embed.add_field(name='Before', value=before.name)
-                embed.add_field(name='After', value=after.name)
-                await self.logger_channel.send(embed=embed)
-# * end of guild 
+# * end of guild
 
-# * start of invite events 
+# * start of invite events
     @commands.Cog.listener()
     async def on_invite_create(self, invite):
+        if not self.wants(invite.guild, 'on_invite_create', invite.channel, invite.inviter):
+            return
+        self.emit(invite.guild, 'on_invite_create', invite=invite)
 
-        embed = nextcord.Embed(title='Invite Created', color=nextcord.Color.green())
-
-        embed.add_field(name='Code', value=invite.code)
-        embed.add_field(name='Channel', value=invite.channel.mention)
-        embed.add_field(name='Inviter', value=invite.inviter.mention)
-
-        if invite.max_age > 0:
-            embed.add_field(name='Max Age', value=f"{invite.max_age} seconds")
-
-        if invite.max_uses > 0:
-            embed.add_field(name='Max Uses', value=invite.max_uses)
-
-        if invite.temporary:
-            embed.add_field(name='Temporary', value='Yes')
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite):
+        if not self.wants(invite.guild, 'on_invite_delete', invite.channel, invite.inviter):
+            return
+        self.emit(invite.guild, 'on_invite_delete', invite=invite)
+# * end of invite events
 
-        await self.logger_channel.send(embed=embed)
 
+# * on typing events
     @commands.Cog.listener()
-    async def on_invite_delete(self, invite):
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Invite Deleted', color=nextcord.Color.red())
-            embed.add_field(name='Code', value=invite.code)
-            embed.add_field(name='Guild', value=invite.guild.name)
-            embed.add_field(name='Channel', value=invite.channel.mention)
-            embed.add_field(name='Author', value=invite.inviter.mention)
-            await self.logger_channel.send(embed=embed)
-# * end of invite events 
-
-
-# * on typing events             
-    @commands.Cog.listener() 
     async def on_typing(self, channel, user, when):
+        guild = getattr(channel, 'guild', None)
+        if guild is None or not self.dedup.claim(('typing', guild.id, channel.id, user.id, when)):
+            return
+        if not self.wants(guild, 'on_typing', channel, user):
+            return
+
+        if not self.throttle.allow('on_typing', guild.id, channel.id, user.id):
+            return
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='User Typing', color=nextcord.Color.blue())
-            embed.add_field(name='Channel', value=channel.mention)
-            embed.add_field(name='User', value=user.mention)
-            embed.add_field(name='When', value=when)
+        self.emit(guild, 'on_typing', channel=channel, user=user, when=when)
 
-            await self.logger_channel.send(embed=embed)
-            
     @commands.Cog.listener() #
     async def on_raw_typing(self, payload):
+        if not await self.claim_raw(('typing', payload.guild_id, payload.channel_id, payload.user_id, payload.when)):
+            return
+        if not self.wants(payload.guild_id, 'on_raw_typing', self.bot.get_channel(payload.channel_id), payload.member or payload.user_id):
+            return
+
+        if not self.throttle.allow('on_raw_typing', payload.guild_id, payload.channel_id, payload.user_id):
+            return
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
+        self.emit(payload.guild_id, 'on_raw_typing', payload=payload)
 
-            embed = nextcord.Embed(title='Raw User Typing', color=nextcord.Color.blue())
-            embed.add_field(name='Channel', value=channel.mention if channel else payload.channel_id) 
-            embed.add_field(name='User ID', value=payload.user_id)
-            embed.add_field(name='When', value=payload.when)
+# * on typing events
 
-            await self.logger_channel.send(embed=embed) 
-            
-# * on typing events             
-      
     @commands.Cog.listener() #
     async def on_raw_message_delete(self, payload):
+        if not await self.claim_raw(('message_delete', payload.guild_id, payload.channel_id, payload.message_id)):
+            return
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
+        # too old for nextcord's cache, but we may still have it
+        stored = self.messages.pop(payload.guild_id, payload.message_id)
+        if not self.wants(payload.guild_id, 'on_raw_message_delete', self.bot.get_channel(payload.channel_id),
+                          stored and stored.author_id, stored and stored.content):
+            return
+        self.emit(payload.guild_id, 'on_raw_message_delete', payload=payload, stored=stored)
 
-            embed = nextcord.Embed(title='Raw Message Delete', color=nextcord.Color.red())
-            embed.add_field(name='Channel', value=channel.mention if channel else payload.channel_id)
-            embed.add_field(name='Message ID', value=payload.message_id)
-        
-            await self.logger_channel.send(embed=embed)
-    
     @commands.Cog.listener()
     async def on_raw_message_edit(self, payload):
+        edited_at = payload.data.get('edited_timestamp')
+        if payload.cached_message is not None or not await self.claim_raw(('message_edit', payload.guild_id, payload.channel_id, payload.message_id, edited_at)):
+            return
+
+        content = payload.data.get('content')
+        stored = self.messages.get(payload.guild_id, payload.message_id)
+        before_content = None
+        known = stored is not None and content is not None
+        if known:
+            # kept current even when the edit isn't logged, for a later delete log
+            before_content = self.messages.update(payload.guild_id, payload.message_id, content)
+        if not self.wants(payload.guild_id, 'on_raw_message_edit', self.bot.get_channel(payload.channel_id),
+                          stored and stored.author_id, content):
+            return
+        if not known:
+            stored = content = None
+
+        self.emit(payload.guild_id, 'on_raw_message_edit', payload=payload, stored=stored,
+                  before=before_content, after=content)
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
-
-            embed = nextcord.Embed(title='Raw Message Edit', color=nextcord.Color.blue())
-            embed.add_field(name='Channel', value=channel.mention if channel else payload.channel_id)
-            embed.add_field(name='Message ID', value=payload.message_id)
-
-            await self.logger_channel.send(embed=embed)
-            
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
+        message = reaction.message
+        if not self.wants(message.guild, 'on_reaction_add', message.channel, user):
+            return
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Reaction Added', color=nextcord.Color.green())
-            embed.add_field(name='User', value=user.mention)
-            embed.add_field(name='Channel', value=reaction.message.channel.mention)
-            embed.add_field(name='Message', value=reaction.message.jump_url)
-            embed.add_field(name='Emoji', value=reaction.emoji)
+        if not self.throttle.allow('on_reaction_add', message.guild and message.guild.id, message.channel.id, user.id):
+            return
 
-            await self.logger_channel.send(embed=embed)
+        self.emit(message.guild, 'on_reaction_add', reaction=reaction, user=user)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
+        if self.reaction_twin(payload, 'on_reaction_add'):
+            return
+        if not self.wants(payload.guild_id, 'on_raw_reaction_add', self.bot.get_channel(payload.channel_id), payload.member or payload.user_id):
+            return
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
-            message = await channel.fetch_message(payload.message_id)
-
-            embed = nextcord.Embed(title='Raw Reaction Added', color=nextcord.Color.green())
-            embed.add_field(name='User', value=f'<@{payload.user_id}>')
-            embed.add_field(name='Channel', value=channel.mention)
-            embed.add_field(name='Message', value=message.jump_url)
-            embed.add_field(name='Emoji', value=payload.emoji)
+        if not self.throttle.allow('on_raw_reaction_add', payload.guild_id, payload.channel_id, payload.user_id):
+            return
 
-            await self.logger_channel.send(embed=embed)
+        stored = await self.lookup_message(payload.guild_id, payload.channel_id, payload.message_id)
+        self.emit(payload.guild_id, 'on_raw_reaction_add', payload=payload, stored=stored)
 
 
     @commands.Cog.listener()
     async def on_reaction_remove(self, reaction, user):
+        message = reaction.message
+        if not self.wants(message.guild, 'on_reaction_remove', message.channel, user):
+            return
+
+        if not self.throttle.allow('on_reaction_remove', message.guild and message.guild.id, message.channel.id, user.id):
+            return
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Reaction Removed', color=nextcord.Color.red())
-            embed.add_field(name='User', value=user.mention)
-            embed.add_field(name='Channel', value=reaction.message.channel.mention)
-            embed.add_field(name='Message', value=reaction.message.jump_url)
-            embed.add_field(name='Emoji', value=reaction.emoji)
+        self.emit(message.guild, 'on_reaction_remove', reaction=reaction, user=user)
 
-            await self.logger_channel.send(embed=embed)
-            
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
+        if self.reaction_twin(payload, 'on_reaction_remove'):
+            return
+        if not self.wants(payload.guild_id, 'on_raw_reaction_remove', self.bot.get_channel(payload.channel_id), payload.user_id):
+            return
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
+        if not self.throttle.allow('on_raw_reaction_remove', payload.guild_id, payload.channel_id, payload.user_id):
+            return
 
-            embed = nextcord.Embed(title='Raw Reaction Removed', color=nextcord.Color.red())
-            embed.add_field(name='Channel', value=channel.mention)
-            embed.add_field(name='Message ID', value=payload.message_id)
-            embed.add_field(name='Emoji', value=payload.emoji)
+        self.emit(payload.guild_id, 'on_raw_reaction_remove', payload=payload)
 
-            await self.logger_channel.send(embed=embed)
 
-
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_reaction_clear(self, message, reactions):
+        if not self.wants(message.guild, 'on_reaction_clear', message.channel):
+            return
+        self.emit(message.guild, 'on_reaction_clear', message=message, reactions=reactions)
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Reactions Cleared', color=nextcord.Color.red())
-            embed.add_field(name='Channel', value=message.channel.mention)
-            embed.add_field(name='Message', value=message.jump_url)
-            embed.add_field(name='Reaction Count', value=len(reactions))
 
-            await self.logger_channel.send(embed=embed)
-            
-            
     @commands.Cog.listener()
     async def on_raw_reaction_clear(self, payload):
+        if self.reaction_twin(payload, 'on_reaction_clear'):
+            return
+        if not self.wants(payload.guild_id, 'on_raw_reaction_clear', self.bot.get_channel(payload.channel_id)):
+            return
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
-            
-            embed = nextcord.Embed(title='Raw Reactions Cleared', color=nextcord.Color.red())
-            embed.add_field(name='Channel', value=channel.mention)
-            embed.add_field(name='Message ID', value=payload.message_id)
-
-            await self.logger_channel.send(embed=embed)
+        self.emit(payload.guild_id, 'on_raw_reaction_clear', payload=payload)
 
 
     @commands.Cog.listener()
     async def on_reaction_clear_emoji(self, reaction):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Reaction Emoji Cleared', color=nextcord.Color.red())
-            embed.add_field(name='Emoji', value=reaction.emoji)
-            embed.add_field(name='Channel', value=reaction.message.channel.mention)
-            embed.add_field(name='Message', value=reaction.message.jump_url)
-
-            await self.logger_channel.send(embed=embed)
+        message = reaction.message
+        if not self.wants(message.guild, 'on_reaction_clear_emoji', message.channel):
+            return
+        self.emit(message.guild, 'on_reaction_clear_emoji', reaction=reaction)
 
 
     @commands.Cog.listener()
     async def on_raw_reaction_clear_emoji(self, payload):
+        if self.reaction_twin(payload, 'on_reaction_clear_emoji'):
+            return
+        if not self.wants(payload.guild_id, 'on_raw_reaction_clear_emoji', self.bot.get_channel(payload.channel_id)):
+            return
 
-        if self.logger_channel:
-            channel = self.bot.get_channel(payload.channel_id)
-            
-            embed = nextcord.Embed(title='Raw Reaction Emoji Cleared', color=nextcord.Color.red())
-            embed.add_field(name='Channel', value=channel.mention) 
-            embed.add_field(name='Message ID', value=payload.message_id)
-            embed.add_field(name='Emoji', value=payload.emoji)
-
-            await self.logger_channel.send(embed=embed)
+        self.emit(payload.guild_id, 'on_raw_reaction_clear_emoji', payload=payload)
 
 
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_interaction(self, interaction):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Interaction', color=nextcord.Color.purple())
-            embed.add_field(name='Type', value=interaction.type)
-            embed.add_field(name='Name', value=interaction.data.name)
-            embed.add_field(name='User', value=interaction.user)
-            embed.add_field(name='ID', value=interaction.id)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(interaction.guild, 'on_interaction', interaction.channel, interaction.user):
+            return
+        self.emit(interaction.guild, 'on_interaction', interaction=interaction)
 
 
     @commands.Cog.listener()
     async def on_private_channel_update(self, before, after):
+        self.emit(None, 'on_private_channel_update', before=before, after=after)
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Private Channel Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before)
-            embed.add_field(name='After', value=after)
-
-            await self.logger_channel.send(embed=embed)
 
-
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_private_channel_pins_update(self, channel, last_pin):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Private Channel Pins Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Channel', value=channel)
-            embed.add_field(name='Last Pin', value=last_pin)
-
-            await self.logger_channel.send(embed=embed)
+        self.emit(None, 'on_private_channel_pins_update', channel=channel, last_pin=last_pin)
 
     @commands.Cog.listener()
     async def on_guild_channel_update(self, before, after):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Guild Channel Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.mention)
-            embed.add_field(name='After', value=after.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(after.guild, 'on_guild_channel_update', after):
+            return
+        self.emit(after.guild, 'on_guild_channel_update', before=before, after=after)
 
 
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_guild_channel_pins_update(self, channel, last_pin):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Guild Channel Pins Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Channel', value=channel.mention)
-            embed.add_field(name='Last Pin', value=last_pin)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(channel.guild, 'on_guild_channel_pins_update', channel):
+            return
+        self.emit(channel.guild, 'on_guild_channel_pins_update', channel=channel, last_pin=last_pin)
 
 
     @commands.Cog.listener()
     async def on_thread_create(self, thread):
+        if not self.wants(thread.guild, 'on_thread_create', thread):
+            return
+        self.emit(thread.guild, 'on_thread_create', thread=thread)
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Thread Created', color=nextcord.Color.green())
-            embed.add_field(name='Thread', value=thread.mention)
-
-            await self.logger_channel.send(embed=embed)
-
-    @commands.Cog.listener()  
+    @commands.Cog.listener()
     async def on_thread_join(self, thread):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Thread Joined', color=nextcord.Color.green())
-            embed.add_field(name='Thread', value=thread.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(thread.guild, 'on_thread_join', thread):
+            return
+        self.emit(thread.guild, 'on_thread_join', thread=thread)
 
     @commands.Cog.listener()
     async def on_thread_remove(self, thread):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Thread Removed', color=nextcord.Color.red())
-            embed.add_field(name='Thread', value=thread.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(thread.guild, 'on_thread_remove', thread):
+            return
+        self.emit(thread.guild, 'on_thread_remove', thread=thread)
 
     @commands.Cog.listener()
     async def on_thread_delete(self, thread):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Thread Deleted', color=nextcord.Color.red())
-            embed.add_field(name='Thread', value=thread.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(thread.guild, 'on_thread_delete', thread):
+            return
+        self.emit(thread.guild, 'on_thread_delete', thread=thread)
 
     @commands.Cog.listener()
     async def on_thread_member_join(self, member):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='User Joined Thread', color=nextcord.Color.green())
-            embed.add_field(name='Thread', value=member.thread.mention)
-            embed.add_field(name='User', value=member.user.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(member.thread.guild, 'on_thread_member_join', member.thread, member.id):
+            return
+        self.emit(member.thread.guild, 'on_thread_member_join', member=member)
 
     @commands.Cog.listener()
     async def on_thread_member_remove(self, member):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='User Left Thread', color=nextcord.Color.red())
-            embed.add_field(name='Thread', value=member.thread.mention)
-            embed.add_field(name='User', value=member.user.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(member.thread.guild, 'on_thread_member_remove', member.thread, member.id):
+            return
+        self.emit(member.thread.guild, 'on_thread_member_remove', member=member)
 
     @commands.Cog.listener()
     async def on_thread_update(self, before, after):
-
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Thread Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.mention)
-            embed.add_field(name='After', value=after.mention)
-
-            await self.logger_channel.send(embed=embed)
+        if not self.wants(after.guild, 'on_thread_update', after):
+            return
+        self.emit(after.guild, 'on_thread_update', before=before, after=after)
 
     # Other thread listeners
 
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_integration_create(self, integration):
+        if not self.wants(integration.guild, 'on_integration_create'):
+            return
+        self.emit(integration.guild, 'on_integration_create', integration=integration)
 
-        if self.logger_channel:
-            embed = nextcord.Embed(title='Integration Created', color=nextcord.Color.green())
-            embed.add_field(name='Integration', value=integration.name)
-            embed.add_field(name='ID', value=integration.id)
 
-            await self.logger_channel.send(embed=embed)
-
-
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_integration_update(self, integration):
-    
-        if self.logger_channel:
-        
-            embed = nextcord.Embed(title='Integration Updated', color=nextcord.Color.blue())
-            
-            embed.add_field(name='Integration', value=integration.name)
-            
-            await self.logger_channel.send(embed=embed) 
-            
+        if not self.wants(integration.guild, 'on_integration_update'):
+            return
+        self.emit(integration.guild, 'on_integration_update', integration=integration)
+
     @commands.Cog.listener()
     async def on_raw_integration_delete(self, payload):
+        if not self.wants(payload.guild_id, 'on_raw_integration_delete'):
+            return
+        self.emit(payload.guild_id, 'on_raw_integration_delete', payload=payload)
 
-        if self.logger_channel:
-
-            embed = nextcord.Embed(title='Integration Deleted', color=nextcord.Color.red())
-            
-            embed.add_field(name='Integration ID', value=payload.integration_id)
-            
-            await self.logger_channel.send(embed=embed)
-
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_webhooks_update(self, channel):
+        if not self.wants(channel.guild, 'on_webhooks_update', channel):
+            return
 
-        if self.logger_channel:
+        try:
+            diff = await self.webhooks.refresh(channel)
+        except nextcord.Forbidden:
+            return
+
+        ctx = dict(channel=channel, count=len(self.webhooks.channels[channel.id]),
+                   current=None, added=None, removed=None, renamed=None)
+        if diff.initial:
+            # first update we've seen here, so there's nothing to compare against yet
+            if diff.added:
+                ctx['current'] = '\n'.join(f'{w.name} (ID: {w.id})' for w in diff.added)
+        else:
+            if diff.added:
+                ctx['added'] = '\n'.join(f'{w.name} (ID: {w.id})' for w in diff.added)
+            if diff.removed:
+                ctx['removed'] = '\n'.join(f'{name} (ID: {webhook_id})' for webhook_id, name in diff.removed)
+            if diff.renamed:
+                ctx['renamed'] = '\n'.join(f'{old} -> {w.name} (ID: {w.id})' for old, w in diff.renamed)
 
-            before = len(await channel.webhooks())
-            after = len(await channel.webhooks())
+        self.emit(channel.guild, 'on_webhooks_update', **ctx)
 
-            embed = nextcord.Embed(title='Webhooks Updated', color=nextcord.Color.purple())
-            embed.add_field(name='Channel', value=channel.mention)
-            embed.add_field(name='Before', value=before) 
-            embed.add_field(name='After', value=after)
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        try:
+            # on_member_remove already logged this one
+            self.leaving.remove((payload.guild_id, payload.user.id))
+            return
+        except KeyError:
+            pass
+        guild = self.bot.get_guild(payload.guild_id)
+        # the payload already carries the user, only what the member had needs looking up
+        user = payload.user
+        self.users.remember(user)
+        if not self.wants(guild, 'on_raw_member_remove', None, user):
+            self.roster.remove(payload.guild_id, user.id)
+            return
+        entry = await self.roster.get(payload.guild_id, user.id)
+        self.roster.remove(payload.guild_id, user.id)
 
-            if before < after:
-                # Webhooks were added
-                for webhook in await channel.webhooks():
-                    if webhook.token:
-                        embed.add_field(name='Added', value=f"{webhook.name} ({webhook.url})")
-                else:
-                    embed.add_field(name='Added', value=webhook.name)
+        self.emit(guild, 'on_raw_member_remove', user=user, guild=guild, entry=entry)
 
-            elif before > after:
-                # Webhooks were removed
-                pass
 
-            await self.logger_channel.send(embed=embed)
 
     @commands.Cog.listener()
-    async def on_raw_member_remove(self, payload):
-
-        guild = self.bot.get_guild(payload.guild_id)
-        user = await self.bot.fetch_user(payload.user.id)
-
-        if self.logger_channel:
-
-            embed = nextcord.Embed(title='Member Left', color=nextcord.Color.red())
-            embed.add_field(name='Member', value=f'{user} (ID: {user.id})')
-            embed.add_field(name='Guild', value=guild.name)
-            await self.logger_channel.send(embed=embed)
-            
-            
-            
-    @commands.Cog.listener() 
     async def on_presence_update(self, before, after):
+        if not self.wants(after.guild, 'on_presence_update', None, after):
+            return
 
-        if before.activity != after.activity:
+        if before.activity != after.activity and self.throttle.allow('on_presence_update', after.guild.id, None, after.id):
 
             # Activity changed
-            embed = nextcord.Embed(title='Activity Updated', color=nextcord.Color.green())
-            
-            embed.add_field(name='Member', value=after.display_name)
-
-            if before.activity is None:
-                embed.add_field(name='Before', value='No activity')
-            else:
-                embed.add_field(name='Before', value=before.activity.name)
-
-            if after.activity is None:
-                embed.add_field(name='After', value='No activity')
-            else:
-                embed.add_field(name='After', value=after.activity.name)
+            self.emit(after.guild, 'on_presence_update', before=before, after=after)
 
-            await self.logger_channel.send(embed=embed)
-            
-    """ # ! need to add webhook for me personally 
+    """ # ! need to add webhook for me personally
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
 
         embed = nextcord.Embed(title='New Guild Added', color=nextcord.Color.green())
         embed.add_field(name='Guild', value=guild.name)
-        embed.add_field(name='Guild ID', value=guild.id) 
+        embed.add_field(name='Guild ID', value=guild.id)
         embed.add_field(name='Owner', value=guild.owner)
         embed.add_field(name='Member Count', value=guild.member_count)
 
-        await self.logger_channel.send(embed=embed) 
-        
-        
-    @commands.Cog.listener() 
+        self.log(guild, embed, 'on_guild_join')
+
+
+    @commands.Cog.listener()
     async def on_guild_remove(self, guild):
 
         embed = nextcord.Embed(title='Removed from Guild', color=nextcord.Color.red())
@@ -790,117 +845,95 @@ class Logger(commands.Cog):
         embed.add_field(name='Owner', value=guild.owner)
         embed.add_field(name='Member Count', value=guild.member_count)
 
-        await self.logger_channel.send(embed=embed)       
-            
+        self.log(guild, embed, 'on_guild_remove')
+
     """
-            
-            
-            
-            
+
+
+
+
     @commands.Cog.listener()
     async def on_guild_update(self, before, after):
+        if not self.wants(after, 'on_guild_update'):
+            return
 
         if before.name != after.name:
             # Guild name changed
-            embed = nextcord.Embed(title='Guild Name Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.name)
-            embed.add_field(name='After', value=after.name)
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after, 'on_guild_update', before=before, after=after)
 
         if before.region != after.region:
             # Guild region changed
-            embed = nextcord.Embed(title='Guild Region Updated', color=nextcord.Color.green())
-            embed.add_field(name='Before', value=before.region)
-            embed.add_field(name='After', value=after.region)
+            self.emit(after, 'on_guild_update', 'on_guild_update.region', before=before, after=after)
 
-            await self.logger_channel.send(embed=embed) 
-        
     # Add additional checks for relevant guild changes
-            
-            
-    @commands.Cog.listener()
-    async def on_guild_role_create(self, role):
 
-        embed = nextcord.Embed(title='Role Created', color=nextcord.Color.green())
-        embed.add_field(name='Role', value=role.mention)
-        embed.add_field(name='Role ID', value=role.id)
 
-        await self.logger_channel.send(embed=embed)
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        if not self.wants(role.guild, 'on_guild_role_create'):
+            return
+        self.emit(role.guild, 'on_guild_role_create', role=role)
 
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_guild_role_delete(self, role):
+        if not self.wants(role.guild, 'on_guild_role_delete'):
+            return
+        self.emit(role.guild, 'on_guild_role_delete', role=role)
+
 
-        embed = nextcord.Embed(title='Role Deleted', color=nextcord.Color.red())
-        embed.add_field(name='Role', value=role.name)
-        embed.add_field(name='Role ID', value=role.id)
 
-        await self.logger_channel.send(embed=embed)       
-            
-            
-            
     @commands.Cog.listener()
     async def on_guild_role_update(self, before, after):
+        if not self.wants(after.guild, 'on_guild_role_update'):
+            return
 
         if before.name != after.name:
             # Role name changed
-            embed = nextcord.Embed(title='Role Name Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.name)
-            embed.add_field(name='After', value=after.name)
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_guild_role_update', 'on_guild_role_update.name', before=before, after=after)
 
         if before.color != after.color:
             # Role color changed
-            embed = nextcord.Embed(title='Role Color Updated', color=after.color)
-            embed.add_field(name='Before', value=before.color)
-            embed.add_field(name='After', value=after.color)
+            self.emit(after.guild, 'on_guild_role_update', 'on_guild_role_update.color', before=before, after=after)
+
+    # Add checks for other role changes
+
+
 
-            await self.logger_channel.send(embed=embed)
 
-    # Add checks for other role changes  
-    
-    
-    
-    
     @commands.Cog.listener()
     async def on_guild_emojis_update(self, guild, before, after):
+        if not self.wants(guild, 'on_guild_emojis_update'):
+            return
 
         if len(before) < len(after):
             # New emojis added
             new = [e for e in after if e not in before]
-            embed = nextcord.Embed(title='Emojis Added', color=nextcord.Color.green())
-            embed.add_field(name='Emojis', value=', '.join([str(e) for e in new]))
+            self.emit(guild, 'on_guild_emojis_update', 'on_guild_emojis_update.added', emojis=new)
 
         if len(before) > len(after):
             # Emojis removed
             removed = [e for e in before if e not in after]
-            embed = nextcord.Embed(title='Emojis Removed', color=nextcord.Color.red())
-            embed.add_field(name='Emojis', value=', '.join([str(e) for e in removed]))
-
-        await self.logger_channel.send(embed=embed)
+            self.emit(guild, 'on_guild_emojis_update', 'on_guild_emojis_update.removed', emojis=removed)
 
 
     @commands.Cog.listener()
     async def on_guild_stickers_update(self, guild, before, after):
+        if not self.wants(guild, 'on_guild_stickers_update'):
+            return
 
         if len(before) < len(after):
             # New stickers added
             new = [s for s in after if s not in before]
-            embed = nextcord.Embed(title='Stickers Added', color=nextcord.Color.green())
-            embed.add_field(name='Stickers', value='\n'.join([str(s) for s in new]))
+            self.emit(guild, 'on_guild_stickers_update', 'on_guild_stickers_update.added', stickers=new)
 
         if len(before) > len(after):
             # Stickers removed
-            removed = [s for s in before if s not in after] 
-            embed = nextcord.Embed(title='Stickers Removed', color=nextcord.Color.red())
-            embed.add_field(name='Stickers', value='\n'.join([str(s) for s in removed]))
+            removed = [s for s in before if s not in after]
+            self.emit(guild, 'on_guild_stickers_update', 'on_guild_stickers_update.removed', stickers=removed)
+
 
-        await self.logger_channel.send(embed=embed)
-            
-            
         """
-                   
+
     @commands.Cog.listener()
     async def on_guild_available(self, guild):
 
@@ -910,7 +943,7 @@ class Logger(commands.Cog):
         embed.add_field(name='Region', value=guild.region)
         embed.add_field(name='Owner', value=guild.owner)
 
-        await self.logger_channel.send(embed=embed)
+        self.log(guild, embed, 'on_guild_available')
 
 
     @commands.Cog.listener()
@@ -922,209 +955,133 @@ class Logger(commands.Cog):
         embed.add_field(name='Region', value=guild.region)
         embed.add_field(name='Owner', value=guild.owner)
 
-        await self.logger_channel.send(embed=embed) 
-        
-    """ 
-            
-            
-    @commands.Cog.listener()
-    async def on_stage_instance_create(self, stage_instance):
+        self.log(guild, embed, 'on_guild_unavailable')
 
-        embed = nextcord.Embed(title='Stage Channel Created', color=nextcord.Color.green())
+    """
 
-        embed.add_field(name='Channel', value=stage_instance.channel.mention)
-        embed.add_field(name='Topic', value=stage_instance.topic)
-        embed.add_field(name='Privacy Level', value=stage_instance.privacy_level)
-        
-        speakers = ', '.join([m.mention for m in stage_instance.speakers])
-        embed.add_field(name='Speakers', value=speakers)
 
-        await self.logger_channel.send(embed=embed)
+    @commands.Cog.listener()
+    async def on_stage_instance_create(self, stage_instance):
+        if not self.wants(stage_instance.guild, 'on_stage_instance_create', stage_instance.channel):
+            return
+        self.emit(stage_instance.guild, 'on_stage_instance_create', stage_instance=stage_instance)
 
 
     @commands.Cog.listener()
     async def on_stage_instance_delete(self, stage_instance):
+        if not self.wants(stage_instance.guild, 'on_stage_instance_delete', stage_instance.channel):
+            return
+        self.emit(stage_instance.guild, 'on_stage_instance_delete', stage_instance=stage_instance)
 
-        embed = nextcord.Embed(title='Stage Channel Deleted', color=nextcord.Color.red())
-
-        embed.add_field(name='Channel', value=stage_instance.channel.mention)
-        embed.add_field(name='Topic', value=stage_instance.topic)
-        embed.add_field(name='Privacy Level', value=stage_instance.privacy_level)
-        
-        speakers = ', '.join([m.mention for m in stage_instance.speakers])
-        embed.add_field(name='Speakers', value=speakers)
-
-        await self.logger_channel.send(embed=embed)
-            
     @commands.Cog.listener() # ! Additional logic could be added to check for changes in the speaker list and embed those as well.
     async def on_stage_instance_update(self, before, after):
+        if not self.wants(after.guild, 'on_stage_instance_update', after.channel):
+            return
 
         if before.topic != after.topic:
             # Stage channel topic updated
-            embed = nextcord.Embed(title='Stage Channel Topic Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.topic)
-            embed.add_field(name='After', value=after.topic)
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_stage_instance_update', 'on_stage_instance_update.topic', before=before, after=after)
 
         if before.privacy_level != after.privacy_level:
             # Privacy level updated
-            embed = nextcord.Embed(title='Stage Channel Privacy Updated', color=nextcord.Color.purple())
-            embed.add_field(name='Before', value=before.privacy_level)
-            embed.add_field(name='After', value=after.privacy_level)
+            self.emit(after.guild, 'on_stage_instance_update', 'on_stage_instance_update.privacy', before=before, after=after)
+
+  # Check for speaker changes
 
-            await self.logger_channel.send(embed=embed)
 
-  # Check for speaker changes      
-            
-            
     @commands.Cog.listener()
     async def on_group_join(self, channel, user):
-
-        embed = nextcord.Embed(title='User Joined Group', color=nextcord.Color.green())
-        embed.add_field(name='Channel', value=channel.mention)
-        embed.add_field(name='User', value=user.mention)
-
-        await self.logger_channel.send(embed=embed)
+        self.emit(None, 'on_group_join', channel=channel, user=user)
 
 
     @commands.Cog.listener() # more metadata
     async def on_group_remove(self, channel, user):
+        self.emit(None, 'on_group_remove', channel=channel, user=user)
 
-        embed = nextcord.Embed(title='User Left Group', color=nextcord.Color.red())
-        embed.add_field(name='Channel', value=channel.mention)
-        embed.add_field(name='User', value=user.mention)
 
-        await self.logger_channel.send(embed=embed)
-            
-            
     @commands.Cog.listener()
     async def on_guild_scheduled_event_create(self, event):
+        if not self.wants(event.guild, 'on_guild_scheduled_event_create', event.channel):
+            return
+        self.emit(event.guild, 'on_guild_scheduled_event_create', event=event)
 
-        embed = nextcord.Embed(title='Event Created', color=nextcord.Color.green())
-
-        embed.add_field(name='Name', value=event.name)
-        embed.add_field(name='Description', value=event.description)
-        embed.add_field(name='Start Time', value=event.scheduled_start_time)
-        embed.add_field(name='End Time', value=event.scheduled_end_time)
-        embed.add_field(name='Status', value=event.status)
 
-        await self.logger_channel.send(embed=embed)
-            
-            
     @commands.Cog.listener()
     async def on_guild_scheduled_event_update(self, before, after):
+        if not self.wants(after.guild, 'on_guild_scheduled_event_update', after.channel):
+            return
 
         if before.name != after.name:
             # Name changed
-            embed = nextcord.Embed(title='Event Name Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.name)
-            embed.add_field(name='After', value=after.name)
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_guild_scheduled_event_update', 'on_guild_scheduled_event_update.name', before=before, after=after)
 
         if before.scheduled_start_time != after.scheduled_start_time:
             # Start time changed
-            embed = nextcord.Embed(title='Event Start Time Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.scheduled_start_time)
-            embed.add_field(name='After', value=after.scheduled_start_time)
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_guild_scheduled_event_update', 'on_guild_scheduled_event_update.start', before=before, after=after)
 
     # Check other relevant fields for changes
 
 
     @commands.Cog.listener()
     async def on_guild_scheduled_event_delete(self, event):
-    
-        embed = nextcord.Embed(title='Event Deleted', color=nextcord.Color.red())
+        if not self.wants(event.guild, 'on_guild_scheduled_event_delete', event.channel):
+            return
+        self.emit(event.guild, 'on_guild_scheduled_event_delete', event=event)
 
-        embed.add_field(name='Name', value=event.name)
-        embed.add_field(name='Scheduled Start Time', value=event.scheduled_start_time)
 
-        await self.logger_channel.send(embed=embed) 
-            
-            
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_guild_scheduled_event_user_add(self, event, user):
-
-        embed = nextcord.Embed(title='User Added to Event', color=nextcord.Color.green())
-
-        embed.add_field(name='Event', value=event.name)
-        embed.add_field(name='User', value=user.mention)
-
-        await self.logger_channel.send(embed=embed)
+        if not self.wants(event.guild, 'on_guild_scheduled_event_user_add', event.channel, user):
+            return
+        self.emit(event.guild, 'on_guild_scheduled_event_user_add', event=event, user=user)
 
 
     @commands.Cog.listener()
     async def on_guild_scheduled_event_user_remove(self, event, user):
+        if not self.wants(event.guild, 'on_guild_scheduled_event_user_remove', event.channel, user):
+            return
+        self.emit(event.guild, 'on_guild_scheduled_event_user_remove', event=event, user=user)
 
-        embed = nextcord.Embed(title='User Removed from Event', color=nextcord.Color.red())
-
-        embed.add_field(name='Event', value=event.name)
-        embed.add_field(name='User', value=user.mention)
-
-        await self.logger_channel.send(embed=embed)
-        
-    @commands.Cog.listener() 
+    @commands.Cog.listener()
     async def on_auto_moderation_rule_create(self, rule):
+        if not self.wants(rule.guild, 'on_auto_moderation_rule_create'):
+            return
+        self.emit(rule.guild, 'on_auto_moderation_rule_create', rule=rule)
 
-        embed = nextcord.Embed(title='AutoMod Rule Created', color=nextcord.Color.green())
 
-        embed.add_field(name='Rule', value=rule.name)
-        embed.add_field(name='Rule ID', value=rule.id)
-        embed.add_field(name='Creator', value=rule.creator.mention)
 
-        await self.logger_channel.send(embed=embed)
-            
-            
-            
     @commands.Cog.listener()
     async def on_auto_moderation_rule_update(self, before, after):
+        if not self.wants(after.guild, 'on_auto_moderation_rule_update'):
+            return
 
         if before.name != after.name:
             # Rule name updated
-            embed = nextcord.Embed(title='AutoMod Rule Name Updated', color=nextcord.Color.blue())
-            embed.add_field(name='Before', value=before.name)
-            embed.add_field(name='After', value=after.name)
-
-            await self.logger_channel.send(embed=embed)
+            self.emit(after.guild, 'on_auto_moderation_rule_update', 'on_auto_moderation_rule_update.name', before=before, after=after)
 
         if before.enabled != after.enabled:
             # Enabled status changed
-            embed = nextcord.Embed(title='AutoMod Rule Status Updated', color=nextcord.Color.orange())
-            embed.add_field(name='Before', value=before.enabled)
-            embed.add_field(name='After', value=after.enabled)
+            self.emit(after.guild, 'on_auto_moderation_rule_update', 'on_auto_moderation_rule_update.enabled', before=before, after=after)
 
-            await self.logger_channel.send(embed=embed)
-    
   # Check other relevant fields for changes
-  
-  
-  
-  
+
+
+
+
     @commands.Cog.listener()
     async def on_auto_moderation_rule_delete(self, rule):
+        if not self.wants(rule.guild, 'on_auto_moderation_rule_delete'):
+            return
+        self.emit(rule.guild, 'on_auto_moderation_rule_delete', rule=rule)
 
-        embed = nextcord.Embed(title='AutoMod Rule Deleted', color=nextcord.Color.red())
-
-        embed.add_field(name='Rule', value=rule.name)
-        embed.add_field(name='Rule ID', value=rule.id)
 
-        await self.logger_channel.send(embed=embed)
-  
-  
 
     @commands.Cog.listener()
     async def on_guild_audit_log_entry_create(self, entry):
-        embed = nextcord.Embed(title='Audit Log Updated', color=nextcord.Color.dark_gold())
-
-        user = entry.user
-        embed.add_field(name='User', value=user.display_name)
+        if not self.wants(entry.guild, 'on_guild_audit_log_entry_create', None, entry.user):
+            return
 
         action = entry.action
-        embed.add_field(name='Action', value=action.name)
-
         target = entry.target
         target_name = None
 
@@ -1138,18 +1095,20 @@ class Logger(commands.Cog):
             target_name = f"Text Channel: {target.name}"
 
         elif isinstance(target, nextcord.VoiceChannel):
-            target_name = f"Voice Channel: {target.name}"  
+            target_name = f"Voice Channel: {target.name}"
 
         elif isinstance(target, nextcord.CategoryChannel):
             target_name = f"Category: {target.name}"
 
         elif isinstance(target, nextcord.StageChannel):
             target_name = f"Stage Channel: {target.name}"
-            
-        elif isinstance(target, nextcord.Webhook):
-            target_name = await self.fetch_webhook_name(target.id)
-            if target_name is None:
-                target_name = f"Unknown target (WIP) (ID: {target.id})"
+
+        elif isinstance(target, nextcord.Webhook) or action.name.startswith('webhook_'):
+            webhook_name = self.webhooks.name_of(target.id)
+            if webhook_name is None:
+                target_name = f"Unknown webhook (ID: {target.id})"
+            else:
+                target_name = f"Webhook: {webhook_name}"
 
         elif isinstance(target, nextcord.Thread):
             target_name = f"Thread: {target.name}"
@@ -1157,9 +1116,7 @@ class Logger(commands.Cog):
         else:
             target_name = f"Unknown target (ID: {target.id})"
 
-        embed.add_field(name='Target', value=target_name)
-
-        await self.logger_channel.send(embed=embed)
+        self.emit(entry.guild, 'on_guild_audit_log_entry_create', entry=entry, target=target_name)
 
 
   
@@ -1175,7 +1132,22 @@ class Logger(commands.Cog):
   
                 
     def cog_unload(self):
-        self.save_config()
+        self.config.flush()
+        self.config.stop_watching()
+        self.compactor.stop()
+        self.roster.close()
+        self.journal.close()
+        # Search reads the same index, so only the last of us closes it
+        self.search.release()
+        if self.delivery is not None:
+            self.delivery.close()
+        flushes = [queue.close() for queue in self.queues.values()]
+        self.bot.loop.create_task(self._drain([f for f in flushes if f]))
+
+    async def _drain(self, flushes):
+        await asyncio.gather(*flushes, return_exceptions=True)
+        for pool in self.webhook_pools.values():
+            await pool.close()
 
     # Add more event listeners here as per your requirements
 
@@ -0,0 +1,45 @@
+import os
+import time
+
+from nextcord.ext import commands
+
+# Where the gateway recording goes; unset means nothing is recorded. main.py turns on
+# nextcord's debug events (which the recording is made from) only when this is set.
+RECORD_ENV = 'RECORD_GATEWAY'
+
+
+class Recorder(commands.Cog):
+    """
+    Records every gateway payload the bot receives into a JSON lines file, for
+    benchmarks/replay.py to play back. Each line is {"at": <seconds since the recording
+    started>, "payload": <the payload exactly as Discord sent it>}; the payload text is
+    written as it came, without being decoded and encoded again.
+
+    Recordings contain everything the bot sees, message content included, so treat them
+    like the logs themselves.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.path = os.getenv(RECORD_ENV)
+        self.file = None
+        self.started = None
+        if not self.path:
+            self.__cog_listeners__ = []
+
+    @commands.Cog.listener()
+    async def on_socket_raw_receive(self, msg):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+            self.started = time.monotonic()
+            print(f'> Recording gateway events to {self.path}')
+        self.file.write(f'{{"at":{time.monotonic() - self.started:.4f},"payload":{msg}}}\n')
+
+    def cog_unload(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def setup(bot):
+    bot.add_cog(Recorder(bot))
@@ -0,0 +1,156 @@
+import datetime
+import tempfile
+from typing import Optional
+
+import nextcord
+from nextcord.ext import commands
+from nextcord.utils import utcnow
+
+from commands.utils.export import FORMATS
+from commands.utils.message_store import jump_url
+from commands.utils.search_index import PAGE_SIZE, get_search_index
+
+
+def results_embed(guild, hits, query):
+    embed = nextcord.Embed(title='Log Search', color=nextcord.Color.blurple())
+    embed.description = query or 'All logged events'
+    if not hits:
+        embed.add_field(name='No results', value='Nothing logged matches that search.')
+        return embed
+    for hit in hits:
+        where = f' in <#{hit.channel_id}>' if hit.channel_id else ''
+        who = f' by <@{hit.user_id}>' if hit.user_id else ''
+        value = (hit.content or '(no content)')[:300]
+        if hit.message_id and hit.channel_id:
+            value += f'\n[jump]({jump_url(guild.id, hit.channel_id, hit.message_id)})'
+        embed.add_field(
+            name=hit.event[3:].replace('_', ' '),
+            value=f'<t:{int(hit.ts)}:f>{where}{who}\n{value}',
+            inline=False,
+        )
+    return embed
+
+
+def describe(text, channel, user):
+    parts = []
+    if text:
+        parts.append(f'"{text}"')
+    if channel:
+        parts.append(f'in {channel.mention}')
+    if user:
+        parts.append(f'by {user.mention}')
+    return ' '.join(parts)
+
+
+class SearchPages(nextcord.ui.View):
+    """Pages back through older results; each page is a keyset query on the (snowflake, id) index."""
+
+    def __init__(self, index, guild, author_id, text, channel, user, hits):
+        super().__init__(timeout=300)
+        self.index = index
+        self.guild = guild
+        self.author_id = author_id
+        self.query = (text, channel and channel.id, user and user.id)
+        self.title = describe(text, channel, user)
+        self.pages = [hits]  # every page seen so far, for going back without a query
+        self.page = 0
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.newer.disabled = self.page == 0
+        self.older.disabled = len(self.pages[self.page]) < PAGE_SIZE and self.page == len(self.pages) - 1
+
+    async def interaction_check(self, interaction):
+        return interaction.user.id == self.author_id
+
+    @nextcord.ui.button(label='Newer', style=nextcord.ButtonStyle.secondary)
+    async def newer(self, button, interaction):
+        self.page -= 1
+        await self._show(interaction)
+
+    @nextcord.ui.button(label='Older', style=nextcord.ButtonStyle.secondary)
+    async def older(self, button, interaction):
+        if self.page == len(self.pages) - 1:
+            text, channel_id, user_id = self.query
+            last = self.pages[-1][-1]
+            hits = await self.index.search(self.guild.id, text, channel_id, user_id, before=(last.snowflake, last.id))
+            if not hits:
+                self.older.disabled = True
+                await interaction.response.edit_message(view=self)
+                return
+            self.pages.append(hits)
+        self.page += 1
+        await self._show(interaction)
+
+    async def _show(self, interaction):
+        self._update_buttons()
+        embed = results_embed(self.guild, self.pages[self.page], self.title)
+        embed.set_footer(text=f'Page {self.page + 1}')
+        await interaction.response.edit_message(embed=embed, view=self)
+
+
+class Search(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.index = get_search_index(bot)
+
+    async def run_search(self, guild, author_id, text, channel, user):
+        hits = await self.index.search(guild.id, text, channel and channel.id, user and user.id)
+        embed = results_embed(guild, hits, describe(text, channel, user))
+        embed.set_footer(text='Page 1')
+        view = SearchPages(self.index, guild, author_id, text, channel, user, hits) if hits else None
+        return embed, view
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    async def search(self, ctx, channel: Optional[nextcord.TextChannel] = None, user: Optional[nextcord.User] = None, *, text=None):
+        """qsearch [#channel] [@user] [words] - search this server's logged events."""
+        embed, view = await self.run_search(ctx.guild, ctx.author.id, text, channel, user)
+        await ctx.send(embed=embed, view=view)
+
+    @nextcord.slash_command(name='search', description='Search the logged events of this server',
+                            dm_permission=False, default_member_permissions=nextcord.Permissions(manage_messages=True))
+    async def search_slash(
+        self,
+        interaction: nextcord.Interaction,
+        text: str = nextcord.SlashOption(description='Words the message contained', required=False),
+        channel: nextcord.TextChannel = nextcord.SlashOption(description='Only events in this channel', required=False),
+        user: nextcord.User = nextcord.SlashOption(description='Only events by or about this user', required=False),
+    ):
+        embed, view = await self.run_search(interaction.guild, interaction.user.id, text, channel, user)
+        # results can contain deleted messages, so only the moderator who asked sees them
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    async def export(self, ctx, user: Optional[nextcord.User] = None, days: int = 30, fmt: str = 'jsonl'):
+        """qexport [@user] [days] [jsonl|csv] - download this server's logged events."""
+        if fmt not in FORMATS:
+            await ctx.send(f'Format must be one of: {", ".join(FORMATS)}')
+            return
+        since = utcnow() - datetime.timedelta(days=days)
+        name = f'logs-{ctx.guild.id}' + (f'-{user.id}' if user else '')
+        with tempfile.TemporaryDirectory() as directory:
+            async with ctx.typing():
+                paths, count = await self.index.export(
+                    ctx.guild.id, directory, name, fmt,
+                    user_id=user and user.id, since=since, part_bytes=ctx.guild.filesize_limit,
+                )
+            if not count:
+                await ctx.send('Nothing was logged for that in the given time.')
+                return
+            # one file per message, each part is sized to the upload limit on its own
+            for number, path in enumerate(paths, 1):
+                content = f'{count} events over the last {days} days' if number == 1 else None
+                if len(paths) > 1:
+                    content = f'{content or ""} (part {number}/{len(paths)})'.strip()
+                await ctx.send(content, file=nextcord.File(path))
+
+    def cog_unload(self):
+        self.index.release()
+
+
+def setup(bot):
+    bot.add_cog(Search(bot))
@@ -0,0 +1,113 @@
+import time
+
+import nextcord
+from nextcord.ext import commands
+
+from commands.utils.metrics import get_metrics
+from commands.utils.shards import get_shard_monitor
+
+# Characters of shard lines per embed field; longer clusters are cut off.
+FIELD_LIMIT = 1024
+
+
+def _duration(seconds):
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f'{seconds / size:.0f}{unit}'
+    return f'{seconds:.0f}s'
+
+
+def _shard_line(shard, now):
+    state = 'up' if shard['up'] else 'down'
+    latency = f'{shard["latency"] * 1000:.0f}ms' if shard['latency'] is not None else 'no heartbeat'
+    return (f'`#{shard["shard_id"] or 0}` {state} {_duration(now - shard["since"])}, {latency}, '
+            f'{shard["rate"]:.1f} events/s, {shard["guilds"]} guilds, {shard["disconnects"]} disconnects')
+
+
+class Shards(commands.Cog):
+    """Tracks the health of this process's shards for qshards and the metrics endpoint."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.monitor = get_shard_monitor(bot)
+        metrics = get_metrics(bot)
+        shards = self.monitor.shards
+        metrics.gauge('logger_shard_up', 'Whether each shard is connected.',
+                      lambda: {health.shard_id or 0: int(health.up) for health in shards.values()}, label='shard')
+        metrics.gauge('logger_shard_latency_seconds', 'Heartbeat round trip of each shard.',
+                      lambda: {health.shard_id or 0: health.latency for health in shards.values()
+                               if health.latency is not None}, label='shard')
+        metrics.gauge('logger_shard_events_per_second', 'Gateway dispatches per second on each shard.',
+                      lambda: {health.shard_id or 0: health.rate for health in shards.values()}, label='shard')
+
+    def _sharded(self):
+        return bool(self.bot.shard_count)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.monitor.start()
+
+    # sharded bots get both the shard events and the plain ones; each is counted once
+    @commands.Cog.listener()
+    async def on_shard_connect(self, shard_id):
+        health = self.monitor.shard(shard_id)
+        health.connects += 1
+        health.set_up(True)
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id):
+        health = self.monitor.shard(shard_id)
+        health.resumes += 1
+        health.set_up(True)
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id):
+        health = self.monitor.shard(shard_id)
+        health.disconnects += 1
+        health.set_up(False)
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        if not self._sharded():
+            await self.on_shard_connect(None)
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        if not self._sharded():
+            await self.on_shard_resumed(None)
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        if not self._sharded():
+            await self.on_shard_disconnect(None)
+
+    @commands.command()
+    @commands.is_owner()
+    async def shards(self, ctx):
+        """qshards - connection state, latency and event rate of every shard."""
+        self.monitor.sample()
+        clusters = await self.bot.loop.run_in_executor(None, self.monitor.cluster_status)
+        now = time.time()
+        embed = nextcord.Embed(title='Shards', color=nextcord.Color.blurple())
+        for status, stale in clusters:
+            name = 'This process' if status['cluster'] is None else f'Cluster {status["cluster"]}'
+            if stale:
+                value = f'No report for {_duration(now - status["at"])}, last from pid {status["pid"]}'
+            else:
+                value = ''
+                for shard in status['shards']:
+                    line = _shard_line(shard, now)
+                    if len(value) + len(line) + 1 > FIELD_LIMIT:
+                        break
+                    value += line + '\n'
+            embed.add_field(name=name, value=value or 'Not connected yet', inline=False)
+        if ctx.guild:
+            embed.set_footer(text=f'This server is on shard {ctx.guild.shard_id}')
+        await ctx.send(embed=embed)
+
+    def cog_unload(self):
+        self.monitor.stop()
+
+
+def setup(bot):
+    bot.add_cog(Shards(bot))
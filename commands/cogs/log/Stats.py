@@ -0,0 +1,69 @@
+import os
+
+import nextcord
+from nextcord.ext import commands
+
+from commands.utils.metrics import get_metrics, quantiles, serve_metrics
+
+# Top events listed by qstats.
+STATS_EVENTS = 10
+
+
+class Stats(commands.Cog):
+    """qstats, and the Prometheus endpoint when METRICS_PORT is set in the environment."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.metrics = get_metrics(bot)
+        self.server = None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        port = os.getenv('METRICS_PORT')
+        if port and self.server is None:
+            self.server = await serve_metrics(self.metrics, int(port))
+            print(f'> Serving metrics on port {port}')
+
+    @commands.command()
+    @commands.is_owner()
+    async def stats(self, ctx):
+        """qstats - listener latency, send outcomes and delivery lag of the logger."""
+        metrics = self.metrics
+        embed = nextcord.Embed(title='Logger Stats', color=nextcord.Color.blurple())
+        busiest = sorted(metrics.listeners.items(), key=lambda item: item[1].count, reverse=True)[:STATS_EVENTS]
+        embed.add_field(
+            name='Listeners (calls, logged, p50/p99)',
+            value='\n'.join(
+                f'`{event}` {hist.count}, {metrics.logged.get(event, 0)}, {quantiles(hist)}'
+                for event, hist in busiest
+            ) or 'No events yet',
+            inline=False,
+        )
+        sends = metrics.sends
+        embed.add_field(
+            name='Sends',
+            value=f'{sends["ok"]} ok, {sends["rate_limited"]} rate limited, {sends["error"]} failed\n'
+                  f'{metrics.rate_limits} 429s retried, {sum(metrics.dropped.values())} embeds dropped',
+        )
+        embed.add_field(
+            name='Delivery',
+            value=f'send p50/p99 {quantiles(metrics.send_latency)}\n'
+                  f'lag p50/p99 {quantiles(metrics.lag)}',
+        )
+        depth = metrics.gauges.get('logger_queue_depth')
+        if depth:
+            _, label, read = depth
+            # per lane in process, per worker with delivery workers
+            queued = (f'{count} {key}' if label == 'lane' else f'{count} in {label} {key}'
+                      for key, count in read().items())
+            embed.add_field(name='Queued', value=', '.join(queued) or 'nothing', inline=False)
+        await ctx.send(embed=embed)
+
+    def cog_unload(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+
+def setup(bot):
+    bot.add_cog(Stats(bot))
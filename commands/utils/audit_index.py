@@ -0,0 +1,111 @@
+import asyncio
+import datetime
+import time
+from collections import deque
+
+import nextcord
+
+from commands.utils.singleflight import SingleFlight
+
+# How long entries are kept around to be matched with the event they caused.
+AUDIT_RETENTION = 120
+# How long a handler waits for the entry to arrive over the gateway before fetching it.
+AUDIT_WAIT = 2.0
+# Entries pulled per fallback fetch, and the minimum time between fetches for a guild.
+AUDIT_FETCH_LIMIT = 25
+AUDIT_FETCH_COOLDOWN = 5.0
+
+
+class AuditIndex:
+    """
+    Recent audit log entries indexed by (guild id, action, target id).
+
+    Fed by `on_guild_audit_log_entry_create`, so ban/kick/delete/bot-add handlers can
+    find who did it with a dict lookup instead of each reading the latest entry over
+    REST (which also attributes concurrent bans to the wrong moderator). If an entry
+    hasn't arrived after a short wait, one batched fetch per guild fills the gaps.
+    """
+
+    def __init__(self, retention=AUDIT_RETENTION):
+        self.retention = retention
+        self.entries = {}  # key -> (monotonic time, entry)
+        self.order = deque()  # (monotonic time, key), oldest first
+        self.waiters = {}  # key -> [Future]
+        self.fetched_at = {}  # guild id -> monotonic time of the last fallback fetch
+        self.fetches = SingleFlight()
+
+    async def on_guild_audit_log_entry_create(self, entry):
+        self.record(entry)
+
+    def record(self, entry):
+        target_id = getattr(entry.target, 'id', None)
+        key = (entry.guild.id, entry.action, target_id)
+        now = time.monotonic()
+        self.entries[key] = (now, entry)
+        self.order.append((now, key))
+        for future in self.waiters.pop(key, ()):
+            if not future.done():
+                future.set_result(entry)
+        self._prune(now)
+
+    def _prune(self, now):
+        expired = now - self.retention
+        while self.order and self.order[0][0] < expired:
+            recorded_at, key = self.order.popleft()
+            current = self.entries.get(key)
+            if current and current[0] == recorded_at:
+                del self.entries[key]
+
+    def get(self, guild_id, action, target_id):
+        found = self.entries.get((guild_id, action, target_id))
+        if found and found[0] >= time.monotonic() - self.retention:
+            return found[1]
+        return None
+
+    async def find(self, guild, action, target_id, wait=AUDIT_WAIT, fetch=True):
+        """The entry for `action` on `target_id`, or None if there isn't one (or we can't see it).
+
+        With `fetch=False` only the entries streamed over the gateway count; for actions
+        most events don't have an entry for, like a kick for every member who leaves.
+        """
+        entry = self.get(guild.id, action, target_id)
+        if entry or not guild.me.guild_permissions.view_audit_log:
+            return entry
+
+        key = (guild.id, action, target_id)
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(key, []).append(future)
+        try:
+            return await asyncio.wait_for(future, wait)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self.waiters.get(key)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self.waiters[key]
+
+        if not fetch:
+            return None
+        await self.fetches.do(guild.id, lambda: self._fetch(guild))
+        return self.get(guild.id, action, target_id)
+
+    async def _fetch(self, guild):
+        now = time.monotonic()
+        if now - self.fetched_at.get(guild.id, 0) < AUDIT_FETCH_COOLDOWN:
+            return
+        self.fetched_at[guild.id] = now
+        oldest = nextcord.utils.utcnow() - datetime.timedelta(seconds=self.retention)
+        async for entry in guild.audit_logs(limit=AUDIT_FETCH_LIMIT, after=oldest, oldest_first=False):
+            if self.get(guild.id, entry.action, getattr(entry.target, 'id', None)) is None:
+                self.record(entry)
+
+
+def get_audit_index(bot):
+    """The bot-wide AuditIndex, created and hooked up to the gateway on first use."""
+    index = getattr(bot, 'audit_index', None)
+    if index is None:
+        index = bot.audit_index = AuditIndex()
+        bot.add_listener(index.on_guild_audit_log_entry_create)
+    return index
@@ -0,0 +1,38 @@
+import time
+from collections import OrderedDict
+
+# How long a key is remembered. Long enough to cover a gateway resume replaying events.
+DEDUP_TTL = 120
+DEDUP_MAX_KEYS = 50000
+
+
+class Deduper:
+    """
+    A bounded, time-windowed set of event keys.
+
+    nextcord dispatches both a raw and a cached variant of many events, and a gateway
+    resume can dispatch the same event again. Listeners `claim` a key such as
+    ('message_delete', guild_id, channel_id, message_id) before logging; only the first
+    claim within the window wins.
+    """
+
+    def __init__(self, ttl=DEDUP_TTL, max_keys=DEDUP_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.keys = OrderedDict()  # key -> monotonic time it was claimed, oldest first
+
+    def claim(self, key):
+        """Return True if this is the first time the key was seen within the window."""
+        now = time.monotonic()
+        keys = self.keys
+        expired = now - self.ttl
+        while keys:
+            oldest, claimed_at = next(iter(keys.items()))
+            if claimed_at > expired and len(keys) < self.max_keys:
+                break
+            del keys[oldest]
+
+        if key in keys:
+            return False
+        keys[key] = now
+        return True
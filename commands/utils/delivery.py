@@ -0,0 +1,338 @@
+"""
+Log delivery in separate processes, so batching, rate limits and HTTP never run on the
+event loop that keeps the gateway heartbeat going.
+
+With DELIVERY_WORKERS=N the Logger hands every rendered embed to `DeliveryWorkers`
+instead of a SendQueue of its own. Each worker is a `python -m commands.utils.delivery`
+process fed over a pipe: the gateway process only puts (record id, channel id, delivery,
+event, embed) tuples on an in-memory queue, a thread pickles them onto the pipe in
+batches, and the worker runs the usual SendQueue/WebhookPool per logger channel with its
+own HTTP client. A channel always goes to the same worker, so its batching and rate
+limits live in one place. The pipes are plain file descriptors, so this is Unix only.
+
+Workers ack every record once it's sent (with the message id) or dropped. The acks
+are the backpressure: a worker with WORKER_IN_FLIGHT records unacked gets nothing
+but high priority events until it catches up; the rest are shed in the gateway process
+before they're ever serialized.
+"""
+import asyncio
+import itertools
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from multiprocessing.connection import Connection
+
+import nextcord
+
+from commands.utils.metrics import Histogram, LATENCY_BUCKETS, get_metrics
+from commands.utils.send_queue import EVENT_PRIORITY, LANES, SendQueue
+from commands.utils.webhook_pool import WebhookPool
+
+# Number of delivery worker processes; unset or 0 delivers on the bot's own event loop.
+WORKERS_ENV = 'DELIVERY_WORKERS'
+# Records a worker may have unacked before the gateway process sheds all but high priority ones.
+WORKER_IN_FLIGHT = 5000
+# Records pickled onto a worker's pipe in one go.
+WRITE_BATCH = 200
+# Seconds before a worker that exited is started again.
+RESTART_DELAY = 1.0
+
+
+class WorkerProcess:
+    """One delivery worker, as the gateway process sees it."""
+
+    def __init__(self, number):
+        self.number = number
+        self.process = None
+        self.outbox = None  # queue.SimpleQueue of records for the writer thread
+        self.pending = {}  # record id -> (future, queued at, lane, channel)
+        self.depth = 0  # embeds queued in the worker, as of its last ack
+
+
+class DeliveryWorkers:
+    """
+    The gateway process's end of the delivery workers. `put` is all the Logger calls;
+    it returns a future resolved with a PartialMessage of the log message the embed was
+    sent in, or None if it was shed or failed.
+    """
+
+    def __init__(self, bot, count, metrics, lanes=None, priorities=None, in_flight=WORKER_IN_FLIGHT):
+        self.bot = bot
+        self.metrics = metrics
+        self.lanes = lanes or LANES
+        self.priorities = priorities or EVENT_PRIORITY
+        self.in_flight = in_flight
+        self.workers = [WorkerProcess(number) for number in range(count)]
+        self._ids = itertools.count()
+        self._loop = None
+        self.closing = False
+        metrics.gauge('logger_delivery_in_flight', 'Records handed to a delivery worker and not acked yet.',
+                      lambda: {worker.number: len(worker.pending) for worker in self.workers}, label='worker')
+        # the send queues live in the workers, which report how full they are with every ack
+        metrics.gauge('logger_queue_depth', 'Embeds waiting to be sent, per delivery worker.',
+                      lambda: {worker.number: worker.depth for worker in self.workers}, label='worker')
+
+    def start(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            for worker in self.workers:
+                self._spawn(worker)
+
+    def _spawn(self, worker):
+        records_read, records_write = os.pipe()
+        acks_read, acks_write = os.pipe()
+        # -m needs the repository root on sys.path, wherever the bot was started from
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        process = subprocess.Popen([sys.executable, '-m', 'commands.utils.delivery'], cwd=root,
+                                   stdin=records_read, stdout=acks_write)
+        os.close(records_read)
+        os.close(acks_write)
+        if worker.outbox is not None:
+            # the previous writer thread is still waiting for records
+            worker.outbox.put(None)
+        worker.process = process
+        worker.outbox = queue.SimpleQueue()
+        hello = {'token': self.bot.http.token, 'api': nextcord.http.Route.BASE, 'worker': worker.number,
+                 'lanes': self.lanes, 'priorities': self.priorities}
+        threading.Thread(target=self._write, args=(worker.outbox, Connection(records_write, readable=False), hello),
+                         name=f'delivery-write-{worker.number}', daemon=True).start()
+        threading.Thread(target=self._read, args=(worker, process, Connection(acks_read, writable=False)),
+                         name=f'delivery-read-{worker.number}', daemon=True).start()
+
+    @staticmethod
+    def _write(outbox, connection, hello):
+        try:
+            connection.send(hello)
+            while True:
+                batch = [outbox.get()]
+                while batch[-1] is not None and len(batch) < WRITE_BATCH:
+                    try:
+                        batch.append(outbox.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is None:
+                    if len(batch) > 1:
+                        connection.send(batch[:-1])
+                    connection.send(None)
+                    return
+                connection.send(batch)
+        except OSError:
+            # the worker is gone, its reader thread reports it
+            pass
+        finally:
+            connection.close()
+
+    def _read(self, worker, process, connection):
+        try:
+            while True:
+                message = connection.recv()
+                self._loop.call_soon_threadsafe(self._acked, worker, message)
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+            process.wait()
+            try:
+                self._loop.call_soon_threadsafe(self._lost, worker, process)
+            except RuntimeError:
+                # the bot's loop is closed already
+                pass
+
+    def put(self, channel, embed, event, delivery):
+        self.start()
+        if isinstance(embed, nextcord.Embed):
+            embed = embed.to_dict()
+        future = self._loop.create_future()
+        worker = self.workers[channel.id % len(self.workers)]
+        lane = self.priorities.get(event, 'normal')
+        if self.closing or (len(worker.pending) >= self.in_flight and lane != 'high'):
+            self.metrics.dropped[lane] += 1
+            future.set_result(None)
+            return future
+        record_id = next(self._ids)
+        worker.pending[record_id] = (future, time.monotonic(), lane, channel)
+        worker.outbox.put((record_id, channel.id, delivery, event, embed))
+        return future
+
+    def _acked(self, worker, message):
+        now = time.monotonic()
+        for record_id, message_id in message['acks']:
+            entry = worker.pending.pop(record_id, None)
+            if entry is None:
+                continue
+            future, queued, _, channel = entry
+            if message_id is not None:
+                self.metrics.lag.observe(now - queued)
+            if not future.done():
+                future.set_result(message_id and channel.get_partial_message(message_id))
+        for outcome, count in message['sends'].items():
+            self.metrics.sends[outcome] += count
+        for lane, count in message['dropped'].items():
+            self.metrics.dropped[lane] += count
+        self.metrics.send_latency.merge(message['send_latency'])
+        self.metrics.rate_limits += message['rate_limits']
+        worker.depth = message['depth']
+
+    def _lost(self, worker, process):
+        if process is not worker.process or self.closing:
+            return
+        print(f'Logger: delivery worker {worker.number} exited with {process.returncode}, '
+              f'{len(worker.pending)} logs lost; restarting it')
+        for future, _, lane, _ in worker.pending.values():
+            self.metrics.dropped[lane] += 1
+            if not future.done():
+                future.set_result(None)
+        worker.pending.clear()
+        worker.depth = 0
+        self._loop.call_later(RESTART_DELAY, self._restart, worker)
+
+    def _restart(self, worker):
+        if not self.closing:
+            self._spawn(worker)
+
+    def pending(self):
+        """Records handed to the workers and not acked yet."""
+        return sum(len(worker.pending) for worker in self.workers)
+
+    def close(self):
+        """Tell the workers to send what they have and exit; doesn't wait for them."""
+        self.closing = True
+        for worker in self.workers:
+            if worker.outbox is not None:
+                worker.outbox.put(None)
+
+
+class DeliveryWorker:
+    """The worker process's end: SendQueues per logger channel, fed from the pipe."""
+
+    def __init__(self, hello, records, acks):
+        nextcord.http.Route.BASE = hello['api']
+        self.token = hello['token']
+        self.number = hello['worker']
+        self.lanes = hello['lanes']
+        self.priorities = hello['priorities']
+        self.records = records
+        self.connection = acks
+        # counted here and sent back with the acks, see _send_acks
+        self.metrics = get_metrics(self)
+        self.client = None
+        self.queues = {}  # channel id -> SendQueue
+        self.pools = {}  # channel id -> WebhookPool
+        self.opening = {}  # channel id -> records waiting for the channel to be fetched
+        self.acks = []
+        self._loop = None
+        self._flush_scheduled = False
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self.client = nextcord.Client(intents=nextcord.Intents.none())
+        await self.client.login(self.token)
+        done = self._loop.create_future()
+        threading.Thread(target=self._read, args=(done,), name='delivery-read', daemon=True).start()
+        await done
+
+        flushes = [queue.close() for queue in self.queues.values()]
+        await asyncio.gather(*[flush for flush in flushes if flush], return_exceptions=True)
+        # let the futures' callbacks ack the last of them
+        await asyncio.sleep(0)
+        self._send_acks()
+        for pool in self.pools.values():
+            await pool.close()
+        await self.client.close()
+
+    def _read(self, done):
+        try:
+            while True:
+                batch = self.records.recv()
+                if batch is None:
+                    break
+                self._loop.call_soon_threadsafe(self.put_many, batch)
+        except (EOFError, OSError):
+            # the bot process is gone
+            pass
+        self._loop.call_soon_threadsafe(done.set_result, None)
+
+    def put_many(self, batch):
+        for record in batch:
+            channel_id = record[1]
+            queue = self.queues.get(channel_id)
+            if queue is not None:
+                self._queue(queue, record)
+                continue
+            waiting = self.opening.get(channel_id)
+            if waiting is None:
+                waiting = self.opening[channel_id] = []
+                self._loop.create_task(self._open(channel_id, record[2]))
+            waiting.append(record)
+
+    async def _open(self, channel_id, delivery):
+        try:
+            channel = await self.client.fetch_channel(channel_id)
+        except nextcord.HTTPException as e:
+            print(f'Logger: delivery worker {self.number} could not fetch channel {channel_id}: {e}')
+            channel = None
+        waiting = self.opening.pop(channel_id)
+        if channel is None:
+            for record in waiting:
+                self._ack(record[0], None)
+            return
+        sender = None
+        if delivery == 'webhook':
+            pool = self.pools[channel_id] = WebhookPool(channel)
+            sender = pool.send
+        queue = self.queues[channel_id] = SendQueue(channel, lanes=self.lanes, priorities=self.priorities,
+                                                    sender=sender, metrics=self.metrics)
+        for record in waiting:
+            self._queue(queue, record)
+
+    def _queue(self, queue, record):
+        record_id, _, _, event, embed = record
+        queue.put(embed, event).add_done_callback(lambda future: self._sent(record_id, future))
+
+    def _sent(self, record_id, future):
+        message = None
+        if not future.cancelled() and future.exception() is None:
+            message = future.result()
+        self._ack(record_id, message and message.id)
+
+    def _ack(self, record_id, message_id):
+        self.acks.append((record_id, message_id))
+        if not self._flush_scheduled:
+            # everything acked in this pass of the loop goes back in one message
+            self._flush_scheduled = True
+            self._loop.call_soon(self._send_acks)
+
+    def _send_acks(self):
+        self._flush_scheduled = False
+        metrics = self.metrics
+        message = {
+            'acks': self.acks,
+            'sends': dict(metrics.sends),
+            'dropped': dict(metrics.dropped),
+            'send_latency': metrics.send_latency,
+            'rate_limits': metrics.rate_limits,
+            'depth': sum(len(queue) for queue in self.queues.values()),
+        }
+        self.acks = []
+        metrics.sends = defaultdict(int)
+        metrics.dropped = defaultdict(int)
+        metrics.send_latency = Histogram(LATENCY_BUCKETS)
+        metrics.rate_limits = 0
+        self.connection.send(message)
+
+
+def main():
+    # stdout carries the acks, so whatever gets printed goes to stderr instead
+    acks = Connection(os.dup(1), readable=False)
+    os.dup2(2, 1)
+    records = Connection(os.dup(0), writable=False)
+    hello = records.recv()
+    asyncio.run(DeliveryWorker(hello, records, acks).run())
+
+
+if __name__ == '__main__':
+    main()
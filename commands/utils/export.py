@@ -0,0 +1,164 @@
+import csv
+import datetime
+import gzip
+import io
+import os
+import sqlite3
+
+from nextcord.utils import time_snowflake
+
+# Rows read from the database per round trip; only this many are ever held in memory.
+EXPORT_CHUNK = 1000
+FORMATS = ('jsonl', 'csv')
+CSV_COLUMNS = ('time', 'event', 'channel_id', 'user_id', 'message_id', 'content', 'record')
+# gzip trailer plus the final deflate block written when a part is closed.
+CLOSE_BYTES = 32
+# Smallest part size that leaves room for a gzip header and some data.
+MIN_PART_BYTES = 4096
+
+
+def _deflate_bound(size):
+    """Most `size` bytes can grow to deflated, after the block a sync flush ends (cf. zlib's deflateBound)."""
+    return size + (size >> 12) + (size >> 14) + 64
+
+
+class _Parts:
+    """
+    gzip output split over numbered files, none bigger than `part_bytes`.
+
+    Data written since the last flush is counted at its worst case compressed size;
+    only when that could overflow the part is the stream sync-flushed and the file's real
+    size taken instead, so a part fills up to the limit without a flush per record.
+    Records are never split across parts, unless one can't fit in a part on its own:
+    then it fills parts until it's done, and the parts concatenated in order rebuild it.
+    """
+
+    def __init__(self, directory, name, suffix, part_bytes, header=None):
+        if part_bytes < MIN_PART_BYTES:
+            raise ValueError(f'parts must be at least {MIN_PART_BYTES} bytes')
+        self.directory = directory
+        self.name = name
+        self.suffix = suffix
+        self.part_bytes = part_bytes
+        self.header = header and header.encode()
+        self.paths = []
+        self.raw = self.gz = None
+        self.flushed = 0  # size of the part file as of its last sync flush
+        self.pending = 0  # bytes written to the part since then
+        self.records = 0  # records started in the part
+
+    def _open(self):
+        path = os.path.join(self.directory, f'{self.name}-{len(self.paths) + 1}.{self.suffix}.gz')
+        self.paths.append(path)
+        self.raw = open(path, 'wb')
+        self.gz = gzip.GzipFile(fileobj=self.raw, mode='wb')
+        self.flushed = self.raw.tell()
+        self.pending = self.records = 0
+        if self.header:
+            self._put(self.header)
+
+    def _put(self, data):
+        self.gz.write(data)
+        self.pending += len(data)
+
+    def _fits(self, size):
+        return self.flushed + _deflate_bound(self.pending + size) + CLOSE_BYTES <= self.part_bytes
+
+    def _measure(self):
+        self.gz.flush()
+        self.flushed = self.raw.tell()
+        self.pending = 0
+
+    def _room(self):
+        """The most bytes that still fit in the part, by the worst case."""
+        room = (self.part_bytes - CLOSE_BYTES - self.flushed - _deflate_bound(0)) * 16384 // 16389 - self.pending
+        while room > 0 and not self._fits(room):
+            room -= 1
+        return max(room, 0)
+
+    def write(self, record):
+        """Write one record (bytes), starting a new part when the current one can't take it."""
+        if self.raw is None:
+            self._open()
+        if not self._fits(len(record)):
+            self._measure()
+            if not self._fits(len(record)) and self.records:
+                self.close()
+                self._open()
+        self.records += 1
+        while not self._fits(len(record)):
+            # too big for a part of its own
+            self._measure()
+            room = self._room()
+            self._put(record[:room])
+            record = record[room:]
+            self.close()
+            self._open()
+            self.records += 1
+        self._put(record)
+
+    def close(self):
+        if self.raw is not None:
+            self.gz.close()
+            self.raw.close()
+            self.raw = self.gz = None
+
+
+def _csv_line(row):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+
+def export_events(db_path, directory, name, guild_id, fmt='jsonl', user_id=None, channel_id=None, since=None,
+                  part_bytes=25 * 1024 * 1024, chunk=EXPORT_CHUNK):
+    """
+    Write a guild's logged events, oldest first, into gzip-compressed JSONL or CSV files
+    under `directory`, starting a new file before one would pass `part_bytes`. Rows are
+    read `chunk` at a time, so memory use doesn't grow with the export.
+
+    `since` is an aware datetime; events logged before it are left out, however old the
+    message they're about. Returns (paths, number of events). Blocking, so run it in an
+    executor; it uses its own connection, which SQLite's WAL mode lets read alongside the
+    index writer.
+    """
+    where = ['guild_id = ?']
+    params = [guild_id]
+    if user_id is not None:
+        where.append('user_id = ?')
+        params.append(user_id)
+    if channel_id is not None:
+        where.append('channel_id = ?')
+        params.append(channel_id)
+    if since is not None:
+        # the index keys events by the time they were logged
+        where.append('snowflake >= ?')
+        params.append(time_snowflake(since))
+
+    header = _csv_line(CSV_COLUMNS) if fmt == 'csv' else None
+    parts = _Parts(directory, name, fmt, part_bytes, header)
+    count = 0
+    db = sqlite3.connect(db_path)
+    try:
+        cursor = db.execute(
+            'SELECT ts, event, channel_id, user_id, message_id, content, record FROM events'
+            f' WHERE {" AND ".join(where)} ORDER BY snowflake, id',
+            params,
+        )
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            if fmt == 'csv':
+                for ts, *columns in rows:
+                    when = datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).isoformat()
+                    parts.write(_csv_line((when, *columns)).encode())
+            else:
+                # the stored record already is the JSON line
+                for row in rows:
+                    parts.write((row[-1] + '\n').encode())
+            count += len(rows)
+    finally:
+        db.close()
+        parts.close()
+    return parts.paths, count
@@ -0,0 +1,95 @@
+import re
+
+
+class GuildRules:
+    """
+    A guild's filter settings compiled into the few checks they actually need.
+
+    `events` is the set of listeners the guild logs (None for all of them). Every other
+    rule that is set becomes one predicate in `checks`; rules left empty cost nothing.
+    `allows` is meant to run before a listener does any other work.
+    """
+
+    __slots__ = ('events', 'checks')
+
+    def __init__(self, events, checks):
+        self.events = events
+        self.checks = checks
+
+    def allows(self, event, channel=None, author=None, content=None):
+        """`channel` is a channel object, `author` a Member/User or a bare user id."""
+        if self.events is not None and event not in self.events:
+            return False
+        for check in self.checks:
+            if not check(channel, author, content):
+                return False
+        return True
+
+
+def _ids(values):
+    return frozenset(int(value) for value in values or ())
+
+
+def _content_pattern(patterns):
+    compiled = []
+    for pattern in patterns or ():
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            print(f'Logger: ignoring invalid content filter {pattern!r}: {e}')
+            continue
+        compiled.append(f'(?:{pattern})')
+    return re.compile('|'.join(compiled)) if compiled else None
+
+
+def compile_rules(settings, events=None):
+    """
+    GuildRules for one guild's settings. `events` restricts the result to the listeners
+    enabled bot-wide; a guild's own `events` list can only narrow that down.
+    """
+    guild_events = settings.get('events')
+    if guild_events is not None:
+        events = frozenset(guild_events) if events is None else frozenset(guild_events) & events
+
+    checks = []
+
+    channels = _ids(settings.get('ignored_channels'))
+    if channels:
+        def channel_check(channel, author, content):
+            # threads are ignored along with the channel they were started in
+            return channel is None or (channel.id not in channels and getattr(channel, 'parent_id', None) not in channels)
+        checks.append(channel_check)
+
+    categories = _ids(settings.get('ignored_categories'))
+    if categories:
+        def category_check(channel, author, content):
+            return getattr(channel, 'category_id', None) not in categories
+        checks.append(category_check)
+
+    if settings.get('ignore_bots'):
+        def bot_check(channel, author, content):
+            return not getattr(author, 'bot', False)
+        checks.append(bot_check)
+
+    users = _ids(settings.get('ignored_users'))
+    if users:
+        def user_check(channel, author, content):
+            return getattr(author, 'id', author) not in users
+        checks.append(user_check)
+
+    roles = _ids(settings.get('ignored_roles'))
+    if roles:
+        def role_check(channel, author, content):
+            # Member._roles holds the role ids, which spares building Role objects
+            return roles.isdisjoint(getattr(author, '_roles', ()))
+        checks.append(role_check)
+
+    pattern = _content_pattern(settings.get('content_filters'))
+    if pattern is not None:
+        search = pattern.search
+
+        def content_check(channel, author, content):
+            return not content or search(content) is None
+        checks.append(content_check)
+
+    return GuildRules(events, tuple(checks))
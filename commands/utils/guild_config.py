@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no shard clusters there, and one process needs no lock
+    fcntl = None
+
+CONFIG_PATH = 'config.json'
+# Bursts of changes within this many seconds are written out once.
+SAVE_DELAY = 2.0
+# How often the file is checked for changes saved by another process (see cluster.py).
+RELOAD_INTERVAL = 10.0
+
+# Settings every guild starts out with.
+DEFAULTS = {
+    'logger_channel': None,
+    'delivery': 'channel',
+    # bytes of recent message content kept to show deleted/edited messages nextcord no longer caches
+    'message_cache_bytes': 4 * 1024 * 1024,
+    # let raw reaction logs fetch a message we don't have stored (one request per message)
+    'fetch_reaction_messages': False,
+    # filter rules, see filters.compile_rules
+    'events': None,  # listeners to log, None for every one enabled bot-wide
+    'ignored_channels': (),
+    'ignored_categories': (),
+    'ignored_users': (),
+    'ignored_roles': (),
+    'ignore_bots': False,
+    'content_filters': (),  # regular expressions; matching messages aren't logged
+    # how long and how much of the local journal and search index to keep, see retention.py
+    'retention_days': 90,
+    'retention_bytes': None,
+}
+
+
+class GuildConfigStore:
+    """
+    Per-guild Logger settings, held in a dict keyed by guild id.
+
+    The whole file is read once at startup, after which resolving the logger
+    channel for an event is a single dict lookup. On disk it looks like:
+
+        {"guilds": {"<guild id>": {"logger_channel": <channel id>, ...}}}
+
+    Several bot processes can share the file: a save only writes the guilds this
+    process changed, merged into what's on disk under a lock, and `watch` picks up
+    the other processes' saves when the file's mtime moves.
+    """
+
+    def __init__(self, path=CONFIG_PATH, save_delay=SAVE_DELAY):
+        self.path = path
+        self.save_delay = save_delay
+        self.dirty = False
+        self._save_handle = None
+        self._writing = None
+        self.guilds = {}  # guild id -> settings dict
+        self.extra = {}  # top level keys other than "guilds", kept as they are
+        # channel id from the old single-channel format, assigned to its guild once it's cached
+        self.legacy_channel = None
+        self.changed = set()  # guild ids set since the last save
+        self.mtime = None  # st_mtime_ns of the file as last read
+        self._watch_task = None
+
+    def _read(self):
+        """(file contents, st_mtime_ns), or (None, None) if there's no file yet."""
+        try:
+            with open(self.path, 'r') as f:
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+                return json.load(f), mtime
+        except FileNotFoundError:
+            return None, None
+
+    def load(self):
+        config, self.mtime = self._read()
+        if config is not None:
+            self._apply(config)
+
+    def _apply(self, config):
+        guilds = config.pop('guilds', {})
+        self.legacy_channel = config.pop('logger_channel', None)
+        self.extra = config
+        self.guilds = {int(guild_id): {**DEFAULTS, **settings} for guild_id, settings in guilds.items()}
+
+    def _merge(self, config, mtime):
+        """Take in the file as another process left it, keeping the guilds changed here since."""
+        for guild_id, settings in config.get('guilds', {}).items():
+            if int(guild_id) not in self.changed:
+                self.guilds[int(guild_id)] = {**DEFAULTS, **settings}
+        self.extra = {key: value for key, value in config.items() if key not in ('guilds', 'logger_channel')}
+        self.mtime = mtime
+
+    def _changes(self):
+        changes = {str(guild_id): dict(self.guilds[guild_id]) for guild_id in self.changed}
+        self.changed = set()
+        return changes, self.legacy_channel is None
+
+    @contextlib.contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f'{self.path}.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, changes, legacy_done):
+        """
+        Merge `changes` into the file as it is now. `mtime` is left alone: the next check
+        of `watch` reloads the merged file, with whatever other processes saved meanwhile.
+        """
+        with self._locked():
+            config, _ = self._read()
+            if config is None:
+                config = dict(self.extra)
+                if not legacy_done:
+                    config['logger_channel'] = self.legacy_channel
+            config.setdefault('guilds', {}).update(changes)
+            if legacy_done:
+                config.pop('logger_channel', None)
+            # write next to the real file and swap it in, so a crash mid-write leaves the old one intact
+            tmp = f'{self.path}.tmp'
+            with open(tmp, 'w') as f:
+                f.write(json.dumps(config))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    def save(self):
+        """Write the config right now. Only meant for when the event loop isn't serving events."""
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self.dirty = False
+        self._write(*self._changes())
+
+    def flush(self):
+        """Write pending changes right now, if there are any."""
+        if self.dirty:
+            self.save()
+
+    def schedule_save(self):
+        """Mark the config as changed; it's written from an executor once the burst is over."""
+        self.dirty = True
+        if self._save_handle:
+            self._save_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._save_handle = loop.call_later(self.save_delay, lambda: loop.create_task(self._save_in_background()))
+
+    async def _save_in_background(self):
+        self._save_handle = None
+        while self._writing:
+            # one write at a time, a newer snapshot goes out right after; the task that
+            # started it reports a failure and marks its changes dirty again
+            try:
+                await asyncio.shield(self._writing)
+            except OSError:
+                pass
+        if not self.dirty:
+            return
+        self.dirty = False
+        changes, legacy_done = self._changes()
+        self._writing = asyncio.get_running_loop().run_in_executor(None, self._write, changes, legacy_done)
+        try:
+            await self._writing
+        except OSError as e:
+            print(f'Logger: failed to save {self.path}: {e}')
+            self.changed.update(int(guild_id) for guild_id in changes)
+            self.dirty = True
+        finally:
+            self._writing = None
+
+    def watch(self, on_change, interval=RELOAD_INTERVAL):
+        """Reload the file whenever another process saves it, calling `on_change()` after."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(on_change, interval))
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self, on_change, interval):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if self._writing:
+                continue
+            try:
+                mtime = (await loop.run_in_executor(None, os.stat, self.path)).st_mtime_ns
+                if mtime == self.mtime:
+                    continue
+                config, mtime = await loop.run_in_executor(None, self._read)
+            except FileNotFoundError:
+                # nobody has saved one yet
+                continue
+            except (OSError, ValueError) as e:
+                # unreadable, or caught between two writes; the next check tries again
+                print(f'Logger: failed to reload {self.path}: {e}')
+                continue
+            if config is not None and not self._writing:
+                self._merge(config, mtime)
+                on_change()
+
+    def get(self, guild_id):
+        """Settings for a guild, or None if it was never set up."""
+        return self.guilds.get(guild_id)
+
+    def logger_channel_id(self, guild_id):
+        settings = self.guilds.get(guild_id)
+        return settings['logger_channel'] if settings else None
+
+    def set(self, guild_id, **settings):
+        current = self.guilds.get(guild_id)
+        if current is None:
+            current = self.guilds[guild_id] = dict(DEFAULTS)
+        current.update(settings)
+        self.changed.add(guild_id)
+        return current
@@ -0,0 +1,136 @@
+import nextcord
+
+# What the bot needs whatever is logged: the guild/channel cache, and message content
+# for the prefix commands.
+BASE_INTENTS = ('guilds', 'guild_messages', 'message_content')
+
+# Logger listener -> the gateway intents its events arrive under. Listeners that map to
+# nothing get their events regardless (interactions) or never at all for a bot account
+# (group DMs), and only cost the listener itself.
+EVENT_INTENTS = {
+    'on_message': ('guild_messages', 'message_content'),
+    'on_bulk_message_delete': ('guild_messages',),
+    'on_message_delete': ('guild_messages', 'message_content'),
+    'on_message_edit': ('guild_messages', 'message_content'),
+    'on_raw_message_delete': ('guild_messages',),
+    'on_raw_message_edit': ('guild_messages', 'message_content'),
+    'on_member_join': ('members',),
+    # kicks are attributed through the audit log, which comes with the moderation intent
+    'on_member_remove': ('members', 'moderation'),
+    'on_raw_member_remove': ('members',),
+    'on_member_ban': ('moderation',),
+    'on_member_unban': ('moderation',),
+    'on_member_update': ('members',),
+    'on_user_update': ('members',),
+    'on_member_emojis_update': (),
+    'on_member_role_update': (),
+    'on_voice_state_update': ('voice_states',),
+    'on_presence_update': ('members', 'presences'),
+    'on_guild_channel_create': ('guilds',),
+    'on_guild_channel_delete': ('guilds', 'moderation'),
+    'on_guild_channel_update': ('guilds',),
+    'on_guild_channel_pins_update': ('guilds',),
+    'on_private_channel_update': (),
+    'on_private_channel_pins_update': ('dm_messages',),
+    'on_guild_join': ('guilds',),
+    'on_guild_remove': ('guilds',),
+    'on_guild_update': ('guilds',),
+    'on_guild_role_create': ('guilds',),
+    'on_guild_role_delete': ('guilds',),
+    'on_guild_role_update': ('guilds',),
+    'on_guild_emojis_update': ('emojis_and_stickers',),
+    'on_guild_stickers_update': ('emojis_and_stickers',),
+    'on_guild_audit_log_entry_create': ('moderation',),
+    'on_invite_create': ('invites',),
+    'on_invite_delete': ('invites',),
+    'on_typing': ('guild_typing',),
+    'on_raw_typing': ('guild_typing',),
+    'on_reaction_add': ('guild_reactions', 'guild_messages'),
+    'on_raw_reaction_add': ('guild_reactions',),
+    'on_reaction_remove': ('guild_reactions', 'guild_messages'),
+    'on_raw_reaction_remove': ('guild_reactions',),
+    'on_reaction_clear': ('guild_reactions', 'guild_messages'),
+    'on_raw_reaction_clear': ('guild_reactions',),
+    'on_reaction_clear_emoji': ('guild_reactions', 'guild_messages'),
+    'on_raw_reaction_clear_emoji': ('guild_reactions',),
+    'on_interaction': (),
+    'on_thread_create': ('guilds',),
+    'on_thread_join': ('guilds',),
+    'on_thread_remove': ('guilds',),
+    'on_thread_delete': ('guilds',),
+    'on_thread_member_join': ('guilds', 'members'),
+    'on_thread_member_remove': ('guilds', 'members'),
+    'on_thread_update': ('guilds',),
+    'on_integration_create': ('integrations',),
+    'on_integration_update': ('integrations',),
+    'on_raw_integration_delete': ('integrations',),
+    'on_webhooks_update': ('webhooks',),
+    'on_stage_instance_create': ('guilds',),
+    'on_stage_instance_delete': ('guilds',),
+    'on_stage_instance_update': ('guilds',),
+    'on_group_join': (),
+    'on_group_remove': (),
+    'on_guild_scheduled_event_create': ('scheduled_events',),
+    'on_guild_scheduled_event_update': ('scheduled_events',),
+    'on_guild_scheduled_event_delete': ('scheduled_events',),
+    'on_guild_scheduled_event_user_add': ('scheduled_events',),
+    'on_guild_scheduled_event_user_remove': ('scheduled_events',),
+    'on_auto_moderation_rule_create': ('auto_moderation_configuration',),
+    'on_auto_moderation_rule_update': ('auto_moderation_configuration',),
+    'on_auto_moderation_rule_delete': ('auto_moderation_configuration',),
+}
+
+# Events whose logs show a message's stored content; guilds logging any of them get
+# their messages kept in the Logger's message store.
+MESSAGE_STORE_EVENTS = frozenset((
+    'on_message_delete', 'on_message_edit', 'on_raw_message_delete', 'on_raw_message_edit', 'on_raw_reaction_add',
+))
+
+# Logger listeners that do more than log their own event -> the events that work is for,
+# or None when it has to happen whatever is logged (the Members role, welcome and leave
+# messages, the roster). They stay registered while their work is needed; only their
+# log depends on what the guild logs.
+SIDE_EFFECTS = {
+    'on_message': MESSAGE_STORE_EVENTS,
+    'on_message_delete': MESSAGE_STORE_EVENTS,
+    'on_message_edit': MESSAGE_STORE_EVENTS,
+    'on_raw_message_delete': MESSAGE_STORE_EVENTS,
+    'on_raw_message_edit': MESSAGE_STORE_EVENTS,
+    'on_member_join': None,
+    'on_member_remove': None,
+    'on_member_update': None,
+    'on_raw_member_remove': None,
+    # forgets the channel's webhook snapshots
+    'on_guild_channel_delete': frozenset(('on_webhooks_update', 'on_guild_audit_log_entry_create')),
+}
+# What the listeners mapped to None above need, whatever is logged.
+SIDE_EFFECT_INTENTS = ('members',)
+
+
+def needs_listener(name, events):
+    """Whether the Logger listener `name` has to be registered when `events` are logged."""
+    if name not in EVENT_INTENTS or name in events:
+        return True
+    if name not in SIDE_EFFECTS:
+        return False
+    feeds = SIDE_EFFECTS[name]
+    return feeds is None or not feeds.isdisjoint(events)
+
+
+def enabled_events(config):
+    """Logger listeners switched on by the top level `events` list in config.json (all by default)."""
+    events = config.extra.get('events')
+    if events is None:
+        return set(EVENT_INTENTS)
+    unknown = set(events) - set(EVENT_INTENTS)
+    if unknown:
+        print(f'Logger: ignoring unknown events in config: {", ".join(sorted(unknown))}')
+    return set(events) & set(EVENT_INTENTS)
+
+
+def intents_for(events):
+    """The smallest Intents that still deliver every one of these listeners' events."""
+    flags = set(BASE_INTENTS + SIDE_EFFECT_INTENTS)
+    for event in events:
+        flags.update(EVENT_INTENTS[event])
+    return nextcord.Intents(**dict.fromkeys(flags, True))
@@ -0,0 +1,279 @@
+import gzip
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import nextcord
+
+JOURNAL_DIR = 'journal'
+# A guild's current segment is closed and a new one started past this size.
+SEGMENT_BYTES = 16 * 1024 * 1024
+# Written records are fsynced at most this many seconds after they were appended.
+FSYNC_INTERVAL = 1.0
+# Segment files kept open at once; the least recently written one is closed past this.
+MAX_OPEN_SEGMENTS = 64
+SEGMENT_SUFFIX = '.seg'
+# Cold segments get compressed in place (see retention.py) and keep their index.
+COMPRESSED_SUFFIX = '.seg.gz'
+
+_LENGTH = struct.Struct('>I')
+_STOP = object()
+
+
+def segment_name(index):
+    return f'{index:08d}{SEGMENT_SUFFIX}'
+
+
+def segment_index(name):
+    """Index of a segment file name, or None for anything else in the directory."""
+    if not name.endswith((SEGMENT_SUFFIX, COMPRESSED_SUFFIX)):
+        return None
+    stem = name.split('.', 1)[0]
+    return int(stem) if stem.isdigit() else None
+
+
+def read_segment(path):
+    """Yield the records of one segment in order. A torn record at the end (a crash mid-write) is skipped."""
+    with (gzip.open if path.endswith('.gz') else open)(path, 'rb') as f:
+        yield from read_records(f)
+
+
+def read_records(f):
+    while True:
+        header = f.read(_LENGTH.size)
+        if len(header) < _LENGTH.size:
+            return
+        (length,) = _LENGTH.unpack(header)
+        data = f.read(length)
+        if len(data) < length:
+            return
+        yield json.loads(data)
+
+
+def _object_id(obj):
+    object_id = getattr(obj, 'id', None)
+    return object_id if isinstance(object_id, int) else None
+
+
+def event_record(event, guild_id, ctx, embed):
+    """
+    The journal record for one logged event: when and where it happened, who and which
+    message it was about (as far as the listener's context tells) and the embed it was
+    logged as. Only plain values, so the writer thread never touches nextcord objects.
+    """
+    channel = message_id = user = content = None
+    payload = ctx.get('payload')
+    if payload is not None:
+        channel = getattr(payload, 'channel_id', None)
+        message_id = getattr(payload, 'message_id', None)
+        user = getattr(payload, 'user_id', None)
+
+    reaction = ctx.get('reaction')
+    message = next((ctx[key] for key in ('after', 'message') if isinstance(ctx.get(key), nextcord.Message)), None)
+    if message is None and reaction is not None:
+        message = reaction.message
+    if message is not None:
+        channel, message_id, user = message.channel.id, message.id, message.author.id
+        if reaction is None:
+            content = message.content
+
+    stored = ctx.get('stored')
+    if stored is not None and user is None:
+        # a raw delete/edit of a message we had stored
+        user, content = stored.author_id, stored.content
+    if isinstance(ctx.get('after'), str):
+        content = ctx['after']
+
+    # whoever the event is about, e.g. the reacting user rather than the message author
+    for key in ('user', 'member'):
+        if _object_id(ctx.get(key)) is not None:
+            user = ctx[key].id
+            break
+    if _object_id(ctx.get('channel')) is not None:
+        channel = ctx['channel'].id
+
+    record = {
+        'ts': time.time(), 'event': event, 'guild': guild_id,
+        'channel': channel, 'message': message_id, 'user': user, 'content': content, 'embed': embed,
+    }
+    return {key: value for key, value in record.items() if value is not None}
+
+
+class _Segment:
+    __slots__ = ('index', 'file', 'size')
+
+    def __init__(self, index, file, size):
+        self.index = index
+        self.file = file
+        self.size = size
+
+
+class Journal:
+    """
+    Append-only local copy of every logged event, one directory of segments per guild.
+
+    Records are length-prefixed JSON: a 4 byte big-endian length, then the compact JSON
+    document. `append` only puts the record on a queue; a background thread encodes and
+    writes it, rotates segments past `segment_bytes` and fsyncs whatever it wrote at most
+    `fsync_interval` seconds later, so a whole burst shares one fsync. Segments are never
+    written again once rotated, and a restart always starts new ones.
+    """
+
+    def __init__(self, directory=JOURNAL_DIR, segment_bytes=SEGMENT_BYTES, fsync_interval=FSYNC_INTERVAL,
+                 max_open=MAX_OPEN_SEGMENTS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.max_open = max_open
+        self.segments = OrderedDict()  # guild id -> open _Segment, least recently written first
+        self._closed = {}  # guild id -> (index, size) of a segment closed only to make room
+        # guild id -> index of the first segment the writer may still append to; set by the
+        # writer thread only, other threads read it through sealed_below
+        self._sealed = {}
+        self._sealed_lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._unsynced = set()  # guild ids written to since the last fsync
+        self._thread = threading.Thread(target=self._run, name='journal', daemon=True)
+        self._thread.start()
+
+    def append(self, record):
+        """Queue a record (a dict of plain values with a 'guild' key) for writing."""
+        self._queue.put(record)
+
+    def close(self):
+        """Write and fsync everything queued, then stop the writer; for shutdown."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def guild_dir(self, guild_id):
+        return os.path.join(self.directory, str(guild_id))
+
+    def segment_paths(self, guild_id):
+        """A guild's segment files, oldest first."""
+        directory = self.guild_dir(guild_id)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        indexed = sorted((segment_index(name), name) for name in names if segment_index(name) is not None)
+        return [os.path.join(directory, name) for _, name in indexed]
+
+    def sealed_below(self, guild_id):
+        """Index below which every segment of a guild is sealed for good; safe from any thread.
+
+        None while nothing was written for the guild since startup, when every segment
+        already on disk is sealed. The writer raises it before it creates a segment, so
+        read it after listing the segments, not before.
+        """
+        with self._sealed_lock:
+            return self._sealed.get(guild_id)
+
+    def _seal_below(self, guild_id, index):
+        with self._sealed_lock:
+            self._sealed[guild_id] = index
+
+    def _run(self):
+        last_sync = time.monotonic()
+        stop = False
+        while not stop:
+            try:
+                # idle until something comes in, unless there's a write left to fsync
+                item = self._queue.get(timeout=self.fsync_interval if self._unsynced else None)
+            except queue.Empty:
+                item = None
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                else:
+                    try:
+                        self._write(item)
+                    except Exception as e:
+                        # whatever went wrong with this record, the writer has to keep going
+                        # or everything appended after it piles up in the queue
+                        print(f'Logger: failed to journal a {item.get("event")} event: {e!r}')
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            now = time.monotonic()
+            if self._unsynced and (stop or now - last_sync >= self.fsync_interval):
+                self._sync()
+                last_sync = now
+
+        for guild_id in list(self.segments):
+            self._release(guild_id)
+
+    def _write(self, record):
+        guild_id = record['guild']
+        try:
+            data = json.dumps(record, separators=(',', ':'), default=str).encode()
+            segment = self._segment(guild_id)
+            segment.file.write(_LENGTH.pack(len(data)))
+            segment.file.write(data)
+        except OSError as e:
+            print(f'Logger: failed to journal a {record.get("event")} event: {e}')
+            return
+        segment.size += _LENGTH.size + len(data)
+        self._unsynced.add(guild_id)
+        if segment.size >= self.segment_bytes:
+            self._rotate(guild_id)
+
+    def _segment(self, guild_id):
+        segment = self.segments.get(guild_id)
+        if segment is not None:
+            self.segments.move_to_end(guild_id)
+            return segment
+        directory = self.guild_dir(guild_id)
+        if guild_id in self._closed:
+            index, size = self._closed.pop(guild_id)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            indexes = [segment_index(name) for name in os.listdir(directory)]
+            index, size = max([i for i in indexes if i is not None], default=0) + 1, 0
+            self._seal_below(guild_id, index)
+        file = open(os.path.join(directory, segment_name(index)), 'ab')
+        segment = self.segments[guild_id] = _Segment(index, file, size)
+        if len(self.segments) > self.max_open:
+            oldest = next(iter(self.segments))
+            self._closed[oldest] = self._release(oldest)
+        return segment
+
+    def _release(self, guild_id):
+        """Sync and close a guild's segment. A failure is reported, the file is closed either way."""
+        segment = self.segments.pop(guild_id)
+        try:
+            if guild_id in self._unsynced:
+                segment.file.flush()
+                os.fsync(segment.file.fileno())
+        except OSError as e:
+            print(f'Logger: failed to sync the journal of guild {guild_id}: {e}')
+        finally:
+            self._unsynced.discard(guild_id)
+            try:
+                # closes the file even when flushing what's left in its buffer fails
+                segment.file.close()
+            except OSError as e:
+                print(f'Logger: failed to close the journal of guild {guild_id}: {e}')
+        return segment.index, segment.size
+
+    def _rotate(self, guild_id):
+        index, size = self._release(guild_id)
+        self._closed.pop(guild_id, None)
+        self._seal_below(guild_id, index + 1)
+
+    def _sync(self):
+        for guild_id in self._unsynced:
+            segment = self.segments.get(guild_id)
+            if segment is None:
+                continue
+            try:
+                segment.file.flush()
+                os.fsync(segment.file.fileno())
+            except OSError as e:
+                print(f'Logger: failed to sync the journal of guild {guild_id}: {e}')
+        self._unsynced.clear()
@@ -0,0 +1,522 @@
+import operator
+
+import nextcord
+
+from commands.utils.message_store import jump_url
+from commands.utils.templates import EmbedTemplate, Field
+
+# Every embed the Logger posts, keyed by the listener (or listener.variant) that posts it.
+# Compiled once when the cog loads; see templates.CompiledTemplate.
+
+Color = nextcord.Color
+
+
+def timestamp(source, style='f'):
+    """Discord timestamp markup for a datetime; rendered in each reader's own timezone."""
+    get = operator.attrgetter(source.partition('.')[2])
+    key = source.partition('.')[0]
+
+    def render(ctx):
+        value = get(ctx[key])
+        return f'<t:{int(value.timestamp())}:{style}>' if value else None
+
+    return render
+
+
+def strftime(source, fmt):
+    """strftime for the places Discord doesn't render timestamp markup in (footers)."""
+    get = operator.attrgetter(source.partition('.')[2])
+    key = source.partition('.')[0]
+
+    def render(ctx):
+        value = get(ctx[key])
+        return value.strftime(fmt) if value else None
+
+    return render
+
+
+def joined(source, attr='mention', sep=', '):
+    """Join an attribute of every item of an iterable, e.g. the mentions of a role list."""
+    get = operator.attrgetter(source.partition('.')[2]) if '.' in source else None
+    key = source.partition('.')[0]
+    item = operator.attrgetter(attr) if attr else str
+
+    def render(ctx):
+        values = get(ctx[key]) if get else ctx[key]
+        return sep.join([item(v) for v in values])
+
+    return render
+
+
+def channel_ref(key='payload'):
+    return lambda ctx: f'<#{ctx[key].channel_id}>'
+
+
+def message_link(key='payload'):
+    def render(ctx):
+        payload = ctx[key]
+        return jump_url(payload.guild_id, payload.channel_id, payload.message_id)
+
+    return render
+
+
+def _deleted_description(ctx):
+    content = ctx['message'].content
+    if len(content) > 1024:
+        return content[:1024] + '... (truncated)'
+    return content
+
+
+def _bulk_description(ctx):
+    return '\n'.join([
+        f"[{msg.created_at.strftime('%H:%M:%S')}]({msg.jump_url}) {msg.author.mention}: {msg.content}"
+        for msg in ctx['messages'][:5]
+    ])
+
+
+def _edit_footer(ctx):
+    edited_at = ctx['before'].edited_at
+    if edited_at:
+        return f"Edited at {edited_at.strftime('%m/%d/%Y %I:%M:%S %p')}"
+    return 'Message reposted, not edited.'
+
+
+def _attachments(ctx):
+    attachments = ctx['message'].attachments
+    return '\n'.join([a.filename for a in attachments]) if attachments else None
+
+
+def _invite_max_age(ctx):
+    max_age = ctx['invite'].max_age
+    return f'{max_age} seconds' if max_age else None
+
+
+def _activity(key):
+    def render(ctx):
+        activity = ctx[key].activity
+        return activity.name if activity is not None else 'No activity'
+
+    return render
+
+
+def _voice_channel(ctx):
+    channel = ctx['after'].channel
+    return channel.name if channel else 'Not in a voice channel'
+
+
+def _by(key):
+    def render(ctx):
+        user = ctx.get(key)
+        return f'{user} (ID: {user.id})' if user else None
+
+    return render
+
+
+MEMBER = Field('Member', lambda ctx: f"{ctx['member'].mention} (ID: {ctx['member'].id})")
+REACTION_FIELDS = (
+    Field('User', 'user.mention'),
+    Field('Channel', 'reaction.message.channel.mention'),
+    Field('Message', 'reaction.message.jump_url'),
+    Field('Emoji', 'reaction.emoji'),
+)
+
+
+TEMPLATES = {
+    # * messages
+    'on_message': EmbedTemplate(
+        'Message Log', Color.blue(),
+        author_name=lambda ctx: str(ctx['message'].author),
+        author_icon='message.author.display_avatar.url',
+        fields=(
+            Field('Author', 'message.author.mention'),
+            Field('Channel', 'message.channel.mention'),
+            Field('Time', timestamp('message.created_at')),
+            Field('Content', 'message.content', inline=False),
+            Field('Attachments', _attachments, optional=True),
+        ),
+    ),
+    'on_bulk_message_delete': EmbedTemplate(
+        'Bulk Message Delete', Color.red(),
+        author_name=lambda ctx: f"{len(ctx['messages'])} Messages Deleted",
+        description=_bulk_description,
+        fields=(
+            Field('Channel', 'channel.mention'),
+            Field('Total Messages', lambda ctx: len(ctx['messages'])),
+        ),
+    ),
+    'on_message_delete': EmbedTemplate(
+        color=Color.red(),
+        author_name=lambda ctx: str(ctx['message'].author),
+        author_icon='message.author.display_avatar.url',
+        description=_deleted_description,
+        footer=lambda ctx: f"Deleted at {ctx['message'].created_at.strftime('%m/%d/%Y %I:%M:%S %p')}",
+        fields=(
+            Field('Author', 'message.author.mention'),
+            Field('Channel', 'message.channel.mention'),
+        ),
+    ),
+    'on_message_edit': EmbedTemplate(
+        'Message Edited', Color.orange(),
+        author_name=lambda ctx: str(ctx['before'].author),
+        author_icon='before.author.display_avatar.url',
+        footer=_edit_footer,
+        fields=(
+            Field('Author', 'before.author.mention'),
+            Field('Channel', 'before.channel.mention'),
+            Field('Before', 'before.content', inline=False),
+            Field('After', 'after.content', inline=False),
+        ),
+    ),
+    'on_raw_message_delete': EmbedTemplate(
+        'Raw Message Delete', Color.red(),
+        description=lambda ctx: ctx['stored'] and ctx['stored'].content[:1024],
+        fields=(
+            Field('Channel', channel_ref()),
+            Field('Message ID', 'payload.message_id'),
+            Field('Author', lambda ctx: ctx['stored'] and f"<@{ctx['stored'].author_id}>", optional=True),
+            Field('Attachments', lambda ctx: ctx['stored'] and '\n'.join(ctx['stored'].attachments) or None, optional=True),
+        ),
+    ),
+    'on_raw_message_edit': EmbedTemplate(
+        'Raw Message Edit', Color.blue(),
+        fields=(
+            Field('Channel', channel_ref()),
+            Field('Message ID', 'payload.message_id'),
+            Field('Author', lambda ctx: ctx['stored'] and f"<@{ctx['stored'].author_id}>", optional=True),
+            Field('Before', 'before', inline=False, optional=True),
+            Field('After', 'after', inline=False, optional=True),
+        ),
+    ),
+
+    # * members
+    'on_member_join': EmbedTemplate(
+        'Member Joined', Color.green(),
+        thumbnail='member.display_avatar.url',
+        footer=lambda ctx: f"Member #{ctx['total']}",
+        fields=(
+            MEMBER,
+            Field('Created At', timestamp('member.created_at', 'D')),
+        ),
+    ),
+    'on_member_remove': EmbedTemplate(
+        lambda ctx: 'Member Kicked' if ctx['kicked_by'] else 'Member Left', Color.dark_red(),
+        thumbnail='member.display_avatar.url',
+        footer=lambda ctx: f"Remaining: {ctx['total']}",
+        fields=(
+            MEMBER,
+            Field('Joined At', timestamp('member.joined_at', 'D')),
+            Field('Kicked By', _by('kicked_by'), optional=True),
+        ),
+    ),
+    'on_raw_member_remove': EmbedTemplate(
+        'Member Left', Color.red(),
+        fields=(
+            Field('Member', lambda ctx: f"{ctx['user']} (ID: {ctx['user'].id})"),
+            Field('Guild', 'guild.name'),
+            Field('Joined At', lambda ctx: ctx['entry'] and ctx['entry'].joined_at and f"<t:{int(ctx['entry'].joined_at.timestamp())}:D>", optional=True),
+            Field('Roles', lambda ctx: ctx['entry'] and ', '.join([f'<@&{r}>' for r in ctx['entry'].role_ids]) or None, inline=False, optional=True),
+        ),
+    ),
+    'on_member_ban': EmbedTemplate(
+        'Member Banned', Color.dark_red(),
+        thumbnail='user.display_avatar.url',
+        fields=(
+            Field('Member', lambda ctx: f"{ctx['user']} (ID: {ctx['user'].id})"),
+            Field('Banned By', _by('moderator'), optional=True),
+            Field('Reason', 'reason', optional=True),
+        ),
+    ),
+    'on_member_unban': EmbedTemplate('Member Unbanned', Color.green(), fields=(Field('Member', 'user.mention'),)),
+    'on_member_update.roles': EmbedTemplate(
+        'Roles Updated', Color.blue(),
+        fields=(
+            Field('Member', 'after.mention'),
+            Field('Before', joined('before.roles')),
+            Field('After', joined('after.roles')),
+        ),
+    ),
+    'on_member_update.nick': EmbedTemplate(
+        'Nickname Updated', Color.green(),
+        fields=(Field('Member', 'after.mention'), Field('Before', 'before.nick'), Field('After', 'after.nick')),
+    ),
+    'on_user_update': EmbedTemplate(
+        'Username Updated', Color.blue(),
+        fields=(Field('User', 'after.mention'), Field('Before', 'before.name'), Field('After', 'after.name')),
+    ),
+    'on_member_emojis_update.added': EmbedTemplate(
+        'Emoji Added', Color.green(), fields=(Field('Member', 'member.mention'), Field('Emoji', 'emoji')),
+    ),
+    'on_member_emojis_update.removed': EmbedTemplate(
+        'Emoji Removed', Color.red(), fields=(Field('Member', 'member.mention'), Field('Emoji', 'emoji')),
+    ),
+    'on_member_role_update.added': EmbedTemplate(
+        'Role Added', 'role.color', fields=(Field('Member', 'member.mention'), Field('Role', 'role.mention')),
+    ),
+    'on_member_role_update.removed': EmbedTemplate(
+        'Role Removed', 'role.color', fields=(Field('Member', 'member.mention'), Field('Role', 'role.mention')),
+    ),
+    'on_voice_state_update': EmbedTemplate(
+        'Voice State Update', Color.teal(),
+        fields=(Field('Member', 'member.mention'), Field('Current Channel', _voice_channel)),
+    ),
+    'on_presence_update': EmbedTemplate(
+        'Activity Updated', Color.green(),
+        fields=(Field('Member', 'after.display_name'), Field('Before', _activity('before')), Field('After', _activity('after'))),
+    ),
+
+    # * channels
+    'on_guild_channel_create': EmbedTemplate('Channel Created', Color.green(), fields=(Field('Channel', 'channel.mention'),)),
+    'on_guild_channel_delete': EmbedTemplate(
+        'Channel Deleted', Color.red(),
+        fields=(Field('Channel', 'channel.name'), Field('Deleted By', _by('deleted_by'), optional=True)),
+    ),
+    'on_guild_channel_update': EmbedTemplate(
+        'Guild Channel Updated', Color.blue(), fields=(Field('Before', 'before.mention'), Field('After', 'after.mention')),
+    ),
+    'on_guild_channel_pins_update': EmbedTemplate(
+        'Guild Channel Pins Updated', Color.blue(), fields=(Field('Channel', 'channel.mention'), Field('Last Pin', 'last_pin')),
+    ),
+    'on_private_channel_update': EmbedTemplate(
+        'Private Channel Updated', Color.blue(), fields=(Field('Before', 'before'), Field('After', 'after')),
+    ),
+    'on_private_channel_pins_update': EmbedTemplate(
+        'Private Channel Pins Updated', Color.blue(), fields=(Field('Channel', 'channel'), Field('Last Pin', 'last_pin')),
+    ),
+    'on_webhooks_update': EmbedTemplate(
+        'Webhooks Updated', Color.purple(),
+        fields=(
+            Field('Channel', 'channel.mention'),
+            Field('Webhooks', 'count'),
+            Field('Current', 'current', inline=False, optional=True),
+            Field('Added', 'added', inline=False, optional=True),
+            Field('Removed', 'removed', inline=False, optional=True),
+            Field('Renamed', 'renamed', inline=False, optional=True),
+        ),
+    ),
+
+    # * guild
+    'on_guild_join': EmbedTemplate('Joined Guild', Color.green(), fields=(Field('Guild', 'guild.name'),)),
+    'on_guild_remove': EmbedTemplate('Left Guild', Color.dark_red(), fields=(Field('Guild', 'guild.name'),)),
+    'on_guild_update': EmbedTemplate(
+        'Guild Name Updated', Color.blue(), fields=(Field('Before', 'before.name'), Field('After', 'after.name')),
+    ),
+    'on_guild_update.region': EmbedTemplate(
+        'Guild Region Updated', Color.green(), fields=(Field('Before', 'before.region'), Field('After', 'after.region')),
+    ),
+    'on_guild_role_create': EmbedTemplate(
+        'Role Created', Color.green(), fields=(Field('Role', 'role.mention'), Field('Role ID', 'role.id')),
+    ),
+    'on_guild_role_delete': EmbedTemplate(
+        'Role Deleted', Color.red(), fields=(Field('Role', 'role.name'), Field('Role ID', 'role.id')),
+    ),
+    'on_guild_role_update.name': EmbedTemplate(
+        'Role Name Updated', Color.blue(), fields=(Field('Before', 'before.name'), Field('After', 'after.name')),
+    ),
+    'on_guild_role_update.color': EmbedTemplate(
+        'Role Color Updated', 'after.color', fields=(Field('Before', 'before.color'), Field('After', 'after.color')),
+    ),
+    'on_guild_emojis_update.added': EmbedTemplate('Emojis Added', Color.green(), fields=(Field('Emojis', joined('emojis', None)),)),
+    'on_guild_emojis_update.removed': EmbedTemplate('Emojis Removed', Color.red(), fields=(Field('Emojis', joined('emojis', None)),)),
+    'on_guild_stickers_update.added': EmbedTemplate(
+        'Stickers Added', Color.green(), fields=(Field('Stickers', joined('stickers', None, '\n')),),
+    ),
+    'on_guild_stickers_update.removed': EmbedTemplate(
+        'Stickers Removed', Color.red(), fields=(Field('Stickers', joined('stickers', None, '\n')),),
+    ),
+    'on_guild_audit_log_entry_create': EmbedTemplate(
+        'Audit Log Updated', Color.dark_gold(),
+        fields=(Field('User', 'entry.user.display_name'), Field('Action', 'entry.action.name'), Field('Target', 'target')),
+    ),
+
+    # * invites
+    'on_invite_create': EmbedTemplate(
+        'Invite Created', Color.green(),
+        fields=(
+            Field('Code', 'invite.code'),
+            Field('Channel', 'invite.channel.mention'),
+            Field('Inviter', 'invite.inviter.mention'),
+            Field('Max Age', _invite_max_age, optional=True),
+            Field('Max Uses', lambda ctx: ctx['invite'].max_uses or None, optional=True),
+            Field('Temporary', lambda ctx: 'Yes' if ctx['invite'].temporary else None, optional=True),
+        ),
+    ),
+    'on_invite_delete': EmbedTemplate(
+        'Invite Deleted', Color.red(),
+        fields=(
+            Field('Code', 'invite.code'),
+            Field('Guild', 'invite.guild.name'),
+            Field('Channel', 'invite.channel.mention'),
+            Field('Author', 'invite.inviter.mention'),
+        ),
+    ),
+
+    # * typing
+    'on_typing': EmbedTemplate(
+        'User Typing', Color.blue(),
+        fields=(Field('Channel', 'channel.mention'), Field('User', 'user.mention'), Field('When', 'when')),
+    ),
+    'on_raw_typing': EmbedTemplate(
+        'Raw User Typing', Color.blue(),
+        fields=(Field('Channel', channel_ref()), Field('User ID', 'payload.user_id'), Field('When', 'payload.when')),
+    ),
+
+    # * reactions
+    'on_reaction_add': EmbedTemplate('Reaction Added', Color.green(), fields=REACTION_FIELDS),
+    'on_reaction_remove': EmbedTemplate('Reaction Removed', Color.red(), fields=REACTION_FIELDS),
+    'on_raw_reaction_add': EmbedTemplate(
+        'Raw Reaction Added', Color.green(),
+        fields=(
+            Field('User', lambda ctx: f"<@{ctx['payload'].user_id}>"),
+            Field('Channel', channel_ref()),
+            Field('Message', message_link()),
+            Field('Emoji', 'payload.emoji'),
+            Field('Message Author', lambda ctx: ctx['stored'] and f"<@{ctx['stored'].author_id}>", optional=True),
+        ),
+    ),
+    'on_raw_reaction_remove': EmbedTemplate(
+        'Raw Reaction Removed', Color.red(),
+        fields=(
+            Field('User', lambda ctx: f"<@{ctx['payload'].user_id}>"),
+            Field('Channel', channel_ref()),
+            Field('Message', message_link()),
+            Field('Emoji', 'payload.emoji'),
+        ),
+    ),
+    'on_reaction_clear': EmbedTemplate(
+        'Reactions Cleared', Color.red(),
+        fields=(
+            Field('Channel', 'message.channel.mention'),
+            Field('Message', 'message.jump_url'),
+            Field('Reaction Count', lambda ctx: len(ctx['reactions'])),
+        ),
+    ),
+    'on_raw_reaction_clear': EmbedTemplate(
+        'Raw Reactions Cleared', Color.red(), fields=(Field('Channel', channel_ref()), Field('Message', message_link())),
+    ),
+    'on_reaction_clear_emoji': EmbedTemplate(
+        'Reaction Emoji Cleared', Color.red(),
+        fields=(
+            Field('Emoji', 'reaction.emoji'),
+            Field('Channel', 'reaction.message.channel.mention'),
+            Field('Message', 'reaction.message.jump_url'),
+        ),
+    ),
+    'on_raw_reaction_clear_emoji': EmbedTemplate(
+        'Raw Reaction Emoji Cleared', Color.red(),
+        fields=(Field('Channel', channel_ref()), Field('Message', message_link()), Field('Emoji', 'payload.emoji')),
+    ),
+
+    # * interactions
+    'on_interaction': EmbedTemplate(
+        'Interaction', Color.purple(),
+        fields=(
+            Field('Type', 'interaction.type'),
+            Field('Name', lambda ctx: (ctx['interaction'].data or {}).get('name')),
+            Field('User', 'interaction.user'),
+            Field('ID', 'interaction.id'),
+        ),
+    ),
+
+    # * threads
+    'on_thread_create': EmbedTemplate('Thread Created', Color.green(), fields=(Field('Thread', 'thread.mention'),)),
+    'on_thread_join': EmbedTemplate('Thread Joined', Color.green(), fields=(Field('Thread', 'thread.mention'),)),
+    'on_thread_remove': EmbedTemplate('Thread Removed', Color.red(), fields=(Field('Thread', 'thread.mention'),)),
+    'on_thread_delete': EmbedTemplate('Thread Deleted', Color.red(), fields=(Field('Thread', 'thread.mention'),)),
+    'on_thread_member_join': EmbedTemplate(
+        'User Joined Thread', Color.green(), fields=(Field('Thread', 'member.thread.mention'), Field('User', 'member.user.mention')),
+    ),
+    'on_thread_member_remove': EmbedTemplate(
+        'User Left Thread', Color.red(), fields=(Field('Thread', 'member.thread.mention'), Field('User', 'member.user.mention')),
+    ),
+    'on_thread_update': EmbedTemplate(
+        'Thread Updated', Color.blue(), fields=(Field('Before', 'before.mention'), Field('After', 'after.mention')),
+    ),
+
+    # * integrations
+    'on_integration_create': EmbedTemplate(
+        'Integration Created', Color.green(), fields=(Field('Integration', 'integration.name'), Field('ID', 'integration.id')),
+    ),
+    'on_integration_update': EmbedTemplate('Integration Updated', Color.blue(), fields=(Field('Integration', 'integration.name'),)),
+    'on_raw_integration_delete': EmbedTemplate(
+        'Integration Deleted', Color.red(), fields=(Field('Integration ID', 'payload.integration_id'),),
+    ),
+
+    # * stage instances
+    'on_stage_instance_create': EmbedTemplate(
+        'Stage Channel Created', Color.green(),
+        fields=(
+            Field('Channel', 'stage_instance.channel.mention'),
+            Field('Topic', 'stage_instance.topic'),
+            Field('Privacy Level', 'stage_instance.privacy_level'),
+            Field('Speakers', joined('stage_instance.speakers')),
+        ),
+    ),
+    'on_stage_instance_delete': EmbedTemplate(
+        'Stage Channel Deleted', Color.red(),
+        fields=(
+            Field('Channel', 'stage_instance.channel.mention'),
+            Field('Topic', 'stage_instance.topic'),
+            Field('Privacy Level', 'stage_instance.privacy_level'),
+            Field('Speakers', joined('stage_instance.speakers')),
+        ),
+    ),
+    'on_stage_instance_update.topic': EmbedTemplate(
+        'Stage Channel Topic Updated', Color.blue(), fields=(Field('Before', 'before.topic'), Field('After', 'after.topic')),
+    ),
+    'on_stage_instance_update.privacy': EmbedTemplate(
+        'Stage Channel Privacy Updated', Color.purple(),
+        fields=(Field('Before', 'before.privacy_level'), Field('After', 'after.privacy_level')),
+    ),
+
+    # * groups
+    'on_group_join': EmbedTemplate(
+        'User Joined Group', Color.green(), fields=(Field('Channel', 'channel.mention'), Field('User', 'user.mention')),
+    ),
+    'on_group_remove': EmbedTemplate(
+        'User Left Group', Color.red(), fields=(Field('Channel', 'channel.mention'), Field('User', 'user.mention')),
+    ),
+
+    # * scheduled events
+    'on_guild_scheduled_event_create': EmbedTemplate(
+        'Event Created', Color.green(),
+        fields=(
+            Field('Name', 'event.name'),
+            Field('Description', 'event.description'),
+            Field('Start Time', timestamp('event.scheduled_start_time')),
+            Field('End Time', timestamp('event.scheduled_end_time')),
+            Field('Status', 'event.status'),
+        ),
+    ),
+    'on_guild_scheduled_event_update.name': EmbedTemplate(
+        'Event Name Updated', Color.blue(), fields=(Field('Before', 'before.name'), Field('After', 'after.name')),
+    ),
+    'on_guild_scheduled_event_update.start': EmbedTemplate(
+        'Event Start Time Updated', Color.blue(),
+        fields=(Field('Before', timestamp('before.scheduled_start_time')), Field('After', timestamp('after.scheduled_start_time'))),
+    ),
+    'on_guild_scheduled_event_delete': EmbedTemplate(
+        'Event Deleted', Color.red(),
+        fields=(Field('Name', 'event.name'), Field('Scheduled Start Time', timestamp('event.scheduled_start_time'))),
+    ),
+    'on_guild_scheduled_event_user_add': EmbedTemplate(
+        'User Added to Event', Color.green(), fields=(Field('Event', 'event.name'), Field('User', 'user.mention')),
+    ),
+    'on_guild_scheduled_event_user_remove': EmbedTemplate(
+        'User Removed from Event', Color.red(), fields=(Field('Event', 'event.name'), Field('User', 'user.mention')),
+    ),
+
+    # * automod
+    'on_auto_moderation_rule_create': EmbedTemplate(
+        'AutoMod Rule Created', Color.green(),
+        fields=(Field('Rule', 'rule.name'), Field('Rule ID', 'rule.id'), Field('Creator', 'rule.creator.mention')),
+    ),
+    'on_auto_moderation_rule_update.name': EmbedTemplate(
+        'AutoMod Rule Name Updated', Color.blue(), fields=(Field('Before', 'before.name'), Field('After', 'after.name')),
+    ),
+    'on_auto_moderation_rule_update.enabled': EmbedTemplate(
+        'AutoMod Rule Status Updated', Color.orange(), fields=(Field('Before', 'before.enabled'), Field('After', 'after.enabled')),
+    ),
+    'on_auto_moderation_rule_delete': EmbedTemplate(
+        'AutoMod Rule Deleted', Color.red(), fields=(Field('Rule', 'rule.name'), Field('Rule ID', 'rule.id')),
+    ),
+}
@@ -0,0 +1,100 @@
+import sys
+from collections import OrderedDict
+
+
+def jump_url(guild_id, channel_id, message_id):
+    """Link to a message, built from ids so it needs neither the message nor a request."""
+    return f'https://discord.com/channels/{guild_id or "@me"}/{channel_id}/{message_id}'
+
+
+class StoredMessage:
+    """The parts of a message the Logger needs to show it after it's gone from nextcord's cache."""
+
+    __slots__ = ('id', 'author_id', 'channel_id', 'content', 'attachments', 'size')
+
+    def __init__(self, id, author_id, channel_id, content, attachments):
+        self.id = id
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.content = content
+        self.attachments = attachments  # tuple of file names
+        self.size = _RECORD_SIZE + sys.getsizeof(content) + sum(sys.getsizeof(a) for a in attachments)
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(
+            message.id,
+            message.author.id,
+            message.channel.id,
+            message.content,
+            tuple(a.filename for a in message.attachments),
+        )
+
+
+# Size of a record itself plus its slot in the OrderedDict (key, value pointers and links).
+_RECORD_SIZE = sys.getsizeof(object.__new__(StoredMessage)) + 100
+
+
+class MessageStore:
+    """
+    A compact, per-guild LRU of recent messages with a byte budget.
+
+    nextcord only keeps the last few thousand full `Message` objects bot-wide. This
+    keeps far more messages per guild for a fraction of the memory, so deleted and
+    edited messages can still be shown with their content long after nextcord forgot them.
+    Each guild's records are evicted least recently used first once they pass its budget.
+    """
+
+    def __init__(self):
+        self.guilds = {}  # guild id -> OrderedDict(message id -> StoredMessage), least recent first
+        self.sizes = {}  # guild id -> bytes used
+
+    def add(self, guild_id, message, budget):
+        record = StoredMessage.from_message(message)
+        messages = self.guilds.get(guild_id)
+        if messages is None:
+            messages = self.guilds[guild_id] = OrderedDict()
+            self.sizes[guild_id] = 0
+        old = messages.pop(record.id, None)
+        used = self.sizes[guild_id] + record.size - (old.size if old else 0)
+        messages[record.id] = record
+
+        while used > budget and messages:
+            _, evicted = messages.popitem(last=False)
+            used -= evicted.size
+        self.sizes[guild_id] = used
+        return record
+
+    def get(self, guild_id, message_id):
+        messages = self.guilds.get(guild_id)
+        if not messages:
+            return None
+        record = messages.get(message_id)
+        if record is not None:
+            messages.move_to_end(message_id)
+        return record
+
+    def update(self, guild_id, message_id, content):
+        """Record an edit, returning the previous content (None if the message isn't stored)."""
+        record = self.get(guild_id, message_id)
+        if record is None:
+            return None
+        before = record.content
+        size = record.size
+        record.content = content
+        record.size = size - sys.getsizeof(before) + sys.getsizeof(content)
+        self.sizes[guild_id] += record.size - size
+        return before
+
+    def pop(self, guild_id, message_id):
+        messages = self.guilds.get(guild_id)
+        if not messages:
+            return None
+        record = messages.pop(message_id, None)
+        if record is not None:
+            self.sizes[guild_id] -= record.size
+        return record
+
+    def forget_guild(self, guild_id):
+        self.guilds.pop(guild_id, None)
+        self.sizes.pop(guild_id, None)
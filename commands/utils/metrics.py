@@ -0,0 +1,191 @@
+import asyncio
+import bisect
+import functools
+import logging
+import time
+from collections import defaultdict
+
+# Upper bounds, in seconds, of the listener and send latency histogram buckets.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Upper bounds, in seconds, of the buckets for the time from an embed being queued to it being sent.
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+# The metrics endpoint only listens locally; put a proxy in front of it to scrape from elsewhere.
+METRICS_HOST = '127.0.0.1'
+
+
+class Histogram:
+    """Counts observations into fixed buckets, the way Prometheus histograms do."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is everything past the highest bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        """Add another histogram with the same bounds into this one."""
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """Upper bound of the bucket the q-quantile falls in; inf past the last bound."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+def quantiles(hist):
+    """'p50/p99' of a histogram, as bucket upper bounds."""
+    def fmt(seconds):
+        return f'>{hist.bounds[-1]:g}s' if seconds == float('inf') else f'{seconds * 1000:g}ms'
+    return f'{fmt(hist.quantile(0.5))}/{fmt(hist.quantile(0.99))}'
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}' if labels else ''
+
+
+def _histogram_lines(name, hist, **labels):
+    seen = 0
+    for bound, count in zip(hist.bounds, hist.counts):
+        seen += count
+        yield f'{name}_bucket{_labels(**labels, le=bound)} {seen}'
+    yield f'{name}_bucket{_labels(**labels, le="+Inf")} {hist.count}'
+    yield f'{name}_sum{_labels(**labels)} {hist.sum}'
+    yield f'{name}_count{_labels(**labels)} {hist.count}'
+
+
+class Metrics:
+    """
+    Bot-wide counters and histograms for the Logger. Recording one is a dict lookup
+    and an increment, so it stays on the hot path; everything else (quantiles, the
+    Prometheus text, gauges) is only worked out when someone asks for it.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.listeners = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # event -> listener run times
+        self.logged = defaultdict(int)  # event -> events logged
+        self.sends = defaultdict(int)  # 'ok' / 'rate_limited' / 'error' -> messages sent
+        self.send_latency = Histogram(LATENCY_BUCKETS)
+        self.lag = Histogram(LAG_BUCKETS)
+        self.dropped = defaultdict(int)  # lane -> embeds shed from a full lane
+        self.rate_limits = 0  # 429s nextcord waited out and retried, across all requests
+        self.gauges = {}  # name -> (help, label name or None, callable read at scrape time)
+
+    def gauge(self, name, help, read, label=None):
+        """Register a value read when metrics are collected; with `label`, `read` returns {label value: value}."""
+        self.gauges[name] = (help, label, read)
+
+    def count_rate_limit(self, record):
+        # a logging filter on nextcord's HTTP loggers; both of their 429 warnings say this
+        if 'rate limited. Retrying' in str(record.msg):
+            self.rate_limits += 1
+        return True
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name, kind, help):
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        family('logger_listener_seconds', 'histogram', 'Time spent in each Logger listener.')
+        for event, hist in sorted(self.listeners.items()):
+            lines.extend(_histogram_lines('logger_listener_seconds', hist, event=event))
+        family('logger_events_logged_total', 'counter', 'Events rendered and queued for the logger channel.')
+        for event, count in sorted(self.logged.items()):
+            lines.append(f'logger_events_logged_total{_labels(event=event)} {count}')
+        family('logger_sends_total', 'counter', 'Log messages sent, by outcome.')
+        for outcome, count in sorted(self.sends.items()):
+            lines.append(f'logger_sends_total{_labels(outcome=outcome)} {count}')
+        family('logger_send_seconds', 'histogram', 'Time taken by one log message send.')
+        lines.extend(_histogram_lines('logger_send_seconds', self.send_latency))
+        family('logger_delivery_lag_seconds', 'histogram', 'Time from an embed being queued to it being sent.')
+        lines.extend(_histogram_lines('logger_delivery_lag_seconds', self.lag))
+        family('logger_dropped_total', 'counter', 'Embeds shed from a full delivery lane.')
+        for lane, count in sorted(self.dropped.items()):
+            lines.append(f'logger_dropped_total{_labels(lane=lane)} {count}')
+        family('logger_rate_limits_total', 'counter', 'HTTP 429 responses nextcord waited out.')
+        lines.append(f'logger_rate_limits_total {self.rate_limits}')
+        family('logger_uptime_seconds', 'gauge', 'Seconds since the metrics were created.')
+        lines.append(f'logger_uptime_seconds {time.time() - self.started:.0f}')
+
+        for name, (help, label, read) in self.gauges.items():
+            family(name, 'gauge', help)
+            value = read()
+            if label is None:
+                lines.append(f'{name} {value}')
+            else:
+                lines.extend(f'{name}{_labels(**{label: key})} {item}' for key, item in value.items())
+        return '\n'.join(lines) + '\n'
+
+
+def timed_listeners(cls):
+    """Class decorator timing every listener of a cog into its `metrics.listeners`."""
+    for event, name in cls.__cog_listeners__:
+        setattr(cls, name, _timed(event, getattr(cls, name)))
+    return cls
+
+
+def _timed(event, listener):
+    @functools.wraps(listener)
+    async def timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await listener(self, *args, **kwargs)
+        finally:
+            self.metrics.listeners[event].observe(time.perf_counter() - start)
+
+    return timed
+
+
+async def serve_metrics(metrics, port, host=METRICS_HOST):
+    """Serve `metrics.render()` at /metrics over plain HTTP; returns the asyncio Server."""
+
+    async def handle(reader, writer):
+        try:
+            request = (await asyncio.wait_for(reader.readline(), 5)).split()
+            # read the headers off too, closing with them unread can reset the connection
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            if len(request) > 1 and request[1].split(b'?')[0] == b'/metrics':
+                status, body = '200 OK', metrics.render().encode()
+            else:
+                status, body = '404 Not Found', b'Not found\n'
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def get_metrics(bot):
+    """The bot-wide Metrics, created on first use."""
+    metrics = getattr(bot, 'metrics', None)
+    if metrics is None:
+        metrics = bot.metrics = Metrics()
+        for name in ('nextcord.http', 'nextcord.webhook.async_'):
+            logging.getLogger(name).addFilter(metrics.count_rate_limit)
+    return metrics
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+
+import nextcord
+
+from commands.utils.singleflight import SingleFlight
+
+USER_CACHE_SIZE = 10000
+# How long a user id that doesn't exist is remembered as missing.
+NEGATIVE_TTL = 300
+
+
+class UserResolver:
+    """
+    Looks users up by id with as few requests as possible.
+
+    Checks nextcord's cache, then an LRU of users we fetched before, then a short-lived
+    cache of ids that came back as unknown. Only then is the user fetched, with
+    concurrent lookups for the same id sharing one request.
+    """
+
+    def __init__(self, bot, max_size=USER_CACHE_SIZE, negative_ttl=NEGATIVE_TTL):
+        self.bot = bot
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.users = OrderedDict()  # user id -> User, least recently used first
+        self.missing = {}  # user id -> monotonic time the negative entry expires
+        self.fetches = SingleFlight()
+
+    def remember(self, user):
+        self.users[user.id] = user
+        self.users.move_to_end(user.id)
+        if len(self.users) > self.max_size:
+            self.users.popitem(last=False)
+
+    def get(self, user_id):
+        """A user we already know about, without making any request."""
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user
+        user = self.users.get(user_id)
+        if user is not None:
+            self.users.move_to_end(user_id)
+        return user
+
+    async def resolve(self, user_id):
+        """The user with this id, or None if Discord doesn't know it."""
+        user = self.get(user_id)
+        if user is not None:
+            return user
+        expires = self.missing.get(user_id)
+        if expires is not None:
+            if expires > time.monotonic():
+                return None
+            del self.missing[user_id]
+        return await self.fetches.do(user_id, lambda: self._fetch(user_id))
+
+    async def _fetch(self, user_id):
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except nextcord.NotFound:
+            self.missing[user_id] = time.monotonic() + self.negative_ttl
+            return None
+        self.remember(user)
+        return user
+
+
+def get_user_resolver(bot):
+    """The bot-wide UserResolver, created on first use."""
+    resolver = getattr(bot, 'user_resolver', None)
+    if resolver is None:
+        resolver = bot.user_resolver = UserResolver(bot)
+    return resolver
@@ -0,0 +1,146 @@
+import asyncio
+import datetime
+import gzip
+import os
+import shutil
+import time
+
+from commands.utils.journal import segment_index
+
+# How often the compactor goes over every guild's local store.
+COMPACT_INTERVAL = 3600
+# Sealed journal segments untouched for this long are compressed.
+COLD_AFTER = 24 * 3600
+DAY = 24 * 3600
+
+
+def format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def compress_segment(path):
+    """Replace a sealed segment with a gzip copy of it, keeping its mtime (its age)."""
+    target = path + '.gz'
+    tmp = target + '.tmp'
+    with open(path, 'rb') as source, open(tmp, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            shutil.copyfileobj(source, gz)
+        raw.flush()
+        os.fsync(raw.fileno())
+    stat = os.stat(path)
+    os.utime(tmp, (stat.st_atime, stat.st_mtime))
+    os.replace(tmp, target)
+    os.remove(path)
+
+
+def journal_usage(journal, guild_id):
+    """(segments, compressed segments, bytes) of a guild's journal."""
+    paths = journal.segment_paths(guild_id)
+    compressed = sum(1 for path in paths if path.endswith('.gz'))
+    size = 0
+    for path in paths:
+        try:
+            size += os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+    return len(paths), compressed, size
+
+
+def compact_guild(journal, guild_id, max_age, max_bytes, cold_after=COLD_AFTER, now=None):
+    """
+    Apply a guild's retention policy to its journal: drop sealed segments last written
+    more than `max_age` seconds ago, then the oldest ones while the journal is over
+    `max_bytes`, then compress the sealed ones that went cold. Either limit may be None.
+
+    Returns the newest last-write time among the dropped segments (None if nothing was
+    dropped), so the search index can be cut back to the same horizon. Blocking.
+    """
+    now = time.time() if now is None else now
+    paths = journal.segment_paths(guild_id)
+    # read after listing: the writer publishes a segment's index before creating it, so
+    # nothing listed here that it may still write to is below the mark
+    sealed_below = journal.sealed_below(guild_id)
+    segments = []  # (path, mtime, size) of the sealed segments, oldest first
+    total = 0
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        total += stat.st_size
+        if sealed_below is None or segment_index(os.path.basename(path)) < sealed_below:
+            segments.append((path, stat.st_mtime, stat.st_size))
+
+    dropped_until = None
+
+    def drop(segment):
+        nonlocal total, dropped_until
+        path, mtime, size = segment
+        os.remove(path)
+        total -= size
+        dropped_until = max(dropped_until or 0, mtime)
+
+    while segments and max_age and segments[0][1] < now - max_age:
+        drop(segments.pop(0))
+    while segments and max_bytes and total > max_bytes:
+        drop(segments.pop(0))
+
+    for path, mtime, _ in segments:
+        if not path.endswith('.gz') and now - mtime >= cold_after:
+            compress_segment(path)
+    return dropped_until
+
+
+class Compactor:
+    """
+    Keeps the Logger's local store bounded: every `interval` seconds each configured
+    guild's journal is trimmed to its `retention_days`/`retention_bytes` settings and
+    cold segments are compressed, then the search index drops everything older than
+    what the journal kept. The file work runs in an executor, the index deletes in
+    small batches on the index's own thread.
+    """
+
+    def __init__(self, journal, search, config, interval=COMPACT_INTERVAL, cold_after=COLD_AFTER, serves=None):
+        self.journal = journal
+        self.search = search
+        self.config = config
+        # guild id -> whether this process logs it; in a shard cluster each guild is compacted
+        # by the process writing its journal
+        self.serves = serves or (lambda guild_id: True)
+        self.interval = interval
+        self.cold_after = cold_after
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run()
+            except Exception as e:
+                print(f'Logger: compaction failed: {e!r}')
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for guild_id, settings in list(self.config.guilds.items()):
+            if not self.serves(guild_id):
+                continue
+            now = time.time()
+            max_age = settings['retention_days'] and settings['retention_days'] * DAY
+            dropped_until = await loop.run_in_executor(
+                None, compact_guild, self.journal, guild_id, max_age, settings['retention_bytes'], self.cold_after, now)
+            cutoff = max(now - max_age if max_age else 0, dropped_until or 0)
+            if cutoff:
+                # by when events were logged, like the journal segments they came from
+                await self.search.prune(guild_id, datetime.datetime.fromtimestamp(cutoff, datetime.timezone.utc))
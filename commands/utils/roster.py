@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+ROSTER_PATH = 'roster.db'
+# Changes are collected for this many seconds and written in one transaction.
+ROSTER_FLUSH_DELAY = 5.0
+
+
+class RosterEntry:
+    __slots__ = ('user_id', 'joined_at', 'role_ids')
+
+    def __init__(self, user_id, joined_at, role_ids):
+        self.user_id = user_id
+        self.joined_at = joined_at  # aware datetime or None
+        self.role_ids = role_ids  # tuple of ints
+
+
+class MemberRoster:
+    """
+    A compact on-disk record of (guild id, user id, joined_at, role ids) for every member.
+
+    When a member nextcord never cached leaves, the raw leave event only carries the
+    user. The roster still knows when they joined and which roles they had, so the leave
+    can be logged in full without a request. All SQLite work happens on one background
+    thread; writes are buffered and committed in batches.
+    """
+
+    def __init__(self, path=ROSTER_PATH, flush_delay=ROSTER_FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.pending = {}  # (guild id, user id) -> row tuple, or None for a removal
+        self._flush_handle = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='roster')
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            # shard clusters share the file; WAL lets one write while the others read
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS roster ('
+                ' guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL,'
+                ' joined_at REAL, role_ids TEXT NOT NULL,'
+                ' PRIMARY KEY (guild_id, user_id)) WITHOUT ROWID'
+            )
+        return self._db
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    @staticmethod
+    def _row(member):
+        joined_at = member.joined_at.timestamp() if member.joined_at else None
+        # the first role is always @everyone
+        role_ids = ','.join(str(role.id) for role in member.roles[1:])
+        return (member.guild.id, member.id, joined_at, role_ids)
+
+    def upsert(self, member):
+        self.pending[(member.guild.id, member.id)] = self._row(member)
+        self._schedule()
+
+    def remove(self, guild_id, user_id):
+        self.pending[(guild_id, user_id)] = None
+        self._schedule()
+
+    async def add_guild(self, guild):
+        """Record every cached member of a guild in one transaction, e.g. once it's chunked."""
+        rows = [self._row(member) for member in guild.members]
+        await self._run(self._write, rows, [])
+
+    async def get(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        if key in self.pending:
+            row = self.pending[key]
+        else:
+            row = await self._run(self._read, guild_id, user_id)
+        if row is None:
+            return None
+        _, _, joined_at, role_ids = row
+        return RosterEntry(
+            user_id,
+            datetime.datetime.fromtimestamp(joined_at, datetime.timezone.utc) if joined_at else None,
+            tuple(int(r) for r in role_ids.split(',') if r),
+        )
+
+    def _read(self, guild_id, user_id):
+        return self._connect().execute(
+            'SELECT guild_id, user_id, joined_at, role_ids FROM roster WHERE guild_id = ? AND user_id = ?',
+            (guild_id, user_id),
+        ).fetchone()
+
+    def _write(self, rows, removals):
+        db = self._connect()
+        with db:
+            if rows:
+                db.executemany('INSERT OR REPLACE INTO roster VALUES (?, ?, ?, ?)', rows)
+            if removals:
+                db.executemany('DELETE FROM roster WHERE guild_id = ? AND user_id = ?', removals)
+
+    def _schedule(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        self._flush_handle = None
+        pending, self.pending = self.pending, {}
+        rows = [row for row in pending.values() if row is not None]
+        removals = [key for key, row in pending.items() if row is None]
+        if rows or removals:
+            await self._run(self._write, rows, removals)
+
+    def close(self):
+        """Write what's pending and release the database; for shutdown."""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self.pending = self.pending, {}
+        rows = [row for row in pending.values() if row is not None]
+        removals = [key for key, row in pending.items() if row is None]
+        self._executor.submit(self._write, rows, removals)
+        self._executor.submit(self._close_db)
+        self._executor.shutdown(wait=True)
+
+    def _close_db(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
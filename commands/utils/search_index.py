@@ -0,0 +1,242 @@
+import asyncio
+import datetime
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from nextcord.utils import time_snowflake
+
+from commands.utils.export import export_events
+
+SEARCH_PATH = 'search.db'
+# Logged events are collected for this many seconds and inserted in one transaction.
+INDEX_FLUSH_DELAY = 2.0
+PAGE_SIZE = 10
+# Rows deleted per transaction when pruning, so the index writer never waits long.
+PRUNE_BATCH = 5000
+
+# `snowflake` is built from the time the event was logged (the message an event is about
+# has its own column), so ordering, retention and export windows all go by event time.
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS events ('
+    ' id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, snowflake INTEGER NOT NULL,'
+    ' channel_id INTEGER, user_id INTEGER, message_id INTEGER,'
+    ' ts REAL NOT NULL, event TEXT NOT NULL, content TEXT, record TEXT NOT NULL)',
+    # every lookup is scoped to one guild and pages newest first by snowflake
+    'CREATE INDEX IF NOT EXISTS events_guild ON events (guild_id, snowflake)',
+    'CREATE INDEX IF NOT EXISTS events_channel ON events (guild_id, channel_id, snowflake)',
+    'CREATE INDEX IF NOT EXISTS events_user ON events (guild_id, user_id, snowflake)',
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(content, content='events', content_rowid='id')",
+)
+
+
+def fts_query(text):
+    """Quote every word so user input is matched as terms, never parsed as FTS syntax."""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class SearchHit:
+    __slots__ = ('id', 'snowflake', 'event', 'channel_id', 'user_id', 'message_id', 'ts', 'content')
+
+    def __init__(self, id, snowflake, event, channel_id, user_id, message_id, ts, content):
+        self.id = id
+        self.snowflake = snowflake
+        self.event = event
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.message_id = message_id
+        self.ts = ts
+        self.content = content
+
+
+class SearchIndex:
+    """
+    A local SQLite database of everything the Logger logged, searchable per guild.
+
+    Message content goes into an FTS5 index; guild, channel, author and snowflake time
+    are B-tree indexed, so a query touches only the rows of the page it returns. Events
+    are buffered and inserted in batched transactions on a single background thread,
+    like the member roster.
+
+    The index is shared bot-wide, see get_search_index: each user calls `release` when
+    it's done with it, and the last one closes it.
+    """
+
+    def __init__(self, path=SEARCH_PATH, flush_delay=INDEX_FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.pending = []  # row tuples waiting for the next transaction
+        self._flush_handle = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+        self._db = None
+        self.users = 0  # holders from get_search_index that haven't released it
+        self.closed = False
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+        return self._db
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def add(self, record):
+        """Queue a journal record (see journal.event_record) for indexing."""
+        snowflake = time_snowflake(datetime.datetime.fromtimestamp(record['ts'], datetime.timezone.utc))
+        self.pending.append((
+            record['guild'], snowflake, record.get('channel'), record.get('user'), record.get('message'),
+            record['ts'], record['event'], record.get('content'), record,
+        ))
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        self._flush_handle = None
+        rows, self.pending = self.pending, []
+        if rows:
+            await self._run(self._write, rows)
+
+    def _write(self, rows):
+        db = self._connect()
+        with db:
+            for row in rows:
+                *columns, record = row
+                cursor = db.execute(
+                    'INSERT INTO events (guild_id, snowflake, channel_id, user_id, message_id, ts, event, content, record)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (*columns, json.dumps(record, separators=(',', ':'), default=str)),
+                )
+                content = columns[7]
+                if content:
+                    db.execute('INSERT INTO events_fts (rowid, content) VALUES (?, ?)', (cursor.lastrowid, content))
+
+    async def search(self, guild_id, text=None, channel_id=None, user_id=None, before=None, limit=PAGE_SIZE):
+        """
+        The newest `limit` matching events of a guild as SearchHits. Pass the
+        (snowflake, id) of the last hit as `before` to get the next page; events logged
+        in the same millisecond share a snowflake, the id tells them apart.
+        """
+        return await self._run(self._search, guild_id, text, channel_id, user_id, before, limit)
+
+    def _search(self, guild_id, text, channel_id, user_id, before, limit):
+        where = ['e.guild_id = ?']
+        params = [guild_id]
+        if channel_id is not None:
+            where.append('e.channel_id = ?')
+            params.append(channel_id)
+        if user_id is not None:
+            where.append('e.user_id = ?')
+            params.append(user_id)
+        if before is not None:
+            where.append('(e.snowflake, e.id) < (?, ?)')
+            params.extend(before)
+
+        source = 'events e'
+        if text and text.split():
+            source = 'events_fts JOIN events e ON e.id = events_fts.rowid'
+            where.append('events_fts MATCH ?')
+            params.append(fts_query(text))
+
+        rows = self._connect().execute(
+            f'SELECT e.id, e.snowflake, e.event, e.channel_id, e.user_id, e.message_id, e.ts, e.content FROM {source}'
+            f' WHERE {" AND ".join(where)} ORDER BY e.snowflake DESC, e.id DESC LIMIT ?',
+            (*params, limit),
+        ).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    async def prune(self, guild_id, before):
+        """Delete a guild's events logged before the aware datetime `before`, a batch at a time."""
+        before = time_snowflake(before)
+        total = 0
+        while True:
+            deleted = await self._run(self._prune_batch, guild_id, before)
+            total += deleted
+            if deleted < PRUNE_BATCH:
+                break
+        if total:
+            await self._run(self._merge)
+        return total
+
+    def _prune_batch(self, guild_id, before):
+        db = self._connect()
+        with db:
+            rows = db.execute(
+                'SELECT id, content FROM events WHERE guild_id = ? AND snowflake < ? LIMIT ?',
+                (guild_id, before, PRUNE_BATCH),
+            ).fetchall()
+            # an external content FTS table has to be told what it's forgetting
+            db.executemany(
+                "INSERT INTO events_fts (events_fts, rowid, content) VALUES ('delete', ?, ?)",
+                [row for row in rows if row[1]],
+            )
+            db.executemany('DELETE FROM events WHERE id = ?', [(row[0],) for row in rows])
+        return len(rows)
+
+    def _merge(self):
+        # fold the FTS segments the deletes left behind back together, a bounded amount of work
+        # per run; freed pages are reused by new rows, so the file stops growing once retention kicks in
+        db = self._connect()
+        with db:
+            db.execute("INSERT INTO events_fts (events_fts, rank) VALUES ('merge', 500)")
+        db.execute('PRAGMA optimize')
+
+    async def usage(self, guild_id):
+        """(number of events, approximate bytes) a guild takes up in the index."""
+        return await self._run(self._usage, guild_id)
+
+    def _usage(self, guild_id):
+        count, size = self._connect().execute(
+            'SELECT COUNT(*), IFNULL(SUM(LENGTH(record) + IFNULL(LENGTH(content), 0)), 0) FROM events WHERE guild_id = ?',
+            (guild_id,),
+        ).fetchone()
+        return count, size
+
+    async def export(self, guild_id, directory, name, fmt='jsonl', **filters):
+        """Stream a guild's events into compressed files, see export.export_events."""
+        await self.flush()
+        await self._run(self._connect)  # makes sure the tables exist
+        return await asyncio.get_running_loop().run_in_executor(
+            None, lambda: export_events(self.path, directory, name, guild_id, fmt, **filters))
+
+    def release(self):
+        """Drop one hold from get_search_index; the last one closes the index."""
+        self.users -= 1
+        if self.users <= 0:
+            self.close()
+
+    def close(self):
+        """Write what's pending and release the database; for shutdown."""
+        self.closed = True
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        rows, self.pending = self.pending, []
+        if rows:
+            self._executor.submit(self._write, rows)
+        self._executor.submit(self._close_db)
+        self._executor.shutdown(wait=True)
+
+    def _close_db(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def get_search_index(bot):
+    """
+    The bot-wide SearchIndex, created on first use. The caller holds it until it calls
+    `release`, usually from cog_unload; once every holder has, it's closed and the next
+    call opens a new one.
+    """
+    index = getattr(bot, 'search_index', None)
+    if index is None or index.closed:
+        index = bot.search_index = SearchIndex()
+    index.users += 1
+    return index
@@ -0,0 +1,230 @@
+import asyncio
+import time
+from collections import deque
+
+import nextcord
+
+from commands.utils.templates import embed_size
+
+# Discord accepts at most 10 embeds per message and 6000 characters across all of them.
+MAX_EMBEDS = 10
+MAX_CHARS = 6000
+
+# Delivery lanes, highest priority first. `depth` bounds how many embeds a lane holds;
+# once it is full the oldest one is shed. With `summarize` the shed events are
+# collapsed into a single "N events dropped" embed, with `drop_oldest` they just vanish.
+LANES = {
+    'high': {'depth': 1000, 'shed': 'summarize'},
+    'normal': {'depth': 500, 'shed': 'summarize'},
+    'low': {'depth': 100, 'shed': 'drop_oldest'},
+}
+
+# Listener name -> lane. Anything not listed goes to `normal`.
+EVENT_PRIORITY = {
+    'on_member_ban': 'high',
+    'on_member_unban': 'high',
+    'on_member_remove': 'high',
+    'on_raw_member_remove': 'high',
+    'on_guild_audit_log_entry_create': 'high',
+    'on_auto_moderation_rule_create': 'high',
+    'on_auto_moderation_rule_update': 'high',
+    'on_auto_moderation_rule_delete': 'high',
+    'on_guild_role_create': 'high',
+    'on_guild_role_delete': 'high',
+    'on_guild_role_update': 'high',
+    'on_guild_channel_delete': 'high',
+    'on_webhooks_update': 'high',
+    'on_bulk_message_delete': 'high',
+    'on_typing': 'low',
+    'on_raw_typing': 'low',
+    'on_presence_update': 'low',
+    'on_reaction_add': 'low',
+    'on_raw_reaction_add': 'low',
+    'on_reaction_remove': 'low',
+    'on_raw_reaction_remove': 'low',
+    'on_voice_state_update': 'low',
+    'on_interaction': 'low',
+}
+
+
+def queue_settings(extra):
+    """LANES and EVENT_PRIORITY with the top level `lanes` and `priorities` of config.json applied."""
+    lanes = {lane: dict(settings) for lane, settings in LANES.items()}
+    for lane, settings in extra.get('lanes', {}).items():
+        if lane not in lanes:
+            print(f'Logger: ignoring unknown lane in config: {lane}')
+            continue
+        lanes[lane].update(settings)
+    priorities = dict(EVENT_PRIORITY)
+    for event, lane in extra.get('priorities', {}).items():
+        if lane not in lanes:
+            print(f'Logger: ignoring unknown lane {lane!r} for {event} in config')
+            continue
+        priorities[event] = lane
+    return lanes, priorities
+
+
+class SendQueue:
+    """
+    Collects embeds for one destination channel and ships them in batches.
+
+    Embeds are held as raw payload dicts (nextcord.Embed objects are converted on the
+    way in), which is what both delivery paths send.
+
+    `put` never waits on HTTP: the embed is queued in its event's lane and a single
+    worker task sends up to 10 embeds per message once the flush window has passed.
+    Every batch is filled from the highest priority lane first, so a ban log never
+    waits behind a backlog of typing events. `sender` replaces the plain channel send,
+    e.g. with `WebhookPool.send`. Sends, sheds and delivery lag go into `metrics` if given.
+    """
+
+    def __init__(self, channel, flush_interval=1.0, lanes=None, priorities=None, sender=None, metrics=None):
+        self.channel = channel
+        self.metrics = metrics
+        self.sender = sender or self._channel_send
+        self.flush_interval = flush_interval
+        self.lanes = lanes or LANES
+        self.priorities = priorities or EVENT_PRIORITY
+        self.pending = {lane: deque() for lane in self.lanes}
+        self.dropped = dict.fromkeys(self.lanes, 0)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._closed = False
+        self.sending = None  # the batch being sent, taken off its lanes already
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.pending.values())
+
+    def put(self, embed, event=None):
+        """Queue an embed and return a future resolved with the message it was sent in.
+
+        The future resolves to None if the embed was shed because its lane was full.
+        """
+        if isinstance(embed, nextcord.Embed):
+            embed = embed.to_dict()
+        lane = self.priorities.get(event, 'normal')
+        if lane not in self.pending:
+            lane = 'normal'
+        queue = self.pending[lane]
+        if len(queue) >= self.lanes[lane]['depth']:
+            self._shed(lane)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append((embed, future, time.monotonic()))
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    def _shed(self, lane):
+        _, future, _ = self.pending[lane].popleft()
+        if not future.done():
+            future.set_result(None)
+        if self.metrics:
+            self.metrics.dropped[lane] += 1
+        if self.lanes[lane]['shed'] == 'summarize':
+            self.dropped[lane] += 1
+
+    def _dropped_summary(self, lane):
+        count = self.dropped[lane]
+        self.dropped[lane] = 0
+        return {
+            'type': 'rich',
+            'title': 'Events Dropped',
+            'color': nextcord.Color.light_grey().value,
+            'description': f'{count} {lane} priority events were dropped while the logger was overloaded.',
+        }
+
+    def _take_batch(self):
+        batch = []
+        size = 0
+        for lane, queue in self.pending.items():
+            if self.dropped[lane] and len(batch) < MAX_EMBEDS:
+                summary = self._dropped_summary(lane)
+                batch.append((summary, None, None))
+                size += embed_size(summary)
+            while queue and len(batch) < MAX_EMBEDS:
+                embed, future, queued = queue[0]
+                length = embed_size(embed)
+                if batch and size + length > MAX_CHARS:
+                    return batch
+                queue.popleft()
+                batch.append((embed, future, queued))
+                size += length
+            if len(batch) >= MAX_EMBEDS:
+                break
+        return batch
+
+    def _has_work(self):
+        return any(self.pending.values()) or any(self.dropped.values())
+
+    async def _channel_send(self, embeds):
+        # the embeds are payload dicts already, so post them as they are instead of
+        # round-tripping through nextcord.Embed
+        state = self.channel._state
+        data = await state.http.send_message(self.channel.id, None, embeds=embeds)
+        return state.create_message(channel=self.channel, data=data)
+
+    async def _send(self, batch):
+        start = time.monotonic()
+        self.sending = batch
+        try:
+            message = await self.sender([embed for embed, _, _ in batch])
+        except Exception as e:
+            # a connection reset or timeout must not end the worker along with this batch
+            print(f'Logger: failed to send {len(batch)} embeds to #{self.channel}: {e!r}')
+            if self.metrics:
+                status = getattr(e, 'status', None) if isinstance(e, nextcord.HTTPException) else None
+                self.metrics.sends['rate_limited' if status == 429 else 'error'] += 1
+            self._fail(batch, e)
+            return
+        finally:
+            self.sending = None
+        if self.metrics:
+            now = time.monotonic()
+            self.metrics.sends['ok'] += 1
+            self.metrics.send_latency.observe(now - start)
+            for _, _, queued in batch:
+                if queued is not None:
+                    self.metrics.lag.observe(now - queued)
+        for _, future, _ in batch:
+            if future and not future.done():
+                future.set_result(message)
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future, _ in batch:
+            if future and not future.done():
+                future.set_exception(error)
+                # nobody is required to await these, so don't warn about it
+                future.exception()
+
+    async def _run(self):
+        while not self._closed:
+            if not self._has_work():
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # give the burst a moment to build up so it goes out in as few messages as possible
+            await asyncio.sleep(self.flush_interval)
+            while self._has_work():
+                await self._send(self._take_batch())
+
+    async def flush(self):
+        """Send everything still pending right away."""
+        while self._has_work():
+            await self._send(self._take_batch())
+
+    def close(self):
+        """Stop the worker, flushing whatever is left in the background."""
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+        if self.sending:
+            # cancelled mid-send, so nobody else will resolve these
+            for _, future, _ in self.sending:
+                if future:
+                    future.cancel()
+            self.sending = None
+        if self._has_work():
+            return asyncio.ensure_future(self.flush())
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import time
+
+# Where each shard cluster (see cluster.py) writes the health of its shards, so any of
+# them can report on all of them.
+STATUS_DIR = 'shards'
+# How often shard event counts are sampled and the status file rewritten.
+SAMPLE_INTERVAL = 10.0
+# A cluster whose status file is older than this many sample intervals is reported as down.
+STALE_AFTER = 3
+
+
+def sharding_from_env():
+    """
+    AutoShardedBot arguments from SHARD_COUNT ('auto' for Discord's recommendation) and
+    SHARD_IDS (comma separated, as cluster.py sets it), or None to run unsharded.
+    """
+    count = os.getenv('SHARD_COUNT')
+    ids = os.getenv('SHARD_IDS')
+    if not count and not ids:
+        return None
+    sharding = {}
+    if count and count != 'auto':
+        sharding['shard_count'] = int(count)
+    if ids:
+        sharding['shard_ids'] = [int(shard_id) for shard_id in ids.split(',')]
+    return sharding
+
+
+def cluster_id():
+    """This process's cluster number, or None when it wasn't started by cluster.py."""
+    cluster = os.getenv('CLUSTER_ID')
+    return int(cluster) if cluster else None
+
+
+def serves(bot, guild_id):
+    """Whether `guild_id` is on one of this process's shards; always true unsharded."""
+    shard_count = bot.shard_count
+    shard_ids = getattr(bot, 'shard_ids', None)
+    if not shard_count or shard_ids is None:
+        return True
+    return (guild_id >> 22) % shard_count in shard_ids
+
+
+class ShardHealth:
+    __slots__ = ('shard_id', 'up', 'since', 'connects', 'disconnects', 'resumes', 'events', 'rate', 'latency', 'guilds',
+                 '_sequence')
+
+    def __init__(self, shard_id):
+        self.shard_id = shard_id
+        self.up = False
+        self.since = time.time()  # when `up` last changed
+        self.connects = 0
+        self.disconnects = 0
+        self.resumes = 0
+        self.events = 0  # gateway dispatches received, all sessions
+        self.rate = 0.0  # dispatches per second over the last sample
+        self.latency = None  # heartbeat round trip in seconds
+        self.guilds = 0
+        self._sequence = 0
+
+    def set_up(self, up):
+        if up != self.up:
+            self.up = up
+            self.since = time.time()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+
+
+def _websocket(bot, shard_id):
+    if shard_id is None:
+        return bot.ws
+    # ShardInfo only exposes the latency; the sequence number is on the shard's websocket
+    shard = getattr(bot.get_shard(shard_id), '_parent', None)
+    return shard and shard.ws
+
+
+class ShardMonitor:
+    """
+    Connection state, latency and event rate of each shard this process runs. The rate
+    comes from the gateway sequence number, which goes up by one per dispatch, so nothing
+    is counted on the hot path: it's sampled every `interval` seconds. In a cluster the
+    samples also go to STATUS_DIR, where `cluster_status` reads every cluster's.
+    """
+
+    def __init__(self, bot, interval=SAMPLE_INTERVAL, status_dir=STATUS_DIR):
+        self.bot = bot
+        self.interval = interval
+        self.cluster = cluster_id()
+        self.status_path = self.cluster is not None and os.path.join(status_dir, f'cluster-{self.cluster}.json')
+        self.status_dir = status_dir
+        self.shards = {}  # shard id (None unsharded) -> ShardHealth
+        self._sampled = time.monotonic()
+        self._task = None
+
+    def shard(self, shard_id):
+        health = self.shards.get(shard_id)
+        if health is None:
+            health = self.shards[shard_id] = ShardHealth(shard_id)
+        return health
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            self.sample()
+            if self.status_path:
+                try:
+                    await loop.run_in_executor(None, self._write_status, self.status())
+                except OSError as e:
+                    print(f'Logger: failed to write {self.status_path}: {e}')
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = max(now - self._sampled, 1e-9)
+        self._sampled = now
+        guilds = {}
+        for guild in self.bot.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        latencies = dict(self.bot.latencies) if self.bot.shard_count else {None: self.bot.latency}
+        for shard_id in self.shard_ids():
+            health = self.shard(shard_id)
+            ws = _websocket(self.bot, shard_id)
+            sequence = (ws and ws.sequence) or 0
+            # a new session starts counting from 1 again
+            received = sequence - health._sequence if sequence >= health._sequence else sequence
+            health._sequence = sequence
+            health.events += received
+            health.rate = received / elapsed
+            latency = latencies.get(shard_id)
+            health.latency = latency if latency is not None and latency == latency else None  # nan before a heartbeat
+            health.guilds = guilds.get(shard_id if shard_id is not None else 0, 0)
+
+    def shard_ids(self):
+        if not self.bot.shard_count:
+            return [None]
+        return list(getattr(self.bot, 'shard_ids', None) or range(self.bot.shard_count))
+
+    def status(self):
+        return {
+            'cluster': self.cluster,
+            'pid': os.getpid(),
+            'at': time.time(),
+            'shards': [health.to_dict() for health in self.shards.values()],
+        }
+
+    def _write_status(self, status):
+        os.makedirs(self.status_dir, exist_ok=True)
+        tmp = f'{self.status_path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(status, f)
+        os.replace(tmp, self.status_path)
+
+    def cluster_status(self):
+        """
+        [(cluster status, stale)] for every cluster that wrote a status file, or just this
+        process's when it isn't part of a cluster. Blocking, run it in an executor.
+        """
+        if not self.status_path:
+            return [(self.status(), False)]
+        clusters = []
+        try:
+            names = sorted(os.listdir(self.status_dir))
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.status_dir, name)) as f:
+                    status = json.load(f)
+            except (OSError, ValueError):
+                continue
+            clusters.append((status, time.time() - status['at'] > self.interval * STALE_AFTER))
+        if not any(status['cluster'] == self.cluster for status, _ in clusters):
+            clusters.append((self.status(), False))
+        return sorted(clusters, key=lambda item: item[0]['cluster'])
+
+
+def get_shard_monitor(bot):
+    """The bot-wide ShardMonitor, created on first use."""
+    monitor = getattr(bot, 'shard_monitor', None)
+    if monitor is None:
+        monitor = bot.shard_monitor = ShardMonitor(bot)
+    return monitor
@@ -0,0 +1,20 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight coroutine.
+
+    The first caller for a key starts the work, everyone else asking for that key
+    while it is running awaits the same task instead of repeating the request.
+    """
+
+    def __init__(self):
+        self.inflight = {}  # key -> Task
+
+    async def do(self, key, factory):
+        task = self.inflight.get(key)
+        if task is None:
+            task = self.inflight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(task)
@@ -0,0 +1,123 @@
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nextcord.ext import commands
+
+# Slowest extensions named after each phase of the startup report.
+REPORT_EXTENSIONS = 3
+
+
+def _short(extension):
+    return extension.rsplit('.', 1)[-1]
+
+
+class StartupTimer:
+    """
+    Times bot startup in phases: each `mark(phase)` ends the phase that began at the
+    previous mark. `attach` marks login, the first READY and on_ready by itself, and
+    prints the breakdown once the bot is ready.
+    """
+
+    def __init__(self, started=None):
+        self.started = self.last = started or time.perf_counter()
+        self.phases = []  # (phase, seconds)
+        self.details = {}  # phase -> {extension: seconds}
+        self.reported = False
+
+    def mark(self, phase, details=None):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        if details:
+            self.details[phase] = details
+        self.last = now
+
+    def attach(self, bot):
+        login = bot.login
+
+        async def timed_login(token):
+            await login(token)
+            if not self.reported:
+                self.mark('login')
+
+        bot.login = timed_login
+        bot.add_listener(self.on_connect)
+        bot.add_listener(self.on_ready)
+
+    async def on_connect(self):
+        # dispatched when READY is parsed, before the guilds come in
+        if not self.reported and self.phases[-1][0] == 'login':
+            self.mark('gateway to READY')
+
+    async def on_ready(self):
+        if self.reported:
+            return
+        self.mark('guilds and chunking')
+        self.reported = True
+        print('\n'.join(self.report()))
+
+    def report(self):
+        lines = [f'> Started in {self.last - self.started:.2f}s']
+        for phase, seconds in self.phases:
+            line = f'    {phase:<20} {seconds:6.2f}s'
+            details = self.details.get(phase)
+            if details:
+                slowest = sorted(details.items(), key=lambda item: item[1], reverse=True)[:REPORT_EXTENSIONS]
+                line += '  (' + ', '.join(f'{_short(name)} {seconds:.2f}s' for name, seconds in slowest) + ')'
+            lines.append(line)
+        return lines
+
+
+def _import(extension):
+    start = time.perf_counter()
+    try:
+        importlib.import_module(extension)
+    except Exception:
+        # load_extension imports it again and reports the error properly
+        pass
+    return time.perf_counter() - start
+
+
+def import_parallel(extensions):
+    """
+    Import extensions on a thread each, so their dependencies are already in sys.modules
+    by the time load_extension runs them; returns {extension: seconds}. Reading and
+    unmarshalling modules overlaps, running their top level code still takes turns.
+    """
+    with ThreadPoolExecutor(max_workers=len(extensions) or 1, thread_name_prefix='import') as pool:
+        return dict(zip(extensions, pool.map(_import, extensions)))
+
+
+def load_extensions(bot, extensions):
+    """load_extension each in order; returns {extension: seconds}."""
+    took = {}
+    for extension in extensions:
+        start = time.perf_counter()
+        bot.load_extension(extension)
+        took[extension] = time.perf_counter() - start
+    return took
+
+
+class DeferredExtensions:
+    """
+    Extensions loaded the first time one of their prefix commands is used. The bot's
+    on_command_error hands CommandNotFound to `on_command_error`, which loads the
+    extension and runs the message through the commands again.
+    """
+
+    def __init__(self, bot, deferred):
+        self.bot = bot
+        self.extensions = {name: extension for extension, names in deferred.items() for name in names}
+
+    async def on_command_error(self, ctx, error):
+        """Whether `error` was for a deferred command, which has now been loaded and run."""
+        if not isinstance(error, commands.CommandNotFound):
+            return False
+        extension = self.extensions.get(ctx.invoked_with)
+        if extension is None or extension in self.bot.extensions:
+            return False
+        start = time.perf_counter()
+        self.bot.load_extension(extension)
+        print(f'> Loaded {_short(extension)} on first use in {time.perf_counter() - start:.2f}s')
+        await self.bot.process_commands(ctx.message)
+        return True
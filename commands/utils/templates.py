@@ -0,0 +1,209 @@
+import operator
+
+# Discord's per-part embed limits.
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 4096
+FIELD_LIMIT = 1024
+FOOTER_LIMIT = 2048
+AUTHOR_LIMIT = 256
+
+EMPTY_VALUE = '\u200b'
+
+
+class Field:
+    """
+    One embed field. `source` is either a dotted path into the render context, such as
+    'message.author.mention' (the first part names a context key), or a callable taking
+    the context dict. Optional fields are left out when their source gives None.
+    """
+
+    __slots__ = ('name', 'source', 'inline', 'limit', 'optional')
+
+    def __init__(self, name, source, inline=True, limit=FIELD_LIMIT, optional=False):
+        self.name = name
+        self.source = source
+        self.inline = inline
+        self.limit = limit
+        self.optional = optional
+
+
+class EmbedTemplate:
+    """
+    Declarative description of a log embed. `title` is a constant string or a callable,
+    `color` a constant or a source, and description, footer, author and thumbnail are
+    sources (see Field).
+    """
+
+    def __init__(self, title=None, color=None, fields=(), description=None, footer=None,
+                 author_name=None, author_icon=None, thumbnail=None):
+        self.title = title
+        self.color = color
+        self.fields = fields
+        self.description = description
+        self.footer = footer
+        self.author_name = author_name
+        self.author_icon = author_icon
+        self.thumbnail = thumbnail
+
+    def compile(self):
+        return CompiledTemplate(self)
+
+
+def _path_getter(source):
+    if callable(source):
+        return source
+    key, _, path = source.partition('.')
+    if not path:
+        return operator.itemgetter(key)
+    attr = operator.attrgetter(path)
+    return lambda ctx: attr(ctx[key])
+
+
+def _text_getter(source, limit):
+    get = _path_getter(source)
+
+    def text(ctx):
+        try:
+            value = get(ctx)
+        except AttributeError:
+            # a missing attribute (no avatar, channel gone...) shouldn't cost us the whole log
+            return None
+        if value is None:
+            return None
+        if value.__class__ is not str:
+            value = str(value)
+        if len(value) > limit:
+            value = value[:limit - 3] + '...'
+        return value
+
+    return text
+
+
+def _color_getter(source):
+    get = _path_getter(source)
+
+    def color(ctx):
+        value = get(ctx)
+        return getattr(value, 'value', value)
+
+    return color
+
+
+def _set_title(embed, value):
+    embed['title'] = value
+
+
+def _set_color(embed, value):
+    embed['color'] = value
+
+
+def _set_description(embed, value):
+    embed['description'] = value
+
+
+def _set_footer(embed, value):
+    embed['footer'] = {'text': value}
+
+
+def _set_author_name(embed, value):
+    embed.setdefault('author', {})['name'] = value
+
+
+def _set_author_icon(embed, value):
+    embed.setdefault('author', {})['icon_url'] = value
+
+
+def _set_thumbnail(embed, value):
+    embed['thumbnail'] = {'url': value}
+
+
+class CompiledTemplate:
+    """
+    An EmbedTemplate turned into two fast functions.
+
+    `extract(ctx)` pulls every dynamic part out of the live objects in the context and
+    returns them as a list of plain strings/ints (None for missing parts).
+    `render(values)` assembles those into the raw embed dict Discord expects, without
+    going through nextcord.Embed. Calling the template does both.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        static = {'type': 'rich'}
+        getters = []
+        setters = []
+
+        if callable(template.title):
+            getters.append(_text_getter(template.title, TITLE_LIMIT))
+            setters.append(_set_title)
+        elif template.title is not None:
+            static['title'] = template.title
+
+        head = (
+            (template.description, DESCRIPTION_LIMIT, _set_description),
+            (template.footer, FOOTER_LIMIT, _set_footer),
+            (template.author_name, AUTHOR_LIMIT, _set_author_name),
+            (template.author_icon, 2048, _set_author_icon),
+            (template.thumbnail, 2048, _set_thumbnail),
+        )
+        for part, limit, setter in head:
+            if part is not None:
+                getters.append(_text_getter(part, limit))
+                setters.append(setter)
+
+        color = template.color
+        if color is not None:
+            if callable(color) or isinstance(color, str):
+                getters.append(_color_getter(color))
+                setters.append(_set_color)
+            else:
+                static['color'] = getattr(color, 'value', color)
+
+        self.static = static
+        self.setters = tuple(setters)
+        self.head_size = len(setters)
+        self.field_specs = tuple((f.name, f.inline, f.optional) for f in template.fields)
+        getters.extend(_text_getter(f.source, f.limit) for f in template.fields)
+        self.getters = tuple(getters)
+
+    def extract(self, ctx):
+        return [get(ctx) for get in self.getters]
+
+    def render(self, values):
+        embed = self.static.copy()
+        head_size = self.head_size
+        for setter, value in zip(self.setters, values):
+            if value is not None:
+                setter(embed, value)
+        fields = []
+        for (name, inline, optional), value in zip(self.field_specs, values[head_size:]):
+            if value is None:
+                if optional:
+                    continue
+                value = 'None'
+            fields.append({'name': name, 'value': value or EMPTY_VALUE, 'inline': inline})
+        if fields:
+            embed['fields'] = fields
+        return embed
+
+    def __call__(self, ctx):
+        return self.render(self.extract(ctx))
+
+
+def compile_templates(templates):
+    """Compile a {name: EmbedTemplate} registry into {name: CompiledTemplate}."""
+    return {name: template.compile() for name, template in templates.items()}
+
+
+def embed_size(embed):
+    """Characters an embed dict counts towards Discord's 6000 per message limit."""
+    size = len(embed.get('title', '')) + len(embed.get('description', ''))
+    for field in embed.get('fields', ()):
+        size += len(field['name']) + len(field['value'])
+    footer = embed.get('footer')
+    if footer:
+        size += len(footer.get('text', ''))
+    author = embed.get('author')
+    if author:
+        size += len(author.get('name', ''))
+    return size
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+# Listener name -> token bucket settings. `rate` is tokens per second, `burst` the bucket
+# size and `window` how many seconds of overflow are folded into a single summary.
+# Buckets are kept per guild and channel, so one busy channel can't starve the rest.
+THROTTLES = {
+    'on_typing': {'rate': 5 / 60, 'burst': 5, 'window': 60},
+    'on_raw_typing': {'rate': 5 / 60, 'burst': 5, 'window': 60},
+    'on_presence_update': {'rate': 10 / 60, 'burst': 10, 'window': 60},
+    'on_reaction_add': {'rate': 20 / 60, 'burst': 20, 'window': 60},
+    'on_raw_reaction_add': {'rate': 20 / 60, 'burst': 20, 'window': 60},
+    'on_reaction_remove': {'rate': 20 / 60, 'burst': 20, 'window': 60},
+    'on_raw_reaction_remove': {'rate': 20 / 60, 'burst': 20, 'window': 60},
+}
+
+# Buckets that have been idle this long are full again and can be forgotten.
+SWEEP_INTERVAL = 300
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Summary:
+    __slots__ = ('count', 'users')
+
+    def __init__(self):
+        self.count = 0
+        self.users = set()
+
+
+class Throttle:
+    """
+    Caps how often noisy listeners get to log.
+
+    `allow` takes a token from the (event, guild, channel) bucket. Once the bucket is
+    empty the event is counted instead of logged, and when the window is over
+    `on_summary(event, guild_id, channel_id, count, users, window)` is called once for
+    everything that was held back, `users` being the number of distinct users.
+    """
+
+    def __init__(self, on_summary, limits=None):
+        self.on_summary = on_summary
+        self.limits = limits or THROTTLES
+        self.buckets = {}
+        self.summaries = {}
+        self._last_sweep = time.monotonic()
+
+    def allow(self, event, guild_id, channel_id=None, user_id=None):
+        limit = self.limits.get(event)
+        if limit is None:
+            return True
+
+        now = time.monotonic()
+        key = (event, guild_id, channel_id)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(limit['rate'], limit['burst'])
+        if bucket.take(now):
+            if now - self._last_sweep > SWEEP_INTERVAL:
+                self._sweep(now)
+            return True
+
+        summary = self.summaries.get(key)
+        if summary is None:
+            summary = self.summaries[key] = Summary()
+            asyncio.get_running_loop().call_later(limit['window'], self._flush, key, limit['window'])
+        summary.count += 1
+        if user_id is not None:
+            summary.users.add(user_id)
+        return False
+
+    def _flush(self, key, window):
+        summary = self.summaries.pop(key, None)
+        if summary and summary.count:
+            event, guild_id, channel_id = key
+            self.on_summary(event, guild_id, channel_id, summary.count, len(summary.users), window)
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        for key, bucket in list(self.buckets.items()):
+            if key not in self.summaries and now - bucket.updated > SWEEP_INTERVAL:
+                del self.buckets[key]
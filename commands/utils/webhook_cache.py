@@ -0,0 +1,46 @@
+class WebhookDiff:
+    __slots__ = ('added', 'removed', 'renamed', 'initial')
+
+    def __init__(self, added, removed, renamed, initial):
+        self.added = added  # [Webhook]
+        self.removed = removed  # [(webhook id, name)]
+        self.renamed = renamed  # [(old name, Webhook)]
+        self.initial = initial  # True when there was no earlier snapshot to diff against
+
+
+class WebhookSnapshots:
+    """
+    The last known webhooks of every channel we've seen a webhooks update for.
+
+    `refresh` fetches a channel's webhooks once and diffs them against the stored
+    snapshot, so an update costs one request and reports what actually changed.
+    The snapshots double as a name lookup for audit log entries that target a webhook.
+    """
+
+    def __init__(self):
+        self.channels = {}  # channel id -> {webhook id: name}
+        self.names = {}  # webhook id -> name, including webhooks since removed
+
+    async def refresh(self, channel):
+        webhooks = await channel.webhooks()
+        current = {webhook.id: webhook.name for webhook in webhooks}
+        before = self.channels.get(channel.id)
+        self.channels[channel.id] = current
+        self.names.update(current)
+
+        if before is None:
+            return WebhookDiff(webhooks, [], [], initial=True)
+        added = [webhook for webhook in webhooks if webhook.id not in before]
+        removed = [(webhook_id, name) for webhook_id, name in before.items() if webhook_id not in current]
+        renamed = [
+            (before[webhook.id], webhook)
+            for webhook in webhooks
+            if webhook.id in before and before[webhook.id] != webhook.name
+        ]
+        return WebhookDiff(added, removed, renamed, initial=False)
+
+    def name_of(self, webhook_id):
+        return self.names.get(webhook_id)
+
+    def forget_channel(self, channel_id):
+        self.channels.pop(channel_id, None)
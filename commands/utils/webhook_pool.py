@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+import time
+
+import aiohttp
+import nextcord
+
+WEBHOOK_NAME = 'Logger'
+
+
+class PooledWebhook:
+    __slots__ = ('webhook', 'remaining', 'blocked_until')
+
+    def __init__(self, webhook):
+        self.webhook = webhook
+        self.remaining = None
+        self.blocked_until = 0.0
+
+
+class WebhookPool:
+    """
+    Delivers log messages through a pool of webhooks on the logger channel.
+
+    Every webhook has its own rate limit bucket, so rotating sends across the pool
+    raises the sustained throughput well above the bot's single channel-send bucket.
+    The rate limit headers of every webhook response are recorded through an aiohttp
+    trace hook, and a webhook whose bucket is exhausted is skipped until it resets.
+    Webhooks deleted by someone else are recreated on the next send.
+    """
+
+    def __init__(self, channel, size=3):
+        self.channel = channel
+        self.size = size
+        self.hooks = {}  # webhook id -> PooledWebhook
+        self._rotation = itertools.count()
+        self._lock = asyncio.Lock()
+        self._session = None
+        self.disabled = False
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_end.append(self._on_request_end)
+            self._session = aiohttp.ClientSession(trace_configs=[trace])
+        return self._session
+
+    async def _on_request_end(self, session, ctx, params):
+        # /api/v10/webhooks/{id}/{token}
+        parts = params.url.path.split('/')
+        try:
+            hook = self.hooks.get(int(parts[parts.index('webhooks') + 1]))
+        except (ValueError, IndexError):
+            return
+        if hook is None:
+            return
+
+        headers = params.response.headers
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            hook.remaining = int(remaining)
+        if hook.remaining == 0 or params.response.status == 429:
+            reset_after = float(headers.get('X-RateLimit-Reset-After') or headers.get('Retry-After') or 1)
+            hook.blocked_until = time.monotonic() + reset_after
+
+    async def _fill(self):
+        async with self._lock:
+            if len(self.hooks) >= self.size:
+                return
+            me = self._me()
+            if not self.hooks:
+                # reuse the webhooks we created on an earlier run
+                for webhook in await self.channel.webhooks():
+                    if webhook.name == WEBHOOK_NAME and webhook.user == me and webhook.token:
+                        self._add(webhook)
+            while len(self.hooks) < self.size:
+                self._add(await self.channel.create_webhook(name=WEBHOOK_NAME, reason='Logger delivery pool'))
+
+    def _add(self, webhook):
+        if len(self.hooks) < self.size:
+            partial = nextcord.Webhook.partial(webhook.id, webhook.token, session=self._get_session())
+            self.hooks[webhook.id] = PooledWebhook(partial)
+
+    def _me(self):
+        # a delivery worker (see delivery.py) fetched the channel without its guild's members
+        return getattr(self.channel.guild, 'me', None) or self.channel._state.user
+
+    def _pick(self):
+        hooks = list(self.hooks.values())
+        start = next(self._rotation)
+        now = time.monotonic()
+        for i in range(len(hooks)):
+            hook = hooks[(start + i) % len(hooks)]
+            if hook.blocked_until <= now:
+                return hook, 0.0
+        hook = min(hooks, key=lambda h: h.blocked_until)
+        return hook, hook.blocked_until - now
+
+    async def send(self, embeds):
+        """Send one batch of embed dicts through the next webhook whose bucket has room."""
+        return await self._deliver([nextcord.Embed.from_dict(embed) for embed in embeds])
+
+    async def _deliver(self, embeds):
+        if self.disabled:
+            return await self.channel.send(embeds=embeds)
+        try:
+            await self._fill()
+        except nextcord.Forbidden:
+            print(f'Logger: missing Manage Webhooks in #{self.channel}, falling back to channel sends')
+            self.disabled = True
+            return await self.channel.send(embeds=embeds)
+
+        hook, delay = self._pick()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        me = self._me()
+        try:
+            return await hook.webhook.send(
+                embeds=embeds,
+                username=me.display_name,
+                avatar_url=me.display_avatar.url,
+                wait=True,
+            )
+        except nextcord.NotFound:
+            # somebody deleted it, replace it and retry through the rest of the pool
+            self.hooks.pop(hook.webhook.id, None)
+            return await self._deliver(embeds)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
@@ -1,5 +1,7 @@
-import importlib
 import time
+started = time.perf_counter()
+
+import importlib
 import nextcord 
 from nextcord.ext import commands
 from dotenv import load_dotenv
@@ -7,13 +9,32 @@ import os
 from termcolor import cprint
 import time
 
+from commands.cogs import DEFERRED, EXTENSIONS
+from commands.cogs.log.Recorder import RECORD_ENV
+from commands.utils.guild_config import GuildConfigStore
+from commands.utils.intents import enabled_events, intents_for
+from commands.utils.shards import sharding_from_env
+from commands.utils.startup import DeferredExtensions, StartupTimer, import_parallel, load_extensions
+
 load_dotenv()
 
 # Access the TOKEN variable
 token = os.getenv('TOKEN')
 
 
-bot = commands.Bot(command_prefix='q', intents=nextcord.Intents.all(), activity=nextcord.Activity(type=nextcord.ActivityType.watching, name="your discord server!"))
+# only ask Discord for the events we actually log
+config = GuildConfigStore()
+config.load()
+intents = intents_for(enabled_events(config))
+
+# SHARD_COUNT/SHARD_IDS (set by cluster.py for each of its processes) switch to an AutoShardedBot
+sharding = sharding_from_env()
+bot_class = commands.AutoShardedBot if sharding is not None else commands.Bot
+
+# the gateway recorder (cogs/log/Recorder.py) needs the raw socket events, which cost a dispatch per payload
+bot = bot_class(command_prefix='q', intents=intents, enable_debug_events=bool(os.getenv(RECORD_ENV)),
+                activity=nextcord.Activity(type=nextcord.ActivityType.watching, name="your discord server!"),
+                **(sharding or {}))
 
 @bot.event
 async def on_ready():
@@ -39,25 +60,27 @@ async def on_ready():
 
 
 """
-   #* This is the main file of the bot. It loads all the cogs in the commands/cogs directory.
+   #* This is the main file of the bot. It loads the extensions listed in commands/cogs/__init__.py.
 """
-cogs_dir = "commands/cogs"
+timer = StartupTimer(started)
+timer.mark('imports and setup')
 
-loaded_cogs = []
-loaded_folders = []
+# with DEFER_COGS set, extensions that only provide prefix commands load when first used;
+# the metrics endpoint has to be up from the start though
+deferred = dict(DEFERRED) if os.getenv('DEFER_COGS') else {}
+if os.getenv('METRICS_PORT'):
+    deferred.pop('commands.cogs.log.Stats', None)
+extensions = [extension for extension in EXTENSIONS if extension not in deferred]
+lazy = DeferredExtensions(bot, deferred)
 
-for root, dirs, files in os.walk(cogs_dir):
-    if root in loaded_folders:
-        continue
-    for filename in files:
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = f"{root.replace('/', '.').replace(os.sep, '.')}.{filename[:-3]}"
-            bot.load_extension(module_name)
-    if "__init__.py" in files:
-        loaded_folders.append(root)
+timer.mark('extension imports', import_parallel(extensions))
+timer.mark('cog init', load_extensions(bot, extensions))
+timer.attach(bot)
 
-
-   
+@bot.event
+async def on_command_error(ctx, error):
+  if not await lazy.on_command_error(ctx, error):
+    await commands.Bot.on_command_error(bot, ctx, error)
 
 bot.run(token)
 